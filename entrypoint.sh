@@ -11,4 +11,5 @@ done
 echo "PostgreSQL started"
 
 python manage.py migrate
+python manage.py create_download_partitions
 python manage.py runserver 0.0.0.0:8000
@@ -0,0 +1,33 @@
+# file_storage_app/authentication.py
+
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+from files.tokens import InvalidToken, read_token, token_user
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    ``Authorization: Bearer <token>`` with tokens from ``files.tokens``.
+
+    The signature and expiry are checked in memory and revocations against
+    the cached deny-list, so an authenticated request needs no session or
+    user lookup. ``request.auth`` holds the token's claims.
+    """
+    keyword = b'bearer'
+
+    def authenticate(self, request):
+        parts = get_authorization_header(request).split()
+        if not parts or parts[0].lower() != self.keyword:
+            return None
+        if len(parts) != 2:
+            raise AuthenticationFailed('Invalid token header.')
+        try:
+            claims = read_token(parts[1].decode('ascii'))
+        except UnicodeDecodeError:
+            raise AuthenticationFailed('Invalid token header.')
+        except InvalidToken as exc:
+            raise AuthenticationFailed(str(exc))
+        return token_user(claims), claims
+
+    def authenticate_header(self, request):
+        return 'Bearer'
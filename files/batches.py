@@ -0,0 +1,174 @@
+# file_storage_app/batches.py
+
+import posixpath
+import tarfile
+import zipfile
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+from files.blobs import acquire_blob, release_blob
+from files.checksums import compute_checksum
+from files.caching import invalidate
+from files.models import File
+from files.sniffing import sniff_file
+from files.uploadhandlers import StoredUploadedFile, StreamTooLarge, stage_stream
+
+
+BatchResult = namedtuple('BatchResult', ['name', 'status', 'file', 'detail'])
+
+
+def _member_name(path):
+    return posixpath.normpath(path).lstrip('/')
+
+
+def archive_items(archive):
+    """
+    Yield ``(name, uploaded_file)`` for every regular file in a zip or tar
+    ``archive``, staging one member at a time. Names are the members' paths.
+
+    Unpacking stops with a validation error once the members add up to more
+    than ``BATCH_UPLOAD_MAX_BYTES``, whatever sizes the archive declares.
+    """
+    max_bytes = settings.BATCH_UPLOAD_MAX_BYTES
+    staged = 0
+
+    def stage(stream, name):
+        nonlocal staged
+        upload = stage_stream(stream, posixpath.basename(name), max_size=max_bytes - staged)
+        staged += upload.size
+        return upload
+
+    try:
+        if zipfile.is_zipfile(archive):
+            archive.seek(0)
+            with zipfile.ZipFile(archive) as bundle:
+                for info in bundle.infolist():
+                    if info.is_dir():
+                        continue
+                    name = _member_name(info.filename)
+                    with bundle.open(info) as member:
+                        yield name, stage(member, name)
+            return
+        archive.seek(0)
+        # Stream mode reads the tar sequentially, including compressed ones.
+        with tarfile.open(fileobj=archive, mode='r|*') as bundle:
+            for info in bundle:
+                if not info.isfile():
+                    continue
+                name = _member_name(info.name)
+                yield name, stage(bundle.extractfile(info), name)
+    except (tarfile.TarError, zipfile.BadZipFile, EOFError):
+        raise ValidationError({'archive': 'Not a readable zip or tar archive.'})
+    except StreamTooLarge:
+        raise ValidationError({'archive': f'The archive unpacks to more than {max_bytes} bytes.'})
+
+
+def _describe(upload):
+    if isinstance(upload, StoredUploadedFile):
+        return upload.content_type, upload.checksum
+    return sniff_file(upload), compute_checksum(upload)
+
+
+def _rejection(name, seen, max_length):
+    """
+    ``(status, detail)`` for a name that cannot be created, otherwise None.
+    """
+    if not name or len(name) > max_length:
+        return 400, f'File names must be 1 to {max_length} characters long.'
+    if name in seen:
+        return 409, f"'{name}' appears more than once in this batch."
+    return None
+
+
+def _create_files(organization, results, pending):
+    """
+    Insert the Files of ``pending`` result positions with one INSERT,
+    turning names that are already taken into conflicts.
+    """
+    retried = False
+    while pending:
+        names = [results[index].name for index in pending]
+        taken = set(File.objects.filter(organization=organization, name__in=names).values_list('name', flat=True))
+        if retried and not taken:
+            raise IntegrityError('Batch upload failed for a reason other than a name conflict.')
+        for index in pending:
+            result = results[index]
+            if result.name in taken:
+                release_blob(result.file.blob_id)
+                results[index] = BatchResult(
+                    result.name, 409, None, f"A file named '{result.name}' already exists in this organization."
+                )
+        pending = [index for index in pending if results[index].status == 201]
+        try:
+            with transaction.atomic():
+                File.objects.bulk_create([results[index].file for index in pending])
+            return
+        except IntegrityError:
+            # A concurrent upload took one of the names after the check above.
+            retried = True
+
+
+def upload_batch(organization, user, items):
+    """
+    Create a File for every ``(name, uploaded_file)`` in ``items``.
+
+    Returns one ``BatchResult`` per item, in order, with the HTTP status of
+    that item: 201 with the new File, 409 when the name is already taken
+    (in the organization or earlier in the batch) and 400 for an invalid
+    name. Contents are staged, hashed and sniffed as they arrive, outside
+    any transaction. Only then are the blobs acquired, in checksum order,
+    and the File rows written with one INSERT, in a single short
+    transaction, so blob rows stay locked for that step alone.
+    """
+    max_files = settings.BATCH_UPLOAD_MAX_FILES
+    max_length = File._meta.get_field('name').max_length
+    results, staged, seen, stored, kept = [], [], set(), [], []
+    try:
+        for name, upload in items:
+            if len(results) >= max_files:
+                upload.close()
+                raise ValidationError(f'A batch may contain at most {max_files} files.')
+            rejection = _rejection(name, seen, max_length)
+            if rejection is not None:
+                upload.close()
+                results.append(BatchResult(name, rejection[0], None, rejection[1]))
+                continue
+            seen.add(name)
+            # Kept open, and on disk, until its blob is acquired below.
+            kept.append(upload)
+            staged.append((len(results), name, upload) + _describe(upload))
+            # Filled in with the File once its blob is acquired.
+            results.append(BatchResult(name, 201, None, None))
+
+        with transaction.atomic():
+            # A fixed lock order keeps concurrent batches sharing content from deadlocking.
+            for index, name, upload, content_type, checksum in sorted(staged, key=lambda item: item[4]):
+                blob, created = acquire_blob(upload, checksum)
+                if created:
+                    stored.append(blob)
+                results[index] = BatchResult(name, 201, File(
+                    organization=organization,
+                    uploaded_by=user,
+                    name=name,
+                    blob=blob,
+                    file=blob.file.name,
+                    file_size=blob.size,
+                    content_type=content_type,
+                    checksum=blob.checksum,
+                    content_encoding=blob.content_encoding,
+                    stored_size=blob.stored_size
+                ), None)
+            _create_files(organization, results, [index for index, *_ in staged])
+            # bulk_create sends no post_save, so listings are invalidated here.
+            invalidate([organization.id])
+    except BaseException:
+        # Nothing references the bytes this batch stored any more.
+        for blob in stored:
+            blob.file.delete(save=False)
+        raise
+    finally:
+        for upload in kept:
+            upload.close()
+    return results
@@ -0,0 +1,246 @@
+# file_storage_app/benchmark.py
+
+import asyncio
+import math
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models import Max, Min
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+from files.models import File, Organization, User
+
+
+ENDPOINTS = {
+    'files': lambda sample: reverse('global-file-list'),
+    'organizations': lambda sample: reverse('organizations-list'),
+    'organization-files': lambda sample: reverse(
+        'organization-file-list-create', kwargs={'org_id': sample.pick('organization_ids')}
+    ),
+    'user-downloads': lambda sample: reverse('user-download-history', kwargs={'user_id': sample.pick('user_ids')}),
+    'file-downloads': lambda sample: reverse('file-download-history', kwargs={'file_id': sample.pick('file_ids')}),
+    'download': lambda sample: reverse('file-download', kwargs={'file_id': sample.pick('file_ids')}),
+}
+
+
+def _sample_ids(model, rng, size):
+    bounds = model.objects.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return []
+    candidates = {rng.randint(bounds['low'], bounds['high']) for _ in range(size)}
+    # Ids may have gaps; keep the ones that exist, plus one that surely does.
+    existing = list(model.objects.filter(id__in=candidates).values_list('id', flat=True))
+    return existing or [bounds['low']]
+
+
+class Sample:
+    """
+    Ids that generated request paths are drawn from.
+    """
+
+    def __init__(self, rng, size=1000, **ids):
+        self.rng = rng
+        self.ids = ids or {
+            'organization_ids': _sample_ids(Organization, rng, size),
+            'user_ids': _sample_ids(User, rng, size),
+            'file_ids': _sample_ids(File, rng, size),
+        }
+
+    def pick(self, key):
+        return self.rng.choice(self.ids[key])
+
+
+class QueryCounter:
+    """
+    Counts queries on every connection of every thread while installed.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def _install(self, sender, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    @contextmanager
+    def installed(self):
+        # Connections opened by worker threads are picked up as they connect.
+        connection_created.connect(self._install, weak=False)
+        current = list(connections.all(initialized_only=True))
+        for connection in current:
+            self._install(None, connection)
+        try:
+            yield self
+        finally:
+            connection_created.disconnect(self._install)
+            for connection in current:
+                if self in connection.execute_wrappers:
+                    connection.execute_wrappers.remove(self)
+
+
+def percentile(sorted_values, percent):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _drain(response):
+    # Streaming responses (downloads) are read to the end so the whole transfer is timed.
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    response.close()
+
+
+def _run_wsgi(user, paths, concurrency):
+    results = []
+    lock = threading.Lock()
+
+    def worker(worker_paths):
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+        timings = []
+        try:
+            for path in worker_paths:
+                started = time.perf_counter()
+                response = client.get(path)
+                _drain(response)
+                timings.append((time.perf_counter() - started, response.status_code))
+        finally:
+            with lock:
+                results.extend(timings)
+            if threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+
+    chunks = [paths[i::concurrency] for i in range(concurrency)]
+    if concurrency == 1:
+        worker(chunks[0])
+    else:
+        threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return results
+
+
+def _run_asgi(user, paths, concurrency):
+    client = AsyncClient(raise_request_exception=False)
+    client.force_login(user)
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+        results = []
+
+        async def one(path):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                _drain(response)
+                results.append((time.perf_counter() - started, response.status_code))
+
+        await asyncio.gather(*(one(path) for path in paths))
+        return results
+
+    return async_to_sync(run)()
+
+
+def run_endpoint(name, sample, requests=200, concurrency=8, warmup=10, asgi=False, user=None):
+    """
+    Drive one endpoint through the in-process WSGI (or ASGI) handler and summarize it.
+    """
+    make_path = ENDPOINTS[name]
+    user = user or User.objects.get(pk=sample.ids['user_ids'][0])
+    runner = _run_asgi if asgi else _run_wsgi
+
+    paths = [make_path(sample) for _ in range(requests)]
+    counter = QueryCounter()
+    # The test clients always send "Host: testserver".
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        if warmup:
+            runner(user, [make_path(sample) for _ in range(warmup)], 1)
+        with counter.installed():
+            started = time.perf_counter()
+            results = runner(user, paths, concurrency)
+            elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    statuses = Counter(status for _, status in results)
+    return {
+        'requests': len(results),
+        'errors': sum(count for status, count in statuses.items() if status >= 400),
+        'status_codes': {str(status): count for status, count in sorted(statuses.items())},
+        'elapsed_s': round(elapsed, 4),
+        'throughput_rps': round(len(results) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'min': round(latencies[0], 3),
+            'mean': round(statistics.fmean(latencies), 3),
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'max': round(latencies[-1], 3),
+        } if latencies else None,
+        # Includes session and user lookups done by the authentication middleware.
+        'queries_per_request': round(counter.count / len(results), 2) if results else None,
+    }
+
+
+def compare_results(baseline, current, max_regression=10.0):
+    """
+    Compare two benchmark reports endpoint by endpoint.
+
+    Returns ``(rows, regressions)``: one row per endpoint present in both
+    reports, and the subset whose p95 latency rose, or whose throughput
+    fell, by more than ``max_regression`` percent, or that now run more
+    queries per request or fail more requests.
+    """
+    rows, regressions = [], []
+    for name, result in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if not before or not before.get('latency_ms') or not result.get('latency_ms'):
+            continue
+        p95_change = _change(before['latency_ms']['p95'], result['latency_ms']['p95'])
+        throughput_change = _change(before['throughput_rps'], result['throughput_rps'])
+        row = {
+            'endpoint': name,
+            'p95_ms': (before['latency_ms']['p95'], result['latency_ms']['p95']),
+            'p95_change_pct': p95_change,
+            'throughput_rps': (before['throughput_rps'], result['throughput_rps']),
+            'throughput_change_pct': throughput_change,
+            'queries_per_request': (before.get('queries_per_request'), result.get('queries_per_request')),
+        }
+        rows.append(row)
+        row['errors'] = (before.get('errors', 0), result.get('errors', 0))
+        queries_rose = (row['queries_per_request'][0] or 0) < (row['queries_per_request'][1] or 0)
+        errors_rose = row['errors'][0] < row['errors'][1]
+        if p95_change > max_regression or throughput_change < -max_regression or queries_rose or errors_rose:
+            regressions.append(row)
+    return rows, regressions
+
+
+def _change(before, after):
+    if not before:
+        return 0.0
+    return round((after - before) / before * 100, 2)
+
+
+def make_sample(seed=None, size=1000):
+    return Sample(random.Random(seed), size=size)
@@ -0,0 +1,86 @@
+# file_storage_app/blobs.py
+
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from files.checksums import compute_checksum
+from files.models import Blob
+
+
+def _reference_existing(checksum):
+    blob = Blob.objects.select_for_update().filter(checksum=checksum).first()
+    if blob is None:
+        return None
+    Blob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+    blob.ref_count += 1
+    return blob
+
+
+def acquire_blob(content, checksum=None):
+    """
+    Take a reference on the blob holding ``content``, storing it if it is new.
+
+    Returns ``(blob, created)``. When a blob with the same checksum already
+    exists only its reference count changes and nothing is written to storage.
+    Must be called inside a transaction.
+    """
+    if checksum is None:
+        checksum = compute_checksum(content)
+    blob = _reference_existing(checksum)
+    if blob is not None:
+        return blob, False
+
+    blob = Blob(
+        checksum=checksum,
+        size=content.size,
+        ref_count=1,
+        # Uploads staged by BlobUploadHandler may already be encoded.
+        content_encoding=getattr(content, 'content_encoding', ''),
+        stored_size=getattr(content, 'stored_size', None)
+    )
+    blob.file.save(checksum, content, save=False)
+    try:
+        with transaction.atomic():
+            blob.save()
+    except IntegrityError:
+        # A concurrent upload stored the same content first; use its copy.
+        blob.file.delete(save=False)
+        return _reference_existing(checksum), False
+    return blob, True
+
+
+@contextmanager
+def blob_reference(content, checksum=None):
+    """
+    Acquire a blob for the body of an atomic block.
+
+    If the block fails the reference is rolled back with it, and bytes this
+    call wrote to storage are removed so they do not linger unreferenced.
+    """
+    blob, created = None, False
+    try:
+        with transaction.atomic():
+            blob, created = acquire_blob(content, checksum)
+            yield blob
+    except BaseException:
+        if created:
+            blob.file.delete(save=False)
+        raise
+
+
+def release_blob(blob_id):
+    """
+    Drop one reference on a blob, deleting it and its bytes on the last one.
+    """
+    with transaction.atomic():
+        blob = Blob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None:
+            return
+        if blob.ref_count > 1:
+            Blob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+            return
+        # Referencing Files are gone by now, so the PROTECT relation does not block this.
+        blob.delete()
+        storage, name = blob.file.storage, blob.file.name
+        transaction.on_commit(lambda: storage.delete(name))
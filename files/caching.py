@@ -0,0 +1,117 @@
+# file_storage_app/caching.py
+
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.response import Response
+from files.routers import reading_from_replica
+
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'files:generation'
+
+
+def organization_version_key(organization_id):
+    return f'files:organization:{organization_id}:version'
+
+
+def _cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def is_process_local(cache):
+    """
+    Whether every worker process has its own copy of ``cache``, so a write
+    cannot clear or bump what the other workers have stored.
+    """
+    return isinstance(cache, (LocMemCache, DummyCache))
+
+
+def _initial_version():
+    # A version key that was evicted must not restart at a value an old entry was stored under.
+    return time.time_ns() // 1000
+
+
+def read_version(key):
+    cache = _cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(keys):
+    cache = _cache()
+    for key in keys:
+        try:
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, _initial_version(), timeout=None)
+        except Exception:
+            logger.exception('Could not bump cache version %s; cached responses may be stale until they expire.', key)
+
+
+def invalidate(organization_ids=()):
+    """
+    Invalidate cached responses after a write: the global generation always,
+    and the versions of ``organization_ids``.
+
+    The versions are bumped right away and again once the current transaction
+    commits. A request that read the old data while the transaction was still
+    open may have stored it under the first bump; the second one retires it.
+    Outside a transaction both bumps happen immediately.
+    """
+    keys = [GENERATION_KEY, *(organization_version_key(pk) for pk in set(organization_ids))]
+    _bump(keys)
+    transaction.on_commit(lambda: _bump(keys))
+
+
+class CachedListMixin:
+    """
+    Serve ``list()`` from the cache under a key that embeds the current versions.
+
+    The versions are read before the response is computed, so a write that
+    lands while it is being computed moves readers to a new key and the
+    result, stored under the old one, is never served again. Views that
+    depend on a single organization override ``get_cache_versions``.
+
+    With a process-local cache the other workers would never see the
+    versions a write bumps, so responses are not cached at all.
+    """
+
+    def get_cache_versions(self):
+        return [read_version(GENERATION_KEY)]
+
+    def get_cache_timeout(self):
+        # A replica may not have replayed the write that moved the versions yet,
+        # so what it returns is kept no longer than writers stay pinned to the primary.
+        if reading_from_replica():
+            return min(settings.API_CACHE_TIMEOUT, settings.DATABASE_REPLICA_PIN_SECONDS)
+        return settings.API_CACHE_TIMEOUT
+
+    def get_cache_key(self, request):
+        versions = '.'.join(str(version) for version in self.get_cache_versions())
+        target = hashlib.md5(f'{request.get_host()}{request.get_full_path()}'.encode()).hexdigest()
+        return f'files:response:{type(self).__name__}:{versions}:{target}'
+
+    def list(self, request, *args, **kwargs):
+        cache = _cache()
+        if is_process_local(cache):
+            return super().list(request, *args, **kwargs)
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.get_cache_timeout())
+        return response
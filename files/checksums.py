@@ -0,0 +1,22 @@
+# file_storage_app/checksums.py
+
+import hashlib
+
+
+CHECKSUM_ALGORITHM = 'sha256'
+
+
+def new_hasher():
+    return hashlib.new(CHECKSUM_ALGORITHM)
+
+
+def compute_checksum(file):
+    """
+    Hash a Django ``File`` chunk by chunk without loading it into memory.
+    """
+    hasher = new_hasher()
+    for chunk in file.chunks():
+        hasher.update(chunk)
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    return hasher.hexdigest()
@@ -0,0 +1,104 @@
+# file_storage_app/compression.py
+
+import gzip
+
+from django.conf import settings
+from files.sniffing import is_textual
+
+
+ENCODINGS = ('gzip',)
+
+# Binary formats that carry no compression of their own and shrink well.
+COMPRESSIBLE_TYPES = {
+    'application/x-tar',
+    'application/vnd.sqlite3',
+    'application/x-executable',
+    'application/vnd.microsoft.portable-executable',
+    'image/bmp',
+    'image/tiff',
+    'audio/wav',
+}
+
+
+def choose_encoding(content_type):
+    """
+    The encoding to store an upload of ``content_type`` in, or '' to store
+    it as is.
+    """
+    encoding = settings.STORAGE_COMPRESSION['ENCODING']
+    if not encoding:
+        return ''
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown storage encoding '{encoding}'.")
+    if is_textual(content_type) or content_type in COMPRESSIBLE_TYPES:
+        return encoding
+    return ''
+
+
+def encoder(encoding, fileobj):
+    """
+    A writer that encodes into ``fileobj``. Closing it finishes the encoded
+    stream but leaves ``fileobj`` open.
+    """
+    # A fixed mtime keeps the stored bytes a function of the content alone.
+    return gzip.GzipFile(
+        fileobj=fileobj, mode='wb', mtime=0, compresslevel=settings.STORAGE_COMPRESSION['LEVEL']
+    )
+
+
+class _GzipReader(gzip.GzipFile):
+    """
+    Decodes a gzip stream and closes the stream along with itself.
+    """
+
+    def __init__(self, fileobj):
+        super().__init__(fileobj=fileobj, mode='rb')
+        self._encoded = fileobj
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._encoded.close()
+
+
+def decoder(encoding, fileobj):
+    """
+    A reader of the original bytes of ``fileobj`` stored in ``encoding``.
+    """
+    if not encoding:
+        return fileobj
+    if encoding == 'gzip':
+        return _GzipReader(fileobj)
+    raise ValueError(f"Unknown storage encoding '{encoding}'.")
+
+
+def accepts_encoding(request, encoding):
+    """
+    Whether the request's ``Accept-Encoding`` allows a response in ``encoding``.
+
+    A missing header is treated as identity only: many clients that send
+    none cannot decode anything else.
+    """
+    header = request.headers.get('Accept-Encoding')
+    if not header:
+        return False
+    quality = wildcard = None
+    for item in header.split(','):
+        token, *params = [part.strip() for part in item.split(';')]
+        value = 1.0
+        for param in params:
+            name, _, number = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    value = float(number)
+                except ValueError:
+                    value = 0.0
+        token = token.lower()
+        if token == encoding:
+            quality = value
+        elif token == '*':
+            wildcard = value
+    if quality is None:
+        quality = wildcard or 0.0
+    return quality > 0
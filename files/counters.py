@@ -0,0 +1,166 @@
+# file_storage_app/counters.py
+
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from files.caching import invalidate
+from files.models import ArchivedDownloadCount, Download, File, FileDownloadCounter, OrganizationDownloadCounter
+
+
+def _increment(model, key, counts):
+    shards = settings.DOWNLOAD_COUNTER_SHARDS
+    # A fixed lock order keeps concurrent batches from deadlocking on each other.
+    for object_id in sorted(counts):
+        amount = counts[object_id]
+        lookup = {key: object_id, 'shard': random.randrange(shards)}
+        if model.objects.filter(**lookup).update(count=F('count') + amount):
+            continue
+        try:
+            with transaction.atomic():
+                model.objects.create(count=amount, **lookup)
+        except IntegrityError:
+            model.objects.filter(**lookup).update(count=F('count') + amount)
+
+
+def increment_download_counters(file_counts):
+    """
+    Add ``{file_id: downloads}`` to the file and organization counters.
+    """
+    file_counts = {file_id: amount for file_id, amount in file_counts.items() if amount}
+    if not file_counts:
+        return
+    organizations = dict(File.objects.filter(pk__in=file_counts).values_list('id', 'organization_id'))
+    organization_counts = Counter()
+    for file_id, amount in file_counts.items():
+        if file_id in organizations:
+            organization_counts[organizations[file_id]] += amount
+    with transaction.atomic():
+        _increment(FileDownloadCounter, 'file_id', file_counts)
+        _increment(OrganizationDownloadCounter, 'organization_id', organization_counts)
+
+
+def _discount(model, key, counts):
+    # Same lock order as _increment; shards are emptied in order and never go below zero.
+    for object_id in sorted(counts):
+        remaining = counts[object_id]
+        shards = model.objects.select_for_update().filter(**{key: object_id, 'count__gt': 0}).order_by('shard')
+        for shard in shards:
+            amount = min(shard.count, remaining)
+            model.objects.filter(pk=shard.pk).update(count=F('count') - amount)
+            remaining -= amount
+            if not remaining:
+                break
+
+
+def discount_file_downloads(file_object):
+    """
+    Take the downloads of ``file_object`` off its organization's counters.
+
+    Called before the file is deleted, while its own counter shards, which
+    cascade away with it, still hold its total. The amount is spread over
+    the organization's shards, none of which may go below zero.
+    """
+    remaining = FileDownloadCounter.objects.filter(file_id=file_object.pk).aggregate(total=Sum('count'))['total']
+    if not remaining:
+        return
+    with transaction.atomic():
+        _discount(OrganizationDownloadCounter, 'organization_id', {file_object.organization_id: remaining})
+
+
+def discount_user_downloads(user):
+    """
+    Take the downloads made by ``user`` off the file and organization counters.
+
+    Called before the user is deleted, while their Download rows, which
+    cascade away with them, can still be counted. Files the user uploaded
+    are deleted with them and discount themselves, so they are skipped.
+    """
+    rows = (
+        Download.objects.filter(downloaded_by=user).exclude(file__uploaded_by=user).order_by()
+        .values('file_id', 'file__organization_id').annotate(total=Count('id'))
+    )
+    file_counts, organization_counts = {}, Counter()
+    for row in rows:
+        file_counts[row['file_id']] = row['total']
+        organization_counts[row['file__organization_id']] += row['total']
+    if not file_counts:
+        return
+    with transaction.atomic():
+        _discount(FileDownloadCounter, 'file_id', file_counts)
+        _discount(OrganizationDownloadCounter, 'organization_id', organization_counts)
+
+
+def _shard_sum(model, key, outer):
+    total = (
+        model.objects.filter(**{key: OuterRef(outer)})
+        .values(key)
+        .annotate(total=Sum('count'))
+        .values('total')
+    )
+    return Coalesce(Subquery(total), Value(0))
+
+
+def file_download_count(outer='pk'):
+    """
+    Expression for ``File`` querysets: the sum of the file's counter shards.
+
+    Pass ``outer='file_id'`` to annotate rows that reference a file instead.
+    """
+    return _shard_sum(FileDownloadCounter, 'file', outer)
+
+
+def organization_download_count():
+    """
+    Expression for ``Organization`` querysets: the sum of its counter shards.
+    """
+    return _shard_sum(OrganizationDownloadCounter, 'organization', 'pk')
+
+
+def rebuild_download_counters(using='default'):
+    """
+    Recompute every counter from the Download table, collapsing shards.
+    Downloads in detached partitions are no longer in that table, so the
+    counts recorded for them in ``ArchivedDownloadCount`` are added back.
+
+    On PostgreSQL the counter tables are locked first. Download rows and
+    their counter increments are committed together, so a download either
+    is in the snapshot being counted or its increment waits for the lock
+    and lands on top of the rebuilt counts.
+    """
+    with transaction.atomic(using=using):
+        connection = connections[using]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'LOCK TABLE {FileDownloadCounter._meta.db_table}, '
+                    f'{OrganizationDownloadCounter._meta.db_table} IN EXCLUSIVE MODE'
+                )
+        FileDownloadCounter.objects.using(using).all().delete()
+        OrganizationDownloadCounter.objects.using(using).all().delete()
+        per_file = Counter(dict(ArchivedDownloadCount.objects.using(using).values_list('file_id', 'count')))
+        for row in Download.objects.using(using).order_by().values('file_id').annotate(total=Count('id')).iterator():
+            per_file[row['file_id']] += row['total']
+        FileDownloadCounter.objects.using(using).bulk_create(
+            (FileDownloadCounter(file_id=file_id, shard=0, count=count) for file_id, count in per_file.items()),
+            batch_size=1000
+        )
+        per_organization = Counter()
+        for rows in (
+            Download.objects.using(using).order_by().values('file__organization_id').annotate(total=Count('id')),
+            ArchivedDownloadCount.objects.using(using).order_by()
+            .values('file__organization_id').annotate(total=Sum('count')),
+        ):
+            for row in rows.iterator():
+                per_organization[row['file__organization_id']] += row['total']
+        OrganizationDownloadCounter.objects.using(using).bulk_create(
+            (
+                OrganizationDownloadCounter(organization_id=organization_id, shard=0, count=count)
+                for organization_id, count in per_organization.items()
+            ),
+            batch_size=1000
+        )
+        invalidate()
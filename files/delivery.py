@@ -0,0 +1,366 @@
+# file_storage_app/delivery.py
+
+import os
+import secrets
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from files.compression import accepts_encoding, decoder
+
+
+CHUNK_SIZE = 64 * 1024
+
+# Clients asking for more ranges than this get the whole file instead.
+MAX_RANGES = 32
+
+DELIVERY_MODES = ('stream', 'accel', 'sendfile')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range_header(header, size):
+    """
+    Parse a ``Range: bytes=...`` header against a representation of ``size`` bytes.
+
+    Returns a sorted list of inclusive ``(start, end)`` pairs with overlapping
+    and adjacent ranges merged, or ``None`` when the header should be ignored
+    (absent, malformed, another unit, or too many ranges). Raises
+    ``RangeNotSatisfiable`` when the header is valid but no range overlaps
+    the representation.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec.strip():
+        return None
+
+    specs = spec.split(',')
+    if len(specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for item in specs:
+        first, sep, last = item.strip().partition('-')
+        if not sep:
+            return None
+        try:
+            if not first:
+                # Suffix range: the last N bytes.
+                length = int(last)
+                if length < 0:
+                    return None
+                if length == 0 or size == 0:
+                    continue
+                ranges.append((max(size - length, 0), size - 1))
+                continue
+            start = int(first)
+            end = int(last) if last else size - 1
+        except ValueError:
+            return None
+        if start < 0 or end < start:
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def file_etag(file_object, encoding=''):
+    """
+    Strong ETag derived from the content checksum, or None for legacy rows.
+
+    The encoded representation is a different sequence of bytes, so it gets
+    its own tag.
+    """
+    if not file_object.checksum:
+        return None
+    if encoding:
+        return f'"{file_object.checksum}-{encoding}"'
+    return f'"{file_object.checksum}"'
+
+
+def if_range_matches(request, etag=None, last_modified=None):
+    """
+    Return False when an ``If-Range`` validator no longer matches the file.
+    """
+    header = request.headers.get('If-Range')
+    if not header:
+        return True
+    header = header.strip()
+    if header.startswith(('"', 'W/')):
+        # If-Range requires the strong comparison function.
+        return etag is not None and header == etag
+    if last_modified is None:
+        return False
+    # Only an exact date match is a strong enough validator for If-Range.
+    return parse_http_date_safe(header) == int(last_modified.timestamp())
+
+
+def file_size(file_object):
+    if file_object.file_size is not None:
+        return file_object.file_size
+    return file_object.file.size
+
+
+def open_content(file_object):
+    """
+    Open the original bytes of ``file_object``, decoding them when they are
+    stored encoded.
+    """
+    return decoder(file_object.content_encoding, file_object.file.open('rb'))
+
+
+def iter_range(handle, start, end, chunk_size=CHUNK_SIZE):
+    handle.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        chunk = handle.read(min(chunk_size, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+
+def _multipart_parts(content_type, ranges, size, boundary):
+    for start, end in ranges:
+        head = (
+            f'--{boundary}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Range: bytes {start}-{end}/{size}\r\n'
+            '\r\n'
+        ).encode('latin-1')
+        yield head, start, end
+    yield f'--{boundary}--\r\n'.encode('latin-1'), None, None
+
+
+def iter_multipart(handle, content_type, ranges, size, boundary):
+    try:
+        first = True
+        for head, start, end in _multipart_parts(content_type, ranges, size, boundary):
+            yield head if first else b'\r\n' + head
+            first = False
+            if start is not None:
+                yield from iter_range(handle, start, end)
+    finally:
+        handle.close()
+
+
+def _iter_and_close(handle, start, end):
+    try:
+        yield from iter_range(handle, start, end)
+    finally:
+        handle.close()
+
+
+def multipart_length(content_type, ranges, size, boundary):
+    length = 0
+    for index, (head, start, end) in enumerate(_multipart_parts(content_type, ranges, size, boundary)):
+        length += len(head) + (2 if index else 0)
+        if start is not None:
+            length += end - start + 1
+    return length
+
+
+def set_validators(response, etag, last_modified):
+    if etag is not None:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+
+
+def _set_encoding_headers(response, stored_encoding, send_encoded):
+    if send_encoded:
+        response['Content-Encoding'] = stored_encoding
+    if stored_encoding:
+        patch_vary_headers(response, ['Accept-Encoding'])
+
+
+def offload_header(file_object):
+    """
+    The internal-redirect header that hands ``file_object`` to the front
+    proxy under ``settings.DOWNLOAD_DELIVERY``, as a ``(name, value)`` pair,
+    or None when Django should stream the file itself.
+
+    ``'accel'`` maps the storage name under nginx's internal location
+    (``X-Accel-Redirect``); ``'sendfile'`` sends the file's absolute path
+    (``X-Sendfile``), which needs a storage with local paths.
+    """
+    config = getattr(settings, 'DOWNLOAD_DELIVERY', {})
+    mode = config.get('MODE', 'stream')
+    if mode not in DELIVERY_MODES:
+        raise ValueError(f"Unknown download delivery mode '{mode}'.")
+    if mode == 'accel':
+        prefix = config.get('ACCEL_PREFIX', '/protected/').rstrip('/')
+        return 'X-Accel-Redirect', f'{prefix}/{quote(file_object.file.name)}'
+    if mode == 'sendfile':
+        root = config.get('SENDFILE_ROOT')
+        try:
+            path = os.path.join(root, file_object.file.name) if root else file_object.file.path
+        except NotImplementedError:
+            return None
+        try:
+            path.encode('latin-1')
+        except UnicodeEncodeError:
+            # Header values are latin-1; the proxy could not find a path Django had to encode.
+            return None
+        return 'X-Sendfile', path
+    return None
+
+
+def serve_file(request, file_object):
+    """
+    Build the download response for ``file_object``, honouring conditional
+    headers and ``Range``.
+
+    Returns ``(response, is_new_download)``. A request only counts as a new
+    download when it sends the whole file or a range that starts at byte 0,
+    so a client resuming or seeking through a file is recorded once, and a
+    304 is never one. Raises ``FileNotFoundError`` when the stored bytes are
+    missing.
+
+    In the proxy delivery modes the response is empty and only carries the
+    internal-redirect header (see ``offload_header``); conditional requests
+    and unsatisfiable ranges are still answered here.
+
+    Files stored encoded are sent as stored, with ``Content-Encoding``, to
+    clients whose ``Accept-Encoding`` allows it, and decoded while streaming
+    for everyone else. Ranges and validators apply to whichever
+    representation is sent. nginx drops ``Content-Encoding``, ``ETag`` and
+    ``Vary`` from an ``X-Accel-Redirect`` response, so its internal location
+    has to copy them over (see the README).
+    """
+    content_type = file_object.content_type or 'application/octet-stream'
+    stored_encoding = file_object.content_encoding
+    send_encoded = bool(stored_encoding) and accepts_encoding(request, stored_encoding)
+    etag = file_etag(file_object, stored_encoding if send_encoded else '')
+    last_modified = file_object.uploaded_at
+
+    conditional = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if conditional is not None:
+        set_validators(conditional, etag, last_modified)
+        if stored_encoding:
+            patch_vary_headers(conditional, ['Accept-Encoding'])
+        return conditional, False
+
+    size = file_object.stored_size if send_encoded else file_size(file_object)
+    ranges = None
+    if if_range_matches(request, etag, last_modified):
+        try:
+            ranges = parse_range_header(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = Response(
+                {"detail": "Requested range not satisfiable."},
+                status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+            )
+            response['Content-Range'] = f'bytes */{size}'
+            return response, False
+
+    # The proxy can only send the stored bytes, so decoding stays here.
+    redirect = offload_header(file_object) if send_encoded or not stored_encoding else None
+    if redirect is not None:
+        # The proxy sends the bytes and answers the Range header itself.
+        response = HttpResponse(content_type=content_type)
+        response[redirect[0]] = redirect[1]
+        response['Content-Disposition'] = content_disposition_header(True, file_object.name)
+        set_validators(response, etag, last_modified)
+        _set_encoding_headers(response, stored_encoding, send_encoded)
+        return response, ranges is None or ranges[0][0] == 0
+
+    handle = file_object.file.open('rb') if send_encoded else open_content(file_object)
+    if ranges is None and stored_encoding and not send_encoded:
+        # The decoded length is known, but FileResponse would ask the decoder for it by seeking to the end.
+        response = StreamingHttpResponse(_iter_and_close(handle, 0, size - 1), content_type=content_type)
+        response['Content-Length'] = size
+    elif ranges is None:
+        response = FileResponse(handle, content_type=content_type)
+        response['Content-Length'] = size
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(
+            _iter_and_close(handle, start, end),
+            status=status.HTTP_206_PARTIAL_CONTENT,
+            content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    else:
+        boundary = secrets.token_hex(16)
+        response = StreamingHttpResponse(
+            iter_multipart(handle, content_type, ranges, size, boundary),
+            status=status.HTTP_206_PARTIAL_CONTENT,
+            content_type=f'multipart/byteranges; boundary={boundary}'
+        )
+        response['Content-Length'] = multipart_length(content_type, ranges, size, boundary)
+
+    response['Content-Disposition'] = content_disposition_header(True, file_object.name)
+    response['Accept-Ranges'] = 'bytes'
+    set_validators(response, etag, last_modified)
+    _set_encoding_headers(response, stored_encoding, send_encoded)
+    is_new_download = ranges is None or ranges[0][0] == 0
+    return response, is_new_download
+
+
+_EXHAUSTED = object()
+
+
+async def aiter_in_thread(iterable):
+    """
+    Iterate ``iterable`` on the thread pool, one item at a time.
+
+    Every blocking read runs outside the event loop, and no thread is held
+    while waiting for the client to take the previous chunk.
+    """
+    iterator = iter(iterable)
+    read = sync_to_async(next, thread_sensitive=False)
+    try:
+        while True:
+            chunk = await read(iterator, _EXHAUSTED)
+            if chunk is _EXHAUSTED:
+                return
+            yield chunk
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=False)()
+
+
+def as_async_response(response):
+    """
+    Adapt a ``serve_file`` response for an async view: error responses are
+    rendered as the DRF views would render them, and file bodies are read
+    through ``aiter_in_thread`` instead of being drained into memory by the
+    ASGI handler.
+    """
+    if isinstance(response, Response):
+        response.accepted_renderer = JSONRenderer()
+        response.accepted_media_type = JSONRenderer.media_type
+        response.renderer_context = {}
+        return response.render()
+    if response.streaming and not response.is_async:
+        response.streaming_content = aiter_in_thread(response.streaming_content)
+    return response
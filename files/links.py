@@ -0,0 +1,87 @@
+# file_storage_app/links.py
+
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from files.models import File, User
+
+
+LINK_SALT = 'files.links'
+
+
+class InvalidLink(Exception):
+    pass
+
+
+def sign_download(file_object, user, lifetime=None):
+    """
+    Sign a download link token for ``file_object`` granted to ``user``.
+    Returns ``(token, claims)``.
+
+    The claims hold everything ``serve_file`` needs - storage path, name,
+    content type, sizes, encoding, checksum and upload time - so the link
+    can be served without loading the File.
+    """
+    if lifetime is None:
+        lifetime = settings.DOWNLOAD_LINKS['LIFETIME']
+    claims = {
+        'fid': file_object.pk,
+        'path': file_object.file.name,
+        'name': file_object.name,
+        'type': file_object.content_type,
+        'size': file_object.file_size,
+        'sum': file_object.checksum,
+        'enc': file_object.content_encoding,
+        'ssz': file_object.stored_size,
+        'mod': int(file_object.uploaded_at.timestamp()),
+        'uid': user.pk,
+        'exp': int(time.time()) + lifetime,
+    }
+    return signing.dumps(claims, salt=LINK_SALT, compress=True), claims
+
+
+def read_download(token):
+    """
+    Verify a download link token and return its claims.
+
+    Raises ``InvalidLink`` when the signature does not match or the link
+    has expired.
+    """
+    try:
+        claims = signing.loads(token, salt=LINK_SALT)
+    except signing.BadSignature:
+        raise InvalidLink('Invalid download link.')
+    if claims['exp'] <= time.time():
+        raise InvalidLink('Download link has expired.')
+    return claims
+
+
+def linked_file(claims):
+    """
+    The File of verified link ``claims``, built without a query. It must
+    never be saved.
+    """
+    file_object = File(
+        pk=claims['fid'],
+        file=claims['path'],
+        name=claims['name'],
+        content_type=claims['type'],
+        file_size=claims['size'],
+        checksum=claims['sum'],
+        content_encoding=claims['enc'],
+        stored_size=claims['ssz'],
+        uploaded_at=datetime.fromtimestamp(claims['mod'], tz=dt_timezone.utc),
+    )
+    file_object._state.adding = False
+    return file_object
+
+
+def grantee(claims):
+    """
+    The user a link was issued to, with only ``pk`` set.
+    """
+    user = User(pk=claims['uid'])
+    user._state.adding = False
+    return user
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from files.models import RollupWatermark
+from files.partitions import (
+    PartitioningNotSupported,
+    archive_partition,
+    detach_partition,
+    detached_partitions,
+    expired_partitions,
+    highest_id,
+)
+from files.rollups import WATERMARK_NAME
+
+
+class Command(BaseCommand):
+    help = (
+        'Detach Download partitions older than the retention period and archive them '
+        'as gzipped CSV files in the default storage.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-months', type=int, default=settings.DOWNLOAD_PARTITIONS['KEEP_MONTHS'],
+            help='Full months of download history to keep besides the current one.'
+        )
+        parser.add_argument('--archive-dir', default=settings.DOWNLOAD_PARTITIONS['ARCHIVE_DIR'])
+        parser.add_argument('--dry-run', action='store_true', help='Only list the partitions that would be archived.')
+
+    def handle(self, *args, **options):
+        try:
+            expired = expired_partitions(options['keep_months'])
+        except PartitioningNotSupported as exc:
+            raise CommandError(str(exc))
+        watermark = RollupWatermark.objects.filter(name=WATERMARK_NAME).values_list('last_download_id', flat=True).first()
+        for name in expired:
+            # Rows the rollups have not read yet would vanish from the analytics.
+            last_id = highest_id(name)
+            if last_id is not None and (watermark is None or last_id > watermark):
+                self.stdout.write(self.style.WARNING(f'Skipping {name}: run rollup_downloads first.'))
+                continue
+            if options['dry_run']:
+                self.stdout.write(f'Would archive {name}.')
+                continue
+            detach_partition(name)
+        if options['dry_run']:
+            return
+        # Also picks up partitions detached by an earlier run that failed while archiving.
+        with connection.cursor() as cursor:
+            detached = detached_partitions(cursor)
+        for name in detached:
+            stored = archive_partition(name, options['archive_dir'])
+            self.stdout.write(f'Archived {name} to {stored}.')
+        self.stdout.write(self.style.SUCCESS(f'Archived {len(detached)} download partitions.'))
@@ -0,0 +1,122 @@
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from files.benchmark import ENDPOINTS, compare_results, make_sample, run_endpoint
+from files.models import Download, File, Organization, User
+from files.seeding import generate_dataset
+
+
+class Command(BaseCommand):
+    help = 'Measure latency, throughput and query counts of the API endpoints against the configured database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Insert a dataset before measuring.')
+        parser.add_argument('--organizations', type=int, default=10)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--files', type=int, default=1000)
+        parser.add_argument('--downloads', type=int, default=10000)
+        parser.add_argument(
+            '--endpoints',
+            default=','.join(ENDPOINTS),
+            help=f'Comma-separated subset of: {", ".join(ENDPOINTS)}.'
+        )
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per endpoint.')
+        parser.add_argument('--asgi', action='store_true', help='Drive the ASGI handler instead of WSGI.')
+        parser.add_argument('--random-seed', type=int, default=0, help='Seed for the generated dataset and the ids requests are made for.')
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout.')
+        parser.add_argument('--compare', help='A previous JSON report to compare against.')
+        parser.add_argument(
+            '--max-regression',
+            type=float,
+            default=10.0,
+            help='Fail --compare when p95 latency or throughput worsens by more than this many percent.'
+        )
+
+    def handle(self, *args, **options):
+        endpoints = [name.strip() for name in options['endpoints'].split(',') if name.strip()]
+        unknown = set(endpoints) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f'Unknown endpoints: {", ".join(sorted(unknown))}.')
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError('--concurrency and --requests must be at least 1.')
+
+        if options['seed']:
+            try:
+                generate_dataset(
+                    organizations=options['organizations'],
+                    users=options['users'],
+                    files=options['files'],
+                    downloads=options['downloads'],
+                    seed=options['random_seed'],
+                    log=lambda message: self.stderr.write(message)
+                )
+            except ValueError as error:
+                raise CommandError(str(error))
+        if not File.objects.exists():
+            raise CommandError('There are no files to benchmark; run with --seed.')
+
+        sample = make_sample(options['random_seed'])
+        report = {
+            'started_at': timezone.now().isoformat(),
+            'environment': {
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'handler': 'asgi' if options['asgi'] else 'wsgi',
+                'concurrency': options['concurrency'],
+                'requests': options['requests'],
+            },
+            'dataset': {
+                'organizations': Organization.objects.count(),
+                'users': User.objects.count(),
+                'files': File.objects.count(),
+                'downloads': Download.objects.count(),
+            },
+            'endpoints': {},
+        }
+        for name in endpoints:
+            result = run_endpoint(
+                name,
+                sample,
+                requests=options['requests'],
+                concurrency=options['concurrency'],
+                warmup=options['warmup'],
+                asgi=options['asgi']
+            )
+            report['endpoints'][name] = result
+            latency = result['latency_ms']
+            self.stderr.write(
+                f"{name}: {result['throughput_rps']} req/s, p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+                f"p99 {latency['p99']} ms, {result['queries_per_request']} queries/request, {result['errors']} errors"
+            )
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        if options['compare']:
+            self._compare(options['compare'], report, options['max_regression'])
+
+    def _compare(self, path, report, max_regression):
+        with open(path) as handle:
+            baseline = json.load(handle)
+        rows, regressions = compare_results(baseline, report, max_regression)
+        for row in rows:
+            self.stderr.write(
+                f"{row['endpoint']}: p95 {row['p95_ms'][0]} -> {row['p95_ms'][1]} ms ({row['p95_change_pct']:+}%), "
+                f"throughput {row['throughput_rps'][0]} -> {row['throughput_rps'][1]} req/s "
+                f"({row['throughput_change_pct']:+}%), queries {row['queries_per_request'][0]} -> "
+                f"{row['queries_per_request'][1]}"
+            )
+        if regressions:
+            raise CommandError(f'Regressed: {", ".join(row["endpoint"] for row in regressions)}.')
+        self.stderr.write(self.style.SUCCESS('No regressions.'))
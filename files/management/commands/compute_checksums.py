@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from files.checksums import compute_checksum
+from files.models import File
+
+
+class Command(BaseCommand):
+    help = 'Compute the content checksum of files uploaded before checksums were recorded.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pending = []
+        updated = missing = 0
+        for file_object in File.objects.filter(checksum__isnull=True).only('id', 'file').iterator(chunk_size=batch_size):
+            try:
+                with file_object.file.open('rb') as handle:
+                    file_object.checksum = compute_checksum(handle)
+            except FileNotFoundError:
+                missing += 1
+                continue
+            pending.append(file_object)
+            if len(pending) >= batch_size:
+                updated += File.objects.bulk_update(pending, ['checksum'])
+                pending = []
+        if pending:
+            updated += File.objects.bulk_update(pending, ['checksum'])
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} files ({missing} missing on storage).'))
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from files.partitions import PartitioningNotSupported, create_partitions
+
+
+class Command(BaseCommand):
+    help = 'Create the monthly Download partitions for the current and coming months.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int, default=settings.DOWNLOAD_PARTITIONS['MONTHS_AHEAD'],
+            help='How many months after the current one to prepare.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            created = create_partitions(options['months_ahead'])
+        except PartitioningNotSupported as exc:
+            raise CommandError(str(exc))
+        for name in created:
+            self.stdout.write(f'Created partition {name}.')
+        self.stdout.write(self.style.SUCCESS(f'Created {len(created)} download partitions.'))
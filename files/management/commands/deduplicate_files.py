@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from files.blobs import acquire_blob
+from files.models import File
+
+
+class Command(BaseCommand):
+    help = 'Move files uploaded before content-addressed storage onto shared blobs.'
+
+    def handle(self, *args, **options):
+        moved = missing = 0
+        for file_object in File.objects.filter(blob__isnull=True).iterator(chunk_size=500):
+            legacy = file_object.file
+            legacy_name = legacy.name
+            try:
+                with transaction.atomic():
+                    with legacy.open('rb'):
+                        blob, _ = acquire_blob(legacy)
+                    File.objects.filter(pk=file_object.pk).update(
+                        blob=blob,
+                        file=blob.file.name,
+                        file_size=blob.size,
+                        checksum=blob.checksum
+                    )
+            except FileNotFoundError:
+                missing += 1
+                continue
+            if legacy_name != blob.file.name and not File.objects.filter(file=legacy_name).exists():
+                legacy.storage.delete(legacy_name)
+            moved += 1
+        self.stdout.write(self.style.SUCCESS(f'Moved {moved} files onto blobs ({missing} missing on storage).'))
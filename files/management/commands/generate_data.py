@@ -0,0 +1,60 @@
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from files.seeding import SEED_PASSWORD, generate_dataset
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic synthetic dataset of organizations, users, files and downloads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Same seed and options, same data.')
+        parser.add_argument('--organizations', type=int, default=100)
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--files', type=int, default=100000)
+        parser.add_argument('--downloads', type=int, default=1000000)
+        parser.add_argument('--blobs', type=int, default=1000, help='Distinct blobs the files share.')
+        parser.add_argument('--blob-size', type=int, default=64 * 1024, help='Bytes per blob.')
+        parser.add_argument('--sparse', action='store_true', help='Write blobs as sparse files.')
+        parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of file popularity.')
+        parser.add_argument('--days', type=int, default=90, help='Days of download history.')
+        parser.add_argument('--end', help='ISO 8601 end of the download history (default: midnight UTC today).')
+        parser.add_argument('--batch-size', type=int, default=50000)
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create even on PostgreSQL.')
+
+    def handle(self, *args, **options):
+        end = None
+        if options['end']:
+            try:
+                end = datetime.fromisoformat(options['end'])
+            except ValueError:
+                raise CommandError('--end must be an ISO 8601 date or datetime.')
+            if timezone.is_naive(end):
+                end = timezone.make_aware(end, dt_timezone.utc)
+
+        started = time.monotonic()
+        try:
+            generate_dataset(
+                organizations=options['organizations'],
+                users=options['users'],
+                files=options['files'],
+                downloads=options['downloads'],
+                seed=options['seed'],
+                blobs=options['blobs'],
+                blob_size=options['blob_size'],
+                sparse=options['sparse'],
+                skew=options['skew'],
+                days=options['days'],
+                end=end,
+                batch_size=options['batch_size'],
+                use_copy=False if options['no_copy'] else None,
+                log=self.stdout.write
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated dataset {options["seed"]} in {time.monotonic() - started:.1f}s. '
+            f'Every user has the password "{SEED_PASSWORD}".'
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from files.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = 'Delete expired upload sessions and the chunks they stored.'
+
+    def handle(self, *args, **options):
+        # Chunk bytes are removed by the UploadChunk post_delete signal.
+        deleted, _ = UploadSession.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired upload session objects.'))
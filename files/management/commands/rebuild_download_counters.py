@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from files.counters import rebuild_download_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the file and organization download counters from the Download table.'
+
+    def handle(self, *args, **options):
+        rebuild_download_counters()
+        self.stdout.write(self.style.SUCCESS('Download counters rebuilt.'))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from files.rollups import roll_up_downloads
+
+
+class Command(BaseCommand):
+    help = 'Fold new Download rows into the hourly and daily download rollups.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--loop', action='store_true', help='Keep running, polling for new downloads.')
+        parser.add_argument('--interval', type=float, default=30.0, help='Seconds to sleep between polls with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = 0
+            while (watermark := roll_up_downloads(batch_size=options['batch_size'])) is not None:
+                processed += 1
+                self.stdout.write(f'Rolled up downloads through id {watermark}.')
+            if not options['loop']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Download rollups are up to date.'))
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from files.partitions import PartitioningNotSupported, retention_cutoff, split_legacy_partition
+
+
+class Command(BaseCommand):
+    help = (
+        'Move the downloads in the legacy partition that are older than the retention period '
+        'into monthly partitions, so apply_download_retention can archive them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-months', type=int, default=settings.DOWNLOAD_PARTITIONS['KEEP_MONTHS'],
+            help='Full months of download history to leave in the legacy partition besides the current one.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            created = split_legacy_partition(retention_cutoff(options['keep_months']))
+        except PartitioningNotSupported as exc:
+            raise CommandError(str(exc))
+        for name in created:
+            self.stdout.write(f'Created partition {name}.')
+        self.stdout.write(self.style.SUCCESS(f'Moved {len(created)} months out of the legacy partition.'))
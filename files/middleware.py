@@ -0,0 +1,65 @@
+# file_storage_app/middleware.py
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import cc_delim_re
+from files.routers import begin_request, current_state, end_request
+
+
+PIN_COOKIE = 'db_pin'
+
+
+class PrimaryPinningMiddleware:
+    """
+    Keep a client that has just written on the primary database.
+
+    A request that writes sets a cookie that lives for
+    ``DATABASE_REPLICA_PIN_SECONDS``. While it is present every read goes to
+    the primary, so the client sees its own writes however far the replicas
+    lag behind. Responses marked ``public`` are never pinned: a shared cache
+    would hand the cookie to everyone it serves them to.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            # Otherwise Django would run the whole async chain, async views included, in a thread.
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = begin_request(pinned=PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+            self.pin(response)
+        finally:
+            end_request(token)
+        return response
+
+    async def __acall__(self, request):
+        token = begin_request(pinned=PIN_COOKIE in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+            self.pin(response)
+        finally:
+            end_request(token)
+        return response
+
+    def pin(self, response):
+        if current_state().wrote and not self.is_public(response):
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+
+    @staticmethod
+    def is_public(response):
+        directives = cc_delim_re.split(response.get('Cache-Control', ''))
+        return 'public' in (directive.strip().lower() for directive in directives)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0002_download_event_timestamp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='checksum',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
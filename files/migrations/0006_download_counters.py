@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_counters(apps, schema_editor):
+    Download = apps.get_model('files', 'Download')
+    FileDownloadCounter = apps.get_model('files', 'FileDownloadCounter')
+    OrganizationDownloadCounter = apps.get_model('files', 'OrganizationDownloadCounter')
+    db_alias = schema_editor.connection.alias
+    downloads = Download.objects.using(db_alias).order_by()
+    FileDownloadCounter.objects.using(db_alias).bulk_create(
+        (
+            FileDownloadCounter(file_id=row['file_id'], shard=0, count=row['total'])
+            for row in downloads.values('file_id').annotate(total=models.Count('id')).iterator()
+        ),
+        batch_size=1000
+    )
+    OrganizationDownloadCounter.objects.using(db_alias).bulk_create(
+        (
+            OrganizationDownloadCounter(organization_id=row['file__organization_id'], shard=0, count=row['total'])
+            for row in downloads.values('file__organization_id').annotate(total=models.Count('id')).iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0005_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileDownloadCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='download_counters', to='files.file')),
+            ],
+            options={
+                'unique_together': {('file', 'shard')},
+            },
+        ),
+        migrations.CreateModel(
+            name='OrganizationDownloadCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='download_counters', to='files.organization')),
+            ],
+            options={
+                'unique_together': {('organization', 'shard')},
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
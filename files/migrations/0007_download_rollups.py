@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0006_download_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('last_download_id', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DownloadRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=8)),
+                ('dimension', models.CharField(choices=[('file', 'File'), ('organization', 'Organization'), ('user', 'User')], max_length=16)),
+                ('dimension_id', models.PositiveBigIntegerField()),
+                ('bucket', models.DateTimeField()),
+                ('count', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['granularity', 'dimension', 'bucket'], name='files_rollup_range_idx')],
+                'unique_together': {('granularity', 'dimension', 'dimension_id', 'bucket')},
+            },
+        ),
+    ]
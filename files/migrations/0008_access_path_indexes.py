@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0007_download_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='download',
+            index=models.Index(fields=['file', '-downloaded_at', '-id'], include=('downloaded_by',), name='files_dl_file_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='download',
+            index=models.Index(fields=['downloaded_by', '-downloaded_at', '-id'], include=('file',), name='files_dl_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['organization', '-uploaded_at', '-id'], name='files_file_org_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['-uploaded_at', '-id'], name='files_file_recent_idx'),
+        ),
+        migrations.AlterField(
+            model_name='download',
+            name='downloaded_by',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='downloads', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='download',
+            name='file',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='downloads', to='files.file'),
+        ),
+    ]
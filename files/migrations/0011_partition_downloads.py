@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-17 05:40
+
+from django.conf import settings
+from django.db import migrations
+from django.db.migrations.exceptions import IrreversibleError
+from files.partitions import partition_table
+
+
+def partition_downloads(apps, schema_editor):
+    # Only PostgreSQL has declarative partitioning; elsewhere Download stays one table.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Download = apps.get_model('files', 'Download')
+    partition_table(schema_editor, Download, settings.DOWNLOAD_PARTITIONS['MONTHS_AHEAD'])
+
+
+def refuse_to_unpartition(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        raise IrreversibleError(
+            'Download partitioning cannot be undone by a migration; copy the rows into a new table by hand.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0010_revoked_tokens'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_downloads, refuse_to_unpartition),
+    ]
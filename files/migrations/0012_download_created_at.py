@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 05:25
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0011_partition_downloads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='download',
+            name='created_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+    ]
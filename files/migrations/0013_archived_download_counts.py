@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 05:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0012_download_created_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedDownloadCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archived_downloads', to='files.file')),
+            ],
+        ),
+    ]
@@ -1,5 +1,9 @@
+import uuid
+
 from django.db import models
+from django.db.models.functions import Now
 from django.conf import settings
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 
@@ -26,6 +30,30 @@ class User(AbstractUser):
         return self.username
 
 
+def blob_upload_to(instance, filename):
+    checksum = instance.checksum
+    return f'blobs/{checksum[:2]}/{checksum[2:4]}/{checksum}'
+
+
+class Blob(models.Model):
+    """
+    Content-addressed bytes shared by every File with the same checksum.
+    """
+    checksum = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to=blob_upload_to, max_length=255)
+    size = models.PositiveBigIntegerField()
+    # How the bytes are stored ('' or 'gzip'); ``size`` and ``checksum`` are always of the original content.
+    content_encoding = models.CharField(max_length=16, blank=True, default='')
+    # Size of the encoded bytes in storage; null when they are stored as is.
+    stored_size = models.PositiveBigIntegerField(null=True, blank=True)
+    # Number of File rows pointing at this blob; the bytes are deleted when it reaches zero.
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.checksum
+
+
 class File(models.Model):
     organization = models.ForeignKey(
         Organization,
@@ -38,31 +66,230 @@ class File(models.Model):
         related_name='uploaded_files'
     )
     file = models.FileField(upload_to='uploads/')
+    # Null for files uploaded before content-addressed storage.
+    blob = models.ForeignKey(
+        Blob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='files'
+    )
     name = models.CharField(max_length=255)
     uploaded_at = models.DateTimeField(auto_now_add=True)
-    file_size = models.PositiveIntegerField(null=True, blank=True)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
     content_type = models.CharField(max_length=255, null=True, blank=True)
+    # Hex SHA-256 of the stored bytes; also used as the download ETag.
+    checksum = models.CharField(max_length=64, null=True, blank=True)
+    # Copied from the blob so downloads need no join.
+    content_encoding = models.CharField(max_length=16, blank=True, default='')
+    stored_size = models.PositiveBigIntegerField(null=True, blank=True)
 
     class Meta:
         ordering = ['-uploaded_at']
         unique_together = ('organization', 'name')
+        indexes = [
+            # Organization file list and the global file list, in keyset pagination order.
+            models.Index(fields=['organization', '-uploaded_at', '-id'], name='files_file_org_recent_idx'),
+            models.Index(fields=['-uploaded_at', '-id'], name='files_file_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.organization.name})"
 
 
 class Download(models.Model):
+    # The composite indexes below lead with these columns, so single-column FK indexes would be redundant.
     file = models.ForeignKey(
         File,
         on_delete=models.CASCADE,
-        related_name='downloads'
+        related_name='downloads',
+        db_index=False
     )
     downloaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='downloads'
+        related_name='downloads',
+        db_index=False
     )
-    downloaded_at = models.DateTimeField(auto_now_add=True)
+    # Set from the event timestamp, not the INSERT time, so buffered writes keep the real download time.
+    downloaded_at = models.DateTimeField(default=timezone.now)
+    # Set by the database when the row is written; the rollups settle on this, not on downloaded_at.
+    created_at = models.DateTimeField(db_default=Now(), editable=False)
+
+    class Meta:
+        indexes = [
+            # Download history per file and per user, in keyset pagination order. The
+            # INCLUDE column makes the Download side an index-only scan on PostgreSQL.
+            models.Index(
+                fields=['file', '-downloaded_at', '-id'],
+                include=['downloaded_by'],
+                name='files_dl_file_recent_idx'
+            ),
+            models.Index(
+                fields=['downloaded_by', '-downloaded_at', '-id'],
+                include=['file'],
+                name='files_dl_user_recent_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.file.name} downloaded by {self.downloaded_by.username}"
+
+
+class FileDownloadCounter(models.Model):
+    """
+    One shard of a file's download count.
+
+    Concurrent downloads of a hot file increment different shards, so they
+    do not queue on a single row lock; the count is the sum of the shards.
+    """
+    file = models.ForeignKey(
+        File,
+        on_delete=models.CASCADE,
+        related_name='download_counters'
+    )
+    shard = models.PositiveSmallIntegerField()
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('file', 'shard')
+
+
+class OrganizationDownloadCounter(models.Model):
+    """
+    One shard of the download count across all files of an organization.
+    """
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='download_counters'
+    )
+    shard = models.PositiveSmallIntegerField()
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('organization', 'shard')
+
+
+class ArchivedDownloadCount(models.Model):
+    """
+    Downloads of a file whose rows the download retention has archived.
+
+    ``rebuild_download_counters`` adds them to what is left in the Download
+    table, so the counters keep counting the whole history.
+    """
+    file = models.OneToOneField(
+        File,
+        on_delete=models.CASCADE,
+        related_name='archived_downloads'
+    )
+    count = models.PositiveBigIntegerField(default=0)
+
+
+class DownloadRollup(models.Model):
+    """
+    Number of downloads in one hour or day for one file, organization or user.
+    """
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+    DIMENSION_CHOICES = [
+        ('file', 'File'),
+        ('organization', 'Organization'),
+        ('user', 'User'),
+    ]
+
+    granularity = models.CharField(max_length=8, choices=GRANULARITY_CHOICES)
+    dimension = models.CharField(max_length=16, choices=DIMENSION_CHOICES)
+    dimension_id = models.PositiveBigIntegerField()
+    bucket = models.DateTimeField()
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('granularity', 'dimension', 'dimension_id', 'bucket')
+        indexes = [
+            # Top-N over a time range scans buckets regardless of dimension_id.
+            models.Index(fields=['granularity', 'dimension', 'bucket'], name='files_rollup_range_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension} {self.dimension_id} @ {self.bucket:%Y-%m-%d %H:00} ({self.granularity}): {self.count}"
+
+
+class RollupWatermark(models.Model):
+    """
+    Highest Download id already folded into the rollups.
+    """
+    name = models.CharField(max_length=64, unique=True)
+    last_download_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_download_id}"
+
+
+def upload_chunk_to(instance, filename):
+    return f'upload_sessions/{instance.session_id}/{instance.index}'
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload assembled from independently uploaded chunks.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions'
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions'
+    )
+    name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255, null=True, blank=True)
+    chunk_count = models.PositiveIntegerField()
+    total_size = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} ({self.id})"
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(
+        UploadSession,
+        on_delete=models.CASCADE,
+        related_name='chunks'
+    )
+    index = models.PositiveIntegerField()
+    file = models.FileField(upload_to=upload_chunk_to, max_length=255)
+    size = models.PositiveBigIntegerField()
+    checksum = models.CharField(max_length=64)
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['index']
+        unique_together = ('session', 'index')
+
+    def __str__(self):
+        return f"chunk {self.index} of {self.session_id}"
+
+
+class RevokedToken(models.Model):
+    """
+    A signed API token revoked before its expiry. Rows are only needed until
+    then; ``purge_revoked_tokens`` deletes the rest.
+    """
+    jti = models.CharField(max_length=16, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,156 @@
+# file_storage_app/pagination.py
+
+import base64
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _encode_value(value):
+    # Full precision: DjangoJSONEncoder would round timestamps to milliseconds.
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a composite key such as ``(-uploaded_at, -id)``.
+
+    The cursor holds the key of the last (or first) row of the current page,
+    so the next page is fetched with an index range condition rather than
+    an OFFSET, and no COUNT(*) is ever run. Every field in ``ordering`` must
+    sort in the same direction and the last one must be unique.
+    """
+    ordering = None
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.descending = self.ordering[0].startswith('-')
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = cursor is not None and cursor['reverse']
+        ordering = self.ordering
+        if cursor is not None:
+            # Paging backwards walks the index the other way and flips the page afterwards.
+            queryset = queryset.filter(self.key_filter(cursor['key'], before=reverse))
+        if reverse:
+            ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = rows
+        return rows
+
+    def key_filter(self, key, before=False):
+        """
+        Rows strictly after ``key`` in page order (or before it).
+
+        Written as ``a <= x AND (a < x OR b < y)`` rather than a plain OR so
+        the leading column stays an index condition on every backend.
+        """
+        forward_lt = self.descending != before
+        inclusive, strict = ('lte', 'lt') if forward_lt else ('gte', 'gt')
+        head, *tail = zip(self.fields, key)
+        condition = Q(**{f'{head[0]}__{strict}': head[1]})
+        equal = Q(**{head[0]: head[1]})
+        for field, value in tail:
+            condition |= equal & Q(**{f'{field}__{strict}': value})
+            equal &= Q(**{field: value})
+        return Q(**{f'{head[0]}__{inclusive}': head[1]}) & condition
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                requested = int(request.query_params[self.page_size_query_param])
+                if requested > 0:
+                    return min(requested, settings.API_MAX_PAGE_SIZE)
+            except (KeyError, ValueError):
+                pass
+        return settings.API_PAGE_SIZE
+
+    def row_key(self, row):
+        if isinstance(row, dict):
+            return [row[field] for field in self.fields]
+        return [getattr(row, field) for field in self.fields]
+
+    def encode_cursor(self, key, reverse):
+        payload = json.dumps({'k': key, 'r': reverse}, default=_encode_value, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            key = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, payload['k'], strict=True)
+            ]
+            return {'key': key, 'reverse': bool(payload['r'])}
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.row_key(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.row_key(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class FileKeysetPagination(KeysetPagination):
+    ordering = ('-uploaded_at', '-id')
+
+
+class DownloadKeysetPagination(KeysetPagination):
+    ordering = ('-downloaded_at', '-id')
+
+
+class OrganizationKeysetPagination(KeysetPagination):
+    ordering = ('id',)
@@ -0,0 +1,342 @@
+# file_storage_app/partitions.py
+
+import gzip
+import logging
+import re
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.files import File as DjangoFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from files.models import ArchivedDownloadCount, File
+
+
+logger = logging.getLogger(__name__)
+
+# Partitioning is done with raw SQL on PostgreSQL; Django still sees one ordinary table.
+TABLE = 'files_download'
+LEGACY_PARTITION = f'{TABLE}_legacy'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+class PartitioningNotSupported(Exception):
+    pass
+
+
+def month_start(moment):
+    moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def _require_postgresql(using_connection):
+    if using_connection.vendor != 'postgresql':
+        raise PartitioningNotSupported('Download partitioning needs PostgreSQL.')
+
+
+def _quote(using_connection, name):
+    return using_connection.ops.quote_name(name)
+
+
+def is_partitioned(cursor):
+    cursor.execute(
+        'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)',
+        [TABLE]
+    )
+    return cursor.fetchone() is not None
+
+
+def partitions(cursor):
+    """
+    The attached range partitions as ``(name, upper_bound)`` pairs, oldest
+    first. The default partition is left out.
+    """
+    cursor.execute(
+        '''
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(%s)
+        ''',
+        [TABLE]
+    )
+    bounds = []
+    for name, bound in cursor.fetchall():
+        match = _UPPER_BOUND.search(bound)
+        if match:
+            bounds.append((name, parse_datetime(match.group(1))))
+    return sorted(bounds, key=lambda item: item[1])
+
+
+def detached_partitions(cursor):
+    """
+    Partition tables that were detached but not archived yet, e.g. because
+    an earlier retention run failed halfway.
+    """
+    cursor.execute(
+        '''
+        SELECT relname FROM pg_class
+        WHERE relkind = 'r'
+          AND (relname = %s OR relname ~ %s)
+          AND NOT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = pg_class.oid)
+        ORDER BY relname
+        ''',
+        [LEGACY_PARTITION, f'^{TABLE}_p[0-9]{{6}}$']
+    )
+    return [name for (name,) in cursor.fetchall()]
+
+
+def create_partitions(months_ahead, now=None, using_connection=connection):
+    """
+    Make sure a monthly partition exists from the current month through
+    ``months_ahead`` months ahead. Rows that already landed in the default
+    partition for one of those months are moved into it. Returns the names
+    of the partitions created.
+    """
+    _require_postgresql(using_connection)
+    quote = lambda name: _quote(using_connection, name)
+    first = month_start(now or timezone.now())
+    created = []
+    with transaction.atomic(using=using_connection.alias), using_connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            raise PartitioningNotSupported(f'{TABLE} is not partitioned; run the migrations first.')
+        existing = {name for name, _ in partitions(cursor)}
+        # The legacy partition may extend past the current month.
+        covered_until = max((upper for name, upper in partitions(cursor) if name == LEGACY_PARTITION), default=first)
+        for offset in range(months_ahead + 1):
+            lower = add_months(first, offset)
+            upper = add_months(lower, 1)
+            name = partition_name(lower)
+            if name in existing or upper <= covered_until:
+                continue
+            cursor.execute(
+                f'SELECT 1 FROM {quote(DEFAULT_PARTITION)} WHERE downloaded_at >= %s AND downloaded_at < %s LIMIT 1',
+                [lower, upper]
+            )
+            if cursor.fetchone() is None:
+                cursor.execute(
+                    f'CREATE TABLE {quote(name)} PARTITION OF {quote(TABLE)} FOR VALUES FROM (%s) TO (%s)',
+                    [lower, upper]
+                )
+            else:
+                # Attaching would fail while the default partition holds rows of the new range.
+                cursor.execute(f'CREATE TABLE {quote(name)} (LIKE {quote(TABLE)} INCLUDING DEFAULTS)')
+                cursor.execute(
+                    f'''
+                    WITH moved AS (
+                        DELETE FROM {quote(DEFAULT_PARTITION)}
+                        WHERE downloaded_at >= %s AND downloaded_at < %s
+                        RETURNING *
+                    )
+                    INSERT INTO {quote(name)} SELECT * FROM moved
+                    ''',
+                    [lower, upper]
+                )
+                cursor.execute(
+                    f'ALTER TABLE {quote(TABLE)} ATTACH PARTITION {quote(name)} FOR VALUES FROM (%s) TO (%s)',
+                    [lower, upper]
+                )
+            created.append(name)
+    return created
+
+
+def partition_table(schema_editor, model, months_ahead):
+    """
+    Turn the existing Download table into a table partitioned by month on
+    ``downloaded_at``, for the partitioning migration.
+
+    The existing table is kept as the ``legacy`` partition, holding every
+    row up to the end of the newest month it has data for, so no rows are
+    copied. Attaching it scans it once to check the bound and builds the
+    new primary key index on it. The indexes of ``model`` (the migration's
+    Download) are recreated on the parent and take over the table's
+    existing ones.
+    """
+    using_connection = schema_editor.connection
+    indexes = model._meta.indexes
+    quote = lambda name: _quote(using_connection, name)
+    with using_connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            return
+        cursor.execute(f'SELECT max(id), max(downloaded_at) FROM {quote(TABLE)}')
+        last_id, last_downloaded_at = cursor.fetchone()
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'",
+            [TABLE]
+        )
+        (primary_key,) = cursor.fetchone()
+        cursor.execute(f'ALTER TABLE {quote(TABLE)} RENAME TO {quote(LEGACY_PARTITION)}')
+        for index in indexes:
+            cursor.execute(f'ALTER INDEX {quote(index.name)} RENAME TO {quote(index.name + "_legacy")}')
+        # The ids continue from a sequence owned by the parent, so partitions need no identity of their own.
+        cursor.execute(f'ALTER TABLE {quote(LEGACY_PARTITION)} ALTER COLUMN id DROP IDENTITY IF EXISTS')
+        cursor.execute(f'ALTER TABLE {quote(LEGACY_PARTITION)} ALTER COLUMN id DROP DEFAULT')
+        # A primary key on a partitioned table has to include the partition key.
+        cursor.execute(f'ALTER TABLE {quote(LEGACY_PARTITION)} DROP CONSTRAINT {quote(primary_key)}')
+
+        cursor.execute(
+            f'CREATE TABLE {quote(TABLE)} (LIKE {quote(LEGACY_PARTITION)} INCLUDING DEFAULTS) '
+            'PARTITION BY RANGE (downloaded_at)'
+        )
+        sequence = f'{TABLE}_id_seq'
+        cursor.execute(f'DROP SEQUENCE IF EXISTS {quote(sequence)}')
+        cursor.execute(f'CREATE SEQUENCE {quote(sequence)} AS bigint OWNED BY {quote(TABLE)}.id')
+        if last_id is not None:
+            cursor.execute('SELECT setval(%s, %s)', [sequence, last_id])
+        cursor.execute(f"ALTER TABLE {quote(TABLE)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+        cursor.execute(f'ALTER TABLE {quote(TABLE)} ADD PRIMARY KEY (id, downloaded_at)')
+
+        now = timezone.now()
+        legacy_until = add_months(month_start(max(now, last_downloaded_at or now)), 1)
+        cursor.execute(
+            f'ALTER TABLE {quote(TABLE)} ATTACH PARTITION {quote(LEGACY_PARTITION)} '
+            'FOR VALUES FROM (MINVALUE) TO (%s)',
+            [legacy_until]
+        )
+        cursor.execute(f'CREATE TABLE {quote(DEFAULT_PARTITION)} PARTITION OF {quote(TABLE)} DEFAULT')
+        for column, target in (('file_id', 'files_file'), ('downloaded_by_id', 'files_user')):
+            # Identical to Django's constraints on the legacy table, which PostgreSQL attaches instead of re-checking.
+            cursor.execute(
+                f'ALTER TABLE {quote(TABLE)} ADD CONSTRAINT {quote(f"{TABLE}_{column}_fk")} '
+                f'FOREIGN KEY ({quote(column)}) REFERENCES {quote(target)} (id) DEFERRABLE INITIALLY DEFERRED'
+            )
+    for index in indexes:
+        schema_editor.add_index(model, index)
+    create_partitions(months_ahead, now=now, using_connection=using_connection)
+
+
+def split_legacy_partition(before, using_connection=connection):
+    """
+    Move the rows of the legacy partition from before the month containing
+    ``before`` into monthly partitions of their own, so that retention can
+    detach and archive them like any other month. Returns the names of the
+    partitions created.
+
+    The legacy partition is detached, the old rows are moved out of it one
+    month at a time, and it is attached again for the months it keeps,
+    which scans it once. All of this is one transaction that locks the
+    Download table, so new downloads wait until it commits.
+    """
+    _require_postgresql(using_connection)
+    quote = lambda name: _quote(using_connection, name)
+    created = []
+    with transaction.atomic(using=using_connection.alias), using_connection.cursor() as cursor:
+        legacy_until = dict(partitions(cursor)).get(LEGACY_PARTITION)
+        if legacy_until is None:
+            return created
+        until = min(month_start(before), legacy_until)
+        cursor.execute(f'SELECT min(downloaded_at) FROM {quote(LEGACY_PARTITION)} WHERE downloaded_at < %s', [until])
+        (oldest,) = cursor.fetchone()
+        if oldest is None:
+            return created
+        cursor.execute(f'ALTER TABLE {quote(TABLE)} DETACH PARTITION {quote(LEGACY_PARTITION)}')
+        lower = month_start(oldest)
+        while lower < until:
+            upper = add_months(lower, 1)
+            name = partition_name(lower)
+            cursor.execute(f'CREATE TABLE {quote(name)} (LIKE {quote(TABLE)} INCLUDING DEFAULTS)')
+            cursor.execute(
+                f'''
+                WITH moved AS (
+                    DELETE FROM {quote(LEGACY_PARTITION)}
+                    WHERE downloaded_at >= %s AND downloaded_at < %s
+                    RETURNING *
+                )
+                INSERT INTO {quote(name)} SELECT * FROM moved
+                ''',
+                [lower, upper]
+            )
+            cursor.execute(
+                f'ALTER TABLE {quote(TABLE)} ATTACH PARTITION {quote(name)} FOR VALUES FROM (%s) TO (%s)',
+                [lower, upper]
+            )
+            created.append(name)
+            lower = upper
+        if until < legacy_until:
+            cursor.execute(
+                f'ALTER TABLE {quote(TABLE)} ATTACH PARTITION {quote(LEGACY_PARTITION)} FOR VALUES FROM (%s) TO (%s)',
+                [until, legacy_until]
+            )
+        else:
+            # Every month it covered has a partition of its own now.
+            cursor.execute(f'DROP TABLE {quote(LEGACY_PARTITION)}')
+    return created
+
+
+def retention_cutoff(keep_months, now=None):
+    """
+    Partitions ending on or before this moment hold only rows older than
+    ``keep_months`` full months.
+    """
+    return add_months(month_start(now or timezone.now()), -keep_months)
+
+
+def expired_partitions(keep_months, now=None, using_connection=connection):
+    _require_postgresql(using_connection)
+    cutoff = retention_cutoff(keep_months, now)
+    with using_connection.cursor() as cursor:
+        return [name for name, upper in partitions(cursor) if upper <= cutoff]
+
+
+def highest_id(name, using_connection=connection):
+    with using_connection.cursor() as cursor:
+        cursor.execute(f'SELECT max(id) FROM {_quote(using_connection, name)}')
+        return cursor.fetchone()[0]
+
+
+def detach_partition(name, using_connection=connection):
+    """
+    Detach partition ``name`` from the Download table. Only catalog entries
+    change, so this takes the same short time however many rows it holds.
+
+    In the same transaction its downloads are added, per file, to
+    ``ArchivedDownloadCount``, so rebuilding the counters without the rows
+    still counts them.
+    """
+    _require_postgresql(using_connection)
+    quote = lambda table: _quote(using_connection, table)
+    archived = _quote(using_connection, ArchivedDownloadCount._meta.db_table)
+    with transaction.atomic(using=using_connection.alias), using_connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {archived} (file_id, count)
+            SELECT p.file_id, count(*) FROM {quote(name)} p
+            JOIN {quote(File._meta.db_table)} f ON f.id = p.file_id GROUP BY p.file_id
+            ON CONFLICT (file_id) DO UPDATE SET count = {archived}.count + EXCLUDED.count
+            '''
+        )
+        cursor.execute(f'ALTER TABLE {quote(TABLE)} DETACH PARTITION {quote(name)}')
+
+
+def archive_partition(name, archive_dir, using_connection=connection):
+    """
+    Write detached partition ``name`` to ``<archive_dir>/<name>.csv.gz`` in
+    the default storage, then drop it. Returns the stored file name.
+
+    The rows are streamed out with COPY into a compressed temporary file,
+    so neither the rows nor the archive are held in memory.
+    """
+    _require_postgresql(using_connection)
+    quote = lambda table: _quote(using_connection, table)
+    with tempfile.TemporaryFile() as spool:
+        with using_connection.cursor() as cursor:
+            with gzip.GzipFile(fileobj=spool, mode='wb') as archive:
+                cursor.copy_expert(f'COPY {quote(name)} TO STDOUT WITH (FORMAT csv, HEADER)', archive)
+            spool.seek(0)
+            stored = default_storage.save(f'{archive_dir}/{name}.csv.gz', DjangoFile(spool))
+            cursor.execute(f'DROP TABLE {quote(name)}')
+    logger.info('Archived download partition %s to %s.', name, stored)
+    return stored
@@ -1,11 +1,16 @@
 # file_storage_app/permissions.py
 
 from rest_framework import permissions
-from django.shortcuts import get_object_or_404
-from files.models import Organization
 
 
 class IsFileUploaderOrganization(permissions.BasePermission):
+    """
+    Only members of an organization may upload into it.
+
+    Membership is compared by ``organization_id``, which session users carry
+    on their row and token users in their claims, so no query is made.
+    """
+
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return request.user.is_authenticated
@@ -13,9 +18,5 @@ class IsFileUploaderOrganization(permissions.BasePermission):
             org_id = view.kwargs.get('org_id')
             if not org_id:
                 return False
-            try:
-                organization = get_object_or_404(Organization, pk=org_id)
-            except Exception:
-                return False
-            return request.user.is_authenticated and request.user.organization == organization
+            return request.user.is_authenticated and request.user.organization_id == int(org_id)
         return request.user.is_authenticated
@@ -0,0 +1,187 @@
+# file_storage_app/rollups.py
+
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Count, ExpressionWrapper, Q, Sum
+from django.db.models.functions import Now, TruncDay, TruncHour
+from django.utils import timezone
+from files.models import Download, DownloadRollup, RollupWatermark
+
+
+WATERMARK_NAME = 'downloads'
+
+GRANULARITIES = {
+    'hour': (TruncHour, timedelta(hours=1)),
+    'day': (TruncDay, timedelta(days=1)),
+}
+
+# Rollup dimension -> Download column it is grouped by.
+DIMENSIONS = {
+    'file': 'file_id',
+    'organization': 'file__organization_id',
+    'user': 'downloaded_by_id',
+}
+
+
+def bucket_start(moment, granularity):
+    moment = moment.astimezone(dt_timezone.utc)
+    if granularity == 'day':
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _settled_upper_id(after_id, batch_size, settle_seconds):
+    """
+    Highest id of the next batch, stopping before the first unsettled row.
+
+    A row is settled once the database wrote it more than ``settle_seconds``
+    ago. ``created_at`` comes from the database clock at INSERT time, so a
+    lower id still held by an open transaction can only be skipped if that
+    transaction outlives the settle window. ``downloaded_at`` is no help
+    here: buffered and backfilled events carry their own, older time.
+    """
+    upper = None
+    settled = ExpressionWrapper(
+        Q(created_at__lte=Now() - timedelta(seconds=settle_seconds)),
+        output_field=BooleanField()
+    )
+    rows = (
+        Download.objects.filter(id__gt=after_id)
+        .annotate(settled=settled)
+        .order_by('id')
+        .values_list('id', 'settled')[:batch_size]
+    )
+    for download_id, is_settled in rows:
+        if not is_settled:
+            break
+        upper = download_id
+    return upper
+
+
+def _apply(granularity, dimension, totals):
+    """
+    Add ``{(dimension_id, bucket): count}`` to the stored rollups.
+    """
+    if not totals:
+        return
+    buckets = {bucket for _, bucket in totals}
+    existing = {
+        (rollup.dimension_id, rollup.bucket): rollup
+        for rollup in DownloadRollup.objects.filter(
+            granularity=granularity,
+            dimension=dimension,
+            bucket__in=buckets,
+            dimension_id__in={dimension_id for dimension_id, _ in totals},
+        )
+    }
+    updated, created = [], []
+    for key, amount in totals.items():
+        rollup = existing.get(key)
+        if rollup is not None:
+            rollup.count += amount
+            updated.append(rollup)
+        else:
+            created.append(DownloadRollup(
+                granularity=granularity,
+                dimension=dimension,
+                dimension_id=key[0],
+                bucket=key[1],
+                count=amount,
+            ))
+    DownloadRollup.objects.bulk_update(updated, ['count'], batch_size=1000)
+    DownloadRollup.objects.bulk_create(created, batch_size=1000)
+
+
+def roll_up_downloads(batch_size=10000, settle_seconds=None):
+    """
+    Fold the next batch of new Download rows into the hourly and daily rollups.
+
+    The watermark row is locked for the whole batch and advanced in the same
+    transaction as the rollups, so concurrent runs serialize and every
+    download is counted exactly once. Returns the new watermark, or None
+    when there was nothing settled to process.
+    """
+    if settle_seconds is None:
+        settle_seconds = settings.ROLLUP_SETTLE_SECONDS
+
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.get_or_create(name=WATERMARK_NAME)
+        watermark = RollupWatermark.objects.select_for_update().get(pk=watermark.pk)
+        upper = _settled_upper_id(watermark.last_download_id, batch_size, settle_seconds)
+        if upper is None:
+            return None
+
+        downloads = Download.objects.filter(id__gt=watermark.last_download_id, id__lte=upper).order_by()
+        for granularity, (trunc, _) in GRANULARITIES.items():
+            for dimension, column in DIMENSIONS.items():
+                rows = (
+                    downloads
+                    .annotate(rollup_bucket=trunc('downloaded_at', tzinfo=dt_timezone.utc))
+                    .values(column, 'rollup_bucket')
+                    .annotate(total=Count('id'))
+                )
+                _apply(granularity, dimension, {
+                    (row[column], row['rollup_bucket']): row['total'] for row in rows
+                })
+
+        watermark.last_download_id = upper
+        watermark.save(update_fields=['last_download_id', 'updated_at'])
+        return upper
+
+
+def time_series(dimension, dimension_id, granularity, start, end):
+    """
+    Zero-filled ``[(bucket, count), ...]`` for the buckets from the one
+    containing ``start`` up to ``end``.
+    """
+    step = GRANULARITIES[granularity][1]
+    first = bucket_start(start, granularity)
+    counts = dict(
+        DownloadRollup.objects.filter(
+            granularity=granularity,
+            dimension=dimension,
+            dimension_id=dimension_id,
+            bucket__gte=first,
+            bucket__lt=end,
+        ).values_list('bucket', 'count')
+    )
+    series = []
+    bucket = first
+    while bucket < end:
+        series.append((bucket, counts.get(bucket, 0)))
+        bucket += step
+    return series
+
+
+def top(dimension, granularity, start, end, limit):
+    """
+    The ``limit`` busiest ``(dimension_id, count)`` pairs in the buckets from
+    the one containing ``start`` up to ``end``, as counted by ``time_series``.
+    """
+    return list(
+        DownloadRollup.objects.filter(
+            granularity=granularity,
+            dimension=dimension,
+            bucket__gte=bucket_start(start, granularity),
+            bucket__lt=end,
+        )
+        .values('dimension_id')
+        .annotate(total=Sum('count'))
+        .order_by('-total', 'dimension_id')
+        .values_list('dimension_id', 'total')[:limit]
+    )
+
+
+def bucket_count(start, end, granularity):
+    step = GRANULARITIES[granularity][1]
+    return max(int((end - bucket_start(start, granularity)) / step), 0)
+
+
+def default_range(granularity, now=None):
+    now = now or timezone.now()
+    end = bucket_start(now, granularity) + GRANULARITIES[granularity][1]
+    span = timedelta(hours=48) if granularity == 'hour' else timedelta(days=30)
+    return end - span, end
+
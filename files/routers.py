@@ -0,0 +1,132 @@
+# file_storage_app/routers.py
+
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+
+logger = logging.getLogger(__name__)
+
+# A replica that could not be reached is not tried again for this many seconds.
+REPLICA_RETRY_SECONDS = 30
+
+_unreachable_until = {}
+
+
+class RoutingState:
+    """
+    Routing decisions for one request. ``pinned`` is set when the client
+    wrote recently, ``wrote`` once this request writes; either keeps every
+    later read on the primary.
+    """
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = None
+
+    @property
+    def read_alias(self):
+        if self.pinned or self.wrote:
+            return None
+        return self.replica
+
+
+_routing_state = ContextVar('files_routing_state', default=None)
+
+
+def begin_request(pinned=False):
+    """
+    Start routing a request; returns a token for ``end_request``.
+    """
+    return _routing_state.set(RoutingState(pinned))
+
+
+def end_request(token):
+    _routing_state.reset(token)
+
+
+def current_state():
+    return _routing_state.get()
+
+
+def reading_from_replica():
+    state = _routing_state.get()
+    return state is not None and state.read_alias is not None
+
+
+def replica_available(alias):
+    if _unreachable_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except OperationalError:
+        logger.warning('Database replica %s is unreachable; reading from the primary.', alias, exc_info=True)
+        _unreachable_until[alias] = time.monotonic() + REPLICA_RETRY_SECONDS
+        return False
+    return True
+
+
+def choose_replica():
+    """
+    A reachable replica from ``settings.DATABASE_REPLICAS``, or None.
+    """
+    replicas = list(getattr(settings, 'DATABASE_REPLICAS', []))
+    random.shuffle(replicas)
+    for alias in replicas:
+        if replica_available(alias):
+            return alias
+    return None
+
+
+class ReplicaReadMixin:
+    """
+    Let the queries of a read-only view go to a replica.
+
+    Only applies inside a request routed by ``PrimaryPinningMiddleware``, and
+    not when the client is pinned to the primary.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        state = _routing_state.get()
+        if state is None or state.pinned:
+            return super().dispatch(request, *args, **kwargs)
+        state.replica = choose_replica()
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            state.replica = None
+
+
+class ReplicaRouter:
+    """
+    Reads go to the replica chosen by ``ReplicaReadMixin`` until the request
+    writes; writes always go to the primary and migrations never run on a
+    replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if state is None:
+            return None
+        return state.read_alias
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        if db in getattr(settings, 'DATABASE_REPLICAS', []):
+            return False
+        return None
@@ -0,0 +1,128 @@
+# file_storage_app/rows.py
+
+from rest_framework.fields import DateTimeField
+from rest_framework.response import Response
+
+
+# Shared so timestamps are formatted exactly as the serializers' DateTimeFields format them.
+_datetime_field = DateTimeField()
+
+
+def format_datetime(value):
+    return _datetime_field.to_representation(value)
+
+
+class RowSerializer:
+    """
+    Shapes ``values()`` rows into the JSON a ModelSerializer would produce.
+
+    ``columns`` are the lookups to fetch; ``to_representation`` turns one
+    row dict into the output dict. No model instance or serializer field is
+    created per row. Every row serializer must produce output identical to
+    the ModelSerializer it stands in for.
+    """
+    columns = ()
+
+    def to_representation(self, row):
+        raise NotImplementedError('Row serializers must implement to_representation().')
+
+
+class FileDetailRowSerializer(RowSerializer):
+    """
+    ``FileDetailSerializer`` for rows of files, or of rows that reference a
+    file when ``prefix`` is ``'file__'``.
+    """
+
+    def __init__(self, prefix='', download_count='download_count'):
+        self.prefix = prefix
+        self.download_count = download_count
+        self.columns = tuple(f'{prefix}{column}' for column in (
+            'id',
+            'name',
+            'organization_id',
+            'organization__name',
+            'uploaded_by__username',
+            'uploaded_at',
+            'file_size',
+            'content_type',
+        )) + (download_count,)
+
+    def to_representation(self, row):
+        prefix = self.prefix
+        return {
+            'id': row[f'{prefix}id'],
+            'name': row[f'{prefix}name'],
+            'organization': row[f'{prefix}organization_id'],
+            'organization_name': row[f'{prefix}organization__name'],
+            'uploaded_by_username': row[f'{prefix}uploaded_by__username'],
+            'uploaded_at': format_datetime(row[f'{prefix}uploaded_at']),
+            'file_size': row[f'{prefix}file_size'],
+            'content_type': row[f'{prefix}content_type'],
+            'download_count': row[self.download_count],
+        }
+
+
+class UserDownloadRowSerializer(RowSerializer):
+    """
+    ``UserDownloadSerializer``; rows need the ``file_download_count`` annotation.
+    """
+
+    def __init__(self):
+        self.file_info = FileDetailRowSerializer(prefix='file__', download_count='file_download_count')
+        self.columns = ('id', 'downloaded_at') + self.file_info.columns
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'file_info': self.file_info.to_representation(row),
+            'downloaded_at': format_datetime(row['downloaded_at']),
+        }
+
+
+class FileDownloadRowSerializer(RowSerializer):
+    """
+    ``FileDownloadSerializer``, including the downloader's nested organization.
+    """
+    columns = (
+        'id',
+        'downloaded_at',
+        'downloaded_by_id',
+        'downloaded_by__username',
+        'downloaded_by__email',
+        'downloaded_by__organization_id',
+        'downloaded_by__organization__name',
+    )
+
+    def to_representation(self, row):
+        organization_id = row['downloaded_by__organization_id']
+        return {
+            'id': row['id'],
+            'user_info': {
+                'id': row['downloaded_by_id'],
+                'username': row['downloaded_by__username'],
+                'email': row['downloaded_by__email'],
+                'organization': None if organization_id is None else {
+                    'id': organization_id,
+                    'name': row['downloaded_by__organization__name'],
+                },
+            },
+            'downloaded_at': format_datetime(row['downloaded_at']),
+        }
+
+
+class RowListMixin:
+    """
+    ``list()`` through a ``RowSerializer`` instead of ``serializer_class``.
+
+    ``serializer_class`` is still used for the schema and the browsable API.
+    """
+    row_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        row_serializer = self.row_serializer_class()
+        rows = self.filter_queryset(self.get_queryset()).values(*row_serializer.columns)
+        page = self.paginate_queryset(rows)
+        data = [row_serializer.to_representation(row) for row in (rows if page is None else page)]
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
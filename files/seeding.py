@@ -0,0 +1,302 @@
+# file_storage_app/seeding.py
+
+import csv
+import io
+import os
+import random
+from bisect import bisect
+from collections import Counter
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import F, Max
+from files.blobs import acquire_blob
+from files.caching import invalidate
+from files.checksums import new_hasher
+from files.models import (
+    Blob, Download, File, FileDownloadCounter, Organization, OrganizationDownloadCounter, User, blob_upload_to
+)
+
+
+SEED_PASSWORD = 'benchpass'
+
+# (content type, extension) pairs generated files are spread over.
+FILE_TYPES = [
+    ('application/pdf', 'pdf'),
+    ('image/png', 'png'),
+    ('image/jpeg', 'jpg'),
+    ('text/plain', 'txt'),
+    ('application/zip', 'zip'),
+    ('video/mp4', 'mp4'),
+]
+
+# Sparse blobs get this many leading random bytes, which keeps their checksums distinct.
+SPARSE_HEADER_BYTES = 64
+
+
+class ZipfSampler:
+    """
+    Draws ranks ``0..n-1`` with probability proportional to ``1 / (rank + 1) ** exponent``.
+
+    Exponents around 1 give the usual shape of download traffic: a handful
+    of hot items and a long tail that is rarely touched.
+    """
+
+    def __init__(self, n, exponent, rng):
+        self.rng = rng
+        self.cumulative = list(accumulate(1 / (rank + 1) ** exponent for rank in range(n)))
+        self.total = self.cumulative[-1]
+
+    def __call__(self):
+        return bisect(self.cumulative, self.rng.random() * self.total)
+
+
+def _batches(total, batch_size):
+    for start in range(0, total, batch_size):
+        yield start, min(start + batch_size, total)
+
+
+def default_end():
+    # Midnight UTC today, so runs with the same seed on the same day produce the same timestamps.
+    return datetime.combine(datetime.now(dt_timezone.utc).date(), time(), tzinfo=dt_timezone.utc)
+
+
+def _copy(model, columns, text):
+    """
+    Load CSV ``text`` into ``model``'s table with PostgreSQL COPY.
+    """
+    quote = connection.ops.quote_name
+    sql = (
+        f'COPY {quote(model._meta.db_table)} ({", ".join(quote(column) for column in columns)}) '
+        f'FROM STDIN WITH (FORMAT csv)'
+    )
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):
+            raw.copy_expert(sql, io.StringIO(text))
+        else:
+            with raw.copy(sql) as copy:
+                copy.write(text)
+
+
+def _sparse_blob(rng, size):
+    """
+    A blob that is ``size`` bytes long but takes one block on disk.
+    """
+    header = rng.randbytes(min(SPARSE_HEADER_BYTES, size))
+    hasher = new_hasher()
+    hasher.update(header)
+    zeros = bytes(1024 * 1024)
+    remaining = size - len(header)
+    while remaining > 0:
+        hasher.update(zeros[:remaining])
+        remaining -= len(zeros)
+    checksum = hasher.hexdigest()
+
+    blob, created = Blob.objects.get_or_create(
+        checksum=checksum,
+        defaults={'file': blob_upload_to(Blob(checksum=checksum), None), 'size': size, 'ref_count': 0}
+    )
+    if created:
+        try:
+            path = default_storage.path(blob.file.name)
+        except NotImplementedError:
+            raise ValueError('Sparse blobs need a storage on the local filesystem.')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as handle:
+            handle.write(header)
+            handle.truncate(size)
+    return blob
+
+
+def _create_blobs(rng, count, size, sparse, files):
+    """
+    Store ``count`` distinct blobs and take one reference per file that will use them.
+    """
+    blobs = []
+    with transaction.atomic():
+        for index in range(count):
+            if sparse:
+                blob, taken = _sparse_blob(rng, size), 0
+            else:
+                # acquire_blob() takes the first reference itself.
+                blob, taken = acquire_blob(ContentFile(rng.randbytes(size)))[0], 1
+            references = len(range(index, files, count))
+            Blob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + references - taken)
+            blobs.append(blob)
+    return blobs
+
+
+def generate_dataset(organizations=10, users=100, files=1000, downloads=10000, seed=0,
+                     blobs=16, blob_size=64 * 1024, sparse=False, skew=1.1, days=90, end=None,
+                     batch_size=50000, use_copy=None, log=None):
+    """
+    Insert a synthetic dataset and return the ids of what was created.
+
+    Everything is derived from ``seed``: the same arguments always produce
+    the same names, blobs, owners, skew and timestamps. File popularity
+    follows a Zipf distribution with exponent ``skew``; downloads are
+    spread evenly over the ``days`` before ``end`` in id order, the way
+    real traffic arrives. Files share ``blobs`` distinct blobs round-robin,
+    written in full or, with ``sparse``, as sparse files.
+
+    Rows are inserted in batches of ``batch_size``, with COPY on PostgreSQL
+    (``use_copy=None`` picks it automatically) and ``bulk_create`` elsewhere.
+    Counter rows are written once at the end, for the new files only.
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    if use_copy is None:
+        use_copy = connection.vendor == 'postgresql'
+    end = end or default_end()
+    window = timedelta(days=days)
+    prefix = f'gen{seed}'
+    if organizations < 1 or users < 1:
+        raise ValueError('At least one organization and one user are needed.')
+    if Organization.objects.filter(name__startswith=f'{prefix} ').exists():
+        raise ValueError(f'A dataset for seed {seed} already exists.')
+
+    orgs = Organization.objects.bulk_create([
+        Organization(name=f'{prefix} org {i}') for i in range(organizations)
+    ])
+    password = make_password(SEED_PASSWORD)
+    user_objects = []
+    for start, stop in _batches(users, batch_size):
+        user_objects += User.objects.bulk_create([
+            User(username=f'{prefix}-user{i}', password=password, organization=orgs[i % organizations])
+            for i in range(start, stop)
+        ])
+    user_ids = [user.pk for user in user_objects]
+    members = {}
+    for user in user_objects:
+        members.setdefault(user.organization_id, []).append(user.pk)
+    log(f'Created {organizations} organizations and {users} users.')
+
+    blob_objects = _create_blobs(rng, min(blobs, files), blob_size, sparse, files) if files else []
+    file_ids = []
+    file_organizations = {}
+    for start, stop in _batches(files, batch_size):
+        rows = []
+        for i in range(start, stop):
+            org = orgs[rng.randrange(organizations)]
+            uploader = rng.choice(members.get(org.pk) or user_ids)
+            content_type, extension = FILE_TYPES[rng.randrange(len(FILE_TYPES))]
+            blob = blob_objects[i % len(blob_objects)]
+            rows.append(File(
+                organization_id=org.pk,
+                uploaded_by_id=uploader,
+                blob_id=blob.pk,
+                file=blob.file.name,
+                name=f'{prefix}-file{i}.{extension}',
+                file_size=blob.size,
+                content_type=content_type,
+                checksum=blob.checksum,
+                # Uploaded during the window before the downloads start.
+                uploaded_at=end - 2 * window + window * i / files,
+            ))
+        created = _insert_files(rows, prefix, use_copy)
+        file_organizations.update(zip(created, (row.organization_id for row in rows)))
+        file_ids += created
+        log(f'Created {stop} of {files} files.')
+
+    if file_ids and user_ids:
+        # Popularity rank -> file, shuffled so the hot files are not simply the first ones created.
+        by_rank = file_ids[:]
+        rng.shuffle(by_rank)
+        pick_file = ZipfSampler(len(by_rank), skew, rng)
+        start_at = end - window
+        per_file = Counter()
+        for start, stop in _batches(downloads, batch_size):
+            batch = [
+                (
+                    by_rank[pick_file()],
+                    user_ids[rng.randrange(len(user_ids))],
+                    start_at + window * ((i + rng.random()) / downloads),
+                )
+                for i in range(start, stop)
+            ]
+            _insert_downloads(batch, use_copy)
+            per_file.update(file_id for file_id, _, _ in batch)
+            log(f'Created {stop} of {downloads} downloads.')
+        _insert_counters(per_file, file_organizations)
+
+    # Bulk inserts send no signals.
+    invalidate([org.pk for org in orgs])
+    if use_copy:
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {File._meta.db_table}, {Download._meta.db_table}')
+
+    return {
+        'organization_ids': [org.pk for org in orgs],
+        'user_ids': user_ids,
+        'file_ids': file_ids,
+    }
+
+
+def _insert_files(rows, prefix, use_copy):
+    if not use_copy:
+        uploaded = [row.uploaded_at for row in rows]
+        created = File.objects.bulk_create(rows)
+        # bulk_create() stamps auto_now_add fields with the current time; put the generated ones back.
+        for row, uploaded_at in zip(created, uploaded):
+            row.uploaded_at = uploaded_at
+        File.objects.bulk_update(created, ['uploaded_at'])
+        return [row.pk for row in created]
+
+    columns = [
+        'organization_id', 'uploaded_by_id', 'blob_id', 'file', 'name',
+        'file_size', 'content_type', 'checksum', 'uploaded_at',
+    ]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            row.organization_id, row.uploaded_by_id, row.blob_id, row.file.name, row.name,
+            row.file_size, row.content_type, row.checksum, row.uploaded_at.isoformat(),
+        ])
+    with transaction.atomic():
+        last_id = File.objects.aggregate(last=Max('id'))['last'] or 0
+        _copy(File, columns, buffer.getvalue())
+        # COPY does not return ids, but assigns them in row order.
+        return list(
+            File.objects.filter(id__gt=last_id, name__startswith=f'{prefix}-')
+            .order_by('id').values_list('id', flat=True)
+        )
+
+
+def _insert_counters(per_file, file_organizations):
+    # Only the generated files are counted; counters of existing files are left alone.
+    per_organization = Counter()
+    for file_id, count in per_file.items():
+        per_organization[file_organizations[file_id]] += count
+    with transaction.atomic():
+        FileDownloadCounter.objects.bulk_create(
+            (FileDownloadCounter(file_id=file_id, shard=0, count=count) for file_id, count in per_file.items()),
+            batch_size=1000
+        )
+        OrganizationDownloadCounter.objects.bulk_create(
+            (
+                OrganizationDownloadCounter(organization_id=organization_id, shard=0, count=count)
+                for organization_id, count in per_organization.items()
+            ),
+            batch_size=1000
+        )
+
+
+def _insert_downloads(batch, use_copy):
+    with transaction.atomic():
+        if use_copy:
+            _copy(
+                Download,
+                ['file_id', 'downloaded_by_id', 'downloaded_at'],
+                ''.join(f'{file_id},{user_id},{at.isoformat()}\n' for file_id, user_id, at in batch)
+            )
+        else:
+            Download.objects.bulk_create([
+                Download(file_id=file_id, downloaded_by_id=user_id, downloaded_at=at)
+                for file_id, user_id, at in batch
+            ])
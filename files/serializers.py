@@ -1,5 +1,9 @@
 from rest_framework import serializers
-from files.models import Organization, User, File, Download
+from django.conf import settings
+from django.db.models import Sum
+from files.models import Organization, User, File, Download, DownloadRollup, UploadSession
+from files.rollups import bucket_count, default_range
+from files.uploads import missing_chunks
 
 
 class OrganizationSerializer(serializers.ModelSerializer):
@@ -54,7 +58,7 @@ class FileDetailSerializer(serializers.ModelSerializer):
     def get_download_count(self, obj):
         if hasattr(obj, 'download_count'):
             return obj.download_count
-        return obj.downloads.count() 
+        return obj.download_counters.aggregate(total=Sum('count'))['total'] or 0
 
 
 class OrganizationWithDownloadCountSerializer(OrganizationSerializer):
@@ -71,6 +75,12 @@ class UserDownloadSerializer(serializers.ModelSerializer):
         model = Download
         fields = ['id', 'file_info', 'downloaded_at']
 
+    def to_representation(self, instance):
+        # History querysets annotate the count on the download row; hand it to the nested file.
+        if hasattr(instance, 'file_download_count'):
+            instance.file.download_count = instance.file_download_count
+        return super().to_representation(instance)
+
 
 class FileDownloadSerializer(serializers.ModelSerializer):
     user_info = UserSerializer(source='downloaded_by', read_only=True)
@@ -78,3 +88,119 @@ class FileDownloadSerializer(serializers.ModelSerializer):
     class Meta:
         model = Download
         fields = ['id', 'user_info', 'downloaded_at']
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    received_chunks = serializers.SerializerMethodField()
+    missing_chunks = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id',
+            'name',
+            'content_type',
+            'chunk_count',
+            'total_size',
+            'created_at',
+            'expires_at',
+            'received_chunks',
+            'missing_chunks',
+        ]
+        read_only_fields = ['id', 'created_at', 'expires_at']
+
+    def validate_chunk_count(self, value):
+        if not 1 <= value <= settings.UPLOAD_SESSIONS['MAX_CHUNKS']:
+            raise serializers.ValidationError(
+                f"chunk_count must be between 1 and {settings.UPLOAD_SESSIONS['MAX_CHUNKS']}."
+            )
+        return value
+
+    def _received(self, obj):
+        return sorted(chunk.index for chunk in obj.chunks.all())
+
+    def get_received_chunks(self, obj):
+        return self._received(obj)
+
+    def get_missing_chunks(self, obj):
+        return missing_chunks(obj, self._received(obj))
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    """
+    Query parameters shared by the analytics endpoints.
+
+    ``start`` and ``end`` default to the last 48 hours (hourly) or 30 days
+    (daily); ``end`` is exclusive.
+    """
+    dimension = serializers.ChoiceField(choices=DownloadRollup.DIMENSION_CHOICES)
+    granularity = serializers.ChoiceField(choices=DownloadRollup.GRANULARITY_CHOICES, default='day')
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        default_start, default_end = default_range(attrs['granularity'])
+        attrs.setdefault('end', default_end)
+        attrs.setdefault('start', attrs['end'] - (default_end - default_start))
+        if attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError("start must be before end.")
+        if bucket_count(attrs['start'], attrs['end'], attrs['granularity']) > settings.ANALYTICS_MAX_BUCKETS:
+            raise serializers.ValidationError(
+                f"The requested range spans more than {settings.ANALYTICS_MAX_BUCKETS} buckets."
+            )
+        return attrs
+
+
+class DownloadSeriesQuerySerializer(AnalyticsQuerySerializer):
+    id = serializers.IntegerField(min_value=1)
+
+
+class TopDownloadsQuerySerializer(AnalyticsQuerySerializer):
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class FileArchiveQuerySerializer(serializers.Serializer):
+    """
+    Selects the files of an archive: either ``ids`` (repeated), or an
+    ``organization`` with an optional ``name_prefix``.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False)
+    organization = serializers.IntegerField(min_value=1, required=False)
+    name_prefix = serializers.CharField(required=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('organization' in attrs):
+            raise serializers.ValidationError("Give either ids or organization.")
+        if 'name_prefix' in attrs and 'organization' not in attrs:
+            raise serializers.ValidationError("name_prefix needs an organization.")
+        if len(attrs.get('ids', [])) > settings.ARCHIVE_MAX_FILES:
+            raise serializers.ValidationError(f"An archive may contain at most {settings.ARCHIVE_MAX_FILES} files.")
+        return attrs
+
+
+class DownloadExportQuerySerializer(serializers.Serializer):
+    """
+    Filters of a download history export. ``end`` is exclusive; which side
+    of the download ``organization`` filters on depends on the export.
+    """
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    organization = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        if 'start' in attrs and 'end' in attrs and attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError("start must be before end.")
+        return attrs
+
+
+class DownloadLinkSerializer(serializers.Serializer):
+    """
+    How long a signed download link stays valid, in seconds.
+    """
+    expires_in = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_expires_in(self, value):
+        max_lifetime = settings.DOWNLOAD_LINKS['MAX_LIFETIME']
+        if value > max_lifetime:
+            raise serializers.ValidationError(f"Links may be valid for at most {max_lifetime} seconds.")
+        return value
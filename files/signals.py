@@ -0,0 +1,55 @@
+# file_storage_app/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from files.blobs import release_blob
+from files.caching import invalidate
+from files.counters import discount_file_downloads, discount_user_downloads, increment_download_counters
+from files.models import Download, File, Organization, UploadChunk, User
+
+
+@receiver(pre_delete, sender=File)
+def discount_deleted_downloads(sender, instance, **kwargs):
+    # The file's Downloads and counter shards cascade, but the organization's counters stay behind.
+    discount_file_downloads(instance)
+
+
+@receiver(pre_delete, sender=User)
+def discount_deleted_user_downloads(sender, instance, **kwargs):
+    # The user's Downloads cascade, but the counters of the files they downloaded stay behind.
+    discount_user_downloads(instance)
+    invalidate()
+
+
+@receiver(post_delete, sender=File)
+def release_file_blob(sender, instance, **kwargs):
+    if instance.blob_id is not None:
+        release_blob(instance.blob_id)
+
+
+@receiver(post_save, sender=File)
+@receiver(post_delete, sender=File)
+def invalidate_file_listings(sender, instance, **kwargs):
+    invalidate([instance.organization_id])
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def invalidate_organization_listings(sender, instance, **kwargs):
+    invalidate()
+
+
+@receiver(post_delete, sender=UploadChunk)
+def delete_chunk_bytes(sender, instance, **kwargs):
+    storage, name = instance.file.storage, instance.file.name
+    if name:
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(post_save, sender=Download)
+def count_single_download(sender, instance, created, **kwargs):
+    # Batched writes go through bulk_create, which sends no signal, and bump the counters themselves.
+    if created:
+        increment_download_counters({instance.file_id: 1})
+        invalidate()
@@ -0,0 +1,287 @@
+# file_storage_app/sinks.py
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection, close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from files.caching import invalidate
+from files.counters import increment_download_counters
+from files.models import Download, File
+
+
+logger = logging.getLogger(__name__)
+
+DownloadEvent = namedtuple('DownloadEvent', ['file_id', 'user_id', 'downloaded_at'])
+
+
+def write_download_events(events):
+    """
+    Persist a batch of download events with a single INSERT and bump the
+    download counters in the same transaction, then invalidate cached
+    listings that show download counts. Events of files that no longer
+    exist are dropped.
+    """
+    if not events:
+        return []
+    with transaction.atomic():
+        # A signed link or a buffered event can outlive its File; one such event must not sink the batch.
+        existing = set(File.objects.filter(pk__in={event.file_id for event in events}).values_list('pk', flat=True))
+        events = [event for event in events if event.file_id in existing]
+        if not events:
+            return []
+        downloads = Download.objects.bulk_create([
+            Download(
+                file_id=event.file_id,
+                downloaded_by_id=event.user_id,
+                downloaded_at=event.downloaded_at,
+            )
+            for event in events
+        ])
+        increment_download_counters(Counter(event.file_id for event in events))
+        invalidate()
+    return downloads
+
+
+class BaseDownloadSink:
+    """
+    Receives download events from the request path and persists them.
+    """
+
+    def __init__(self, **options):
+        pass
+
+    def emit(self, event):
+        raise NotImplementedError('Download sinks must implement emit().')
+
+    def emit_many(self, events):
+        for event in events:
+            self.emit(event)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class SyncDownloadSink(BaseDownloadSink):
+    """
+    Writes every event inside the request, before the response is returned.
+    """
+
+    def emit(self, event):
+        write_download_events([event])
+
+    def emit_many(self, events):
+        write_download_events(list(events))
+
+
+class BufferedDownloadSink(BaseDownloadSink):
+    """
+    Buffers events in a bounded in-process queue drained by a background thread.
+
+    The worker writes a batch with ``bulk_create`` once ``batch_size`` events
+    are waiting or ``flush_interval`` seconds have passed since the first
+    buffered event, whichever comes first. When the queue is full the
+    ``overflow`` policy decides what happens to the event:
+
+    * ``'sync'``  - write it inside the request, as ``SyncDownloadSink`` does;
+    * ``'block'`` - wait up to ``block_timeout`` seconds for room, then drop it;
+    * ``'drop'``  - drop it immediately.
+
+    Pending events are flushed when the process exits.
+    """
+    OVERFLOW_POLICIES = ('sync', 'block', 'drop')
+
+    _STOP = object()
+
+    def __init__(self, batch_size=500, flush_interval=1.0, max_queue_size=10000,
+                 overflow='sync', block_timeout=0.5, **options):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}'.")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._pid = None
+        self._atexit_registered = False
+
+    def emit(self, event):
+        self._ensure_worker()
+        try:
+            if self.overflow == 'block':
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+        except queue.Full:
+            self._handle_overflow(event)
+
+    def flush(self, timeout=None):
+        """
+        Block until every event emitted so far has been written.
+        """
+        with self._lock:
+            running = self._worker is not None and self._worker.is_alive()
+        if not running:
+            self._flush_queued([])
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None and worker.is_alive():
+            self._queue.put(self._STOP)
+            worker.join(timeout)
+        else:
+            self._flush_queued([])
+
+    def _handle_overflow(self, event):
+        if self.overflow == 'sync':
+            write_download_events([event])
+            return
+        self.dropped += 1
+        logger.warning('Download event queue is full; dropped event for file %s.', event.file_id)
+
+    def _ensure_worker(self):
+        pid = os.getpid()
+        if self._worker is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._worker is not None and self._pid == pid:
+                return
+            # A forked child inherits the queue but not the thread draining it.
+            self._pid = pid
+            self._worker = threading.Thread(
+                target=self._run,
+                name='download-event-sink',
+                daemon=True,
+            )
+            self._worker.start()
+            if not self._atexit_registered:
+                atexit.register(self.close)
+                self._atexit_registered = True
+
+    def _run(self):
+        batch = []
+        deadline = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if item is self._STOP:
+                    self._flush_queued(batch)
+                    return
+                if isinstance(item, threading.Event):
+                    self._flush_queued(batch, waiters=[item])
+                    batch, deadline = [], None
+                    continue
+                if item is not None:
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                if len(batch) >= self.batch_size or (deadline is not None and time.monotonic() >= deadline):
+                    self._write(batch)
+                    batch, deadline = [], None
+        finally:
+            connection.close()
+
+    def _flush_queued(self, batch, waiters=()):
+        """
+        Write ``batch`` plus everything still queued, then release flush() waiters.
+        """
+        waiters = list(waiters)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not self._STOP:
+                batch.append(item)
+        self._write(batch)
+        for waiter in waiters:
+            waiter.set()
+
+    def _write(self, batch):
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            try:
+                write_download_events(chunk)
+            except Exception:
+                # The connection may have gone away between flushes; retry once on a fresh one.
+                close_old_connections()
+                connection.close()
+                try:
+                    write_download_events(chunk)
+                except Exception:
+                    self.dropped += len(chunk)
+                    logger.exception('Failed to write %d download events.', len(chunk))
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_download_sink():
+    """
+    Return the process-wide sink configured by ``settings.DOWNLOAD_EVENTS``.
+    """
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                config = getattr(settings, 'DOWNLOAD_EVENTS', {})
+                sink_class = import_string(config.get('SINK', 'files.sinks.SyncDownloadSink'))
+                _sink = sink_class(**config.get('OPTIONS', {}))
+    return _sink
+
+
+def reset_download_sink():
+    global _sink
+    with _sink_lock:
+        sink, _sink = _sink, None
+    if sink is not None:
+        sink.close()
+
+
+@receiver(setting_changed)
+def _reset_sink_on_setting_change(sender, setting, **kwargs):
+    if setting == 'DOWNLOAD_EVENTS':
+        reset_download_sink()
+
+
+def record_download(file_object, user):
+    """
+    Hand a download of ``file_object`` by ``user`` to the configured sink.
+    """
+    get_download_sink().emit(DownloadEvent(file_object.pk, user.pk, timezone.now()))
+
+
+def record_downloads(file_objects, user):
+    """
+    Hand downloads of several files by ``user`` to the sink as one batch.
+    """
+    now = timezone.now()
+    get_download_sink().emit_many([DownloadEvent(file_object.pk, user.pk, now) for file_object in file_objects])
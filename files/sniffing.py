@@ -0,0 +1,172 @@
+# file_storage_app/sniffing.py
+
+import codecs
+import mimetypes
+
+
+# How many leading bytes are needed to recognise every signature below.
+SNIFF_BYTES = 512
+
+SIGNATURES = [
+    (0, b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (0, b'\xff\xd8\xff', 'image/jpeg'),
+    (0, b'GIF87a', 'image/gif'),
+    (0, b'GIF89a', 'image/gif'),
+    (0, b'\x00\x00\x01\x00', 'image/x-icon'),
+    (0, b'II*\x00', 'image/tiff'),
+    (0, b'MM\x00*', 'image/tiff'),
+    (0, b'%PDF-', 'application/pdf'),
+    (0, b'PK\x03\x04', 'application/zip'),
+    (0, b'PK\x05\x06', 'application/zip'),
+    (0, b'\x1f\x8b', 'application/gzip'),
+    (0, b'BZh', 'application/x-bzip2'),
+    (0, b'\xfd7zXZ\x00', 'application/x-xz'),
+    (0, b'(\xb5/\xfd', 'application/zstd'),
+    (0, b"7z\xbc\xaf'\x1c", 'application/x-7z-compressed'),
+    (0, b'Rar!\x1a\x07', 'application/vnd.rar'),
+    (257, b'ustar', 'application/x-tar'),
+    (0, b'OggS', 'application/ogg'),
+    (0, b'fLaC', 'audio/flac'),
+    (0, b'ID3', 'audio/mpeg'),
+    (0, b'\x1aE\xdf\xa3', 'video/webm'),
+    (0, b'SQLite format 3\x00', 'application/vnd.sqlite3'),
+    (0, b'\x7fELF', 'application/x-executable'),
+    (0, b'MZ', 'application/vnd.microsoft.portable-executable'),
+]
+
+RIFF_TYPES = {
+    b'WEBP': 'image/webp',
+    b'WAVE': 'audio/wav',
+    b'AVI ': 'video/x-msvideo',
+}
+
+ISO_BMFF_BRANDS = {
+    b'qt  ': 'video/quicktime',
+    b'M4A ': 'audio/mp4',
+    b'heic': 'image/heic',
+    b'avif': 'image/avif',
+}
+
+# Formats that are ZIP archives underneath; the extension is more specific.
+ZIP_CONTAINER_PREFIXES = (
+    'application/vnd.openxmlformats-officedocument.',
+    'application/vnd.oasis.opendocument.',
+    'application/epub+zip',
+    'application/java-archive',
+)
+
+TEXTUAL_TYPES = {
+    'application/json',
+    'application/ld+json',
+    'application/xml',
+    'application/javascript',
+    'application/x-yaml',
+    'application/yaml',
+    'application/sql',
+    'application/x-sh',
+    'image/svg+xml',
+}
+
+
+def is_textual(content_type):
+    return bool(content_type) and (
+        content_type.startswith('text/') or content_type in TEXTUAL_TYPES or content_type.endswith(('+json', '+xml'))
+    )
+
+
+# Formats whose bytes are already compressed, so deflating them again costs CPU and saves nothing.
+COMPRESSED_TYPES = {
+    'application/zip',
+    'application/gzip',
+    'application/x-gzip',
+    'application/x-bzip2',
+    'application/x-xz',
+    'application/zstd',
+    'application/x-7z-compressed',
+    'application/vnd.rar',
+    'application/pdf',
+    'application/ogg',
+    'image/png',
+    'image/jpeg',
+    'image/gif',
+    'image/webp',
+    'image/heic',
+    'image/avif',
+    'audio/mpeg',
+    'audio/mp4',
+    'audio/aac',
+    'audio/ogg',
+    'audio/opus',
+    'audio/flac',
+    'font/woff',
+    'font/woff2',
+}
+
+
+def is_compressed(content_type):
+    return bool(content_type) and (
+        content_type in COMPRESSED_TYPES or content_type.startswith(ZIP_CONTAINER_PREFIXES + ('video/',))
+    )
+
+
+def _signature_type(head):
+    for offset, magic, content_type in SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            return content_type
+    if head[:4] == b'RIFF' and head[8:12] in RIFF_TYPES:
+        return RIFF_TYPES[head[8:12]]
+    if head[4:8] == b'ftyp':
+        return ISO_BMFF_BRANDS.get(head[8:12], 'video/mp4')
+    return None
+
+
+def _looks_like_text(head):
+    if head.startswith((codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return True
+    if b'\x00' in head:
+        return False
+    try:
+        # A multi-byte character may be cut off at the end of the sample.
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def sniff_content_type(head, file_name=None, claimed=None):
+    """
+    Decide a content type from the leading bytes of an upload.
+
+    Binary signatures win over anything the client said. Text cannot be told
+    apart reliably by content, so for text the claimed type (or the one
+    implied by the file name) is kept as long as it is itself textual.
+    """
+    guessed = mimetypes.guess_type(file_name)[0] if file_name else None
+    detected = _signature_type(head)
+    if detected == 'application/zip':
+        for candidate in (guessed, claimed):
+            if candidate and candidate.startswith(ZIP_CONTAINER_PREFIXES):
+                return candidate
+    if detected:
+        return detected
+
+    if not head:
+        return claimed or guessed or 'application/octet-stream'
+    if _looks_like_text(head):
+        for candidate in (claimed, guessed):
+            if is_textual(candidate):
+                return candidate
+        return 'text/plain'
+    for candidate in (guessed, claimed):
+        if candidate and not is_textual(candidate):
+            return candidate
+    return 'application/octet-stream'
+
+
+def sniff_file(file):
+    """
+    Sniff an uploaded file that did not come through ``BlobUploadHandler``.
+    """
+    head = file.read(SNIFF_BYTES)
+    file.seek(0)
+    return sniff_content_type(head, file.name, getattr(file, 'content_type', None))
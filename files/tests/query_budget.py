@@ -0,0 +1,32 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+
+class QueryBudgetMixin:
+    """
+    Assertions that a list endpoint runs a fixed number of queries however
+    many rows it returns.
+    """
+    QUERY_BUDGET_SIZES = (10, 100, 1000)
+
+    def assertQueryBudget(self, url, budget, populate, sizes=None):
+        """
+        Request ``url`` with pages of each size and assert exactly ``budget``
+        queries each time. ``populate(size)`` must leave at least ``size``
+        rows for the endpoint to return.
+        """
+        for size in sizes or self.QUERY_BUDGET_SIZES:
+            populate(size)
+            with self.subTest(rows=size):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, {'page_size': size})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                rows = response.data['results'] if isinstance(response.data, dict) else response.data
+                self.assertEqual(len(rows), size)
+                self.assertEqual(
+                    len(queries),
+                    budget,
+                    f'{len(queries)} queries for {size} rows, budget is {budget}:\n'
+                    + '\n'.join(query['sql'] for query in queries.captured_queries)
+                )
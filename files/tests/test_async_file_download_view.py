@@ -0,0 +1,118 @@
+import asyncio
+from unittest import mock
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.base import BaseHandler
+from django.test import AsyncClient, TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework import status
+from files.models import User, Organization, File, Download
+
+
+class AsyncFileDownloadViewTestCase(TestCase):
+    """Test cases for AsyncFileDownloadView"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.content = b'0123456789' * 20000
+        self.file_obj = File.objects.create(
+            organization=self.org,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile(name='async.bin', content=self.content),
+            name='async.bin',
+            file_size=len(self.content),
+            content_type='application/octet-stream',
+            checksum='a' * 64
+        )
+        self.url = reverse('file-download-async', kwargs={'file_id': self.file_obj.id})
+        self.async_client.force_login(self.user)
+
+    async def read(self, response):
+        self.assertTrue(response.is_async)
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    async def test_download(self):
+        """Test that the whole file is streamed asynchronously and recorded"""
+        response = await self.async_client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(await self.read(response), self.content)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="async.bin"')
+        self.assertEqual(await Download.objects.filter(file=self.file_obj, downloaded_by=self.user).acount(), 1)
+
+    async def test_range(self):
+        """Test that ranges behave as on the synchronous view and resumes are not recorded"""
+        response = await self.async_client.get(self.url, headers={'Range': 'bytes=10-19'})
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(await self.read(response), self.content[10:20])
+        self.assertEqual(await Download.objects.acount(), 0)
+
+    async def test_unsatisfiable_range(self):
+        """Test that a 416 is rendered as JSON"""
+        response = await self.async_client.get(self.url, headers={'Range': 'bytes=300000-300010'})
+
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response.json(), {'detail': 'Requested range not satisfiable.'})
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    async def test_not_modified(self):
+        """Test that a matching If-None-Match returns 304 without recording a download"""
+        response = await self.async_client.get(self.url, headers={'If-None-Match': f'"{"a" * 64}"'})
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(await Download.objects.acount(), 0)
+
+    async def test_middleware_stays_async(self):
+        """Test that no middleware forces the async download into a thread under ASGI"""
+        adapted = []
+        adapt_method_mode = BaseHandler.adapt_method_mode
+
+        def spy(handler, is_async, method, *args, **kwargs):
+            result = adapt_method_mode(handler, is_async, method, *args, **kwargs)
+            # Links of the handler chain come with method_is_async; process_view hooks do not.
+            if args and result is not method:
+                adapted.append(kwargs.get('name') or repr(method))
+            return result
+
+        with mock.patch.object(BaseHandler, 'adapt_method_mode', autospec=True, side_effect=spy):
+            ASGIHandler()
+            client = AsyncClient()
+            await client.aforce_login(self.user)
+            response = await client.get(self.url)
+            body = await self.read(response)
+
+        self.assertEqual(adapted, [])
+        self.assertEqual(body, self.content)
+
+    async def test_concurrent_downloads(self):
+        """Test that concurrent downloads are interleaved on one event loop"""
+        responses = await asyncio.gather(*(self.async_client.get(self.url) for _ in range(5)))
+        bodies = await asyncio.gather(*(self.read(response) for response in responses))
+
+        self.assertEqual(bodies, [self.content] * 5)
+        self.assertEqual(await Download.objects.acount(), 5)
+
+    def test_nonexistent_file(self):
+        """Test that a missing file returns 404"""
+        url = reverse('file-download-async', kwargs={'file_id': 99999})
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unauthenticated(self):
+        """Test that unauthenticated users are rejected like on the synchronous view"""
+        sync_response = self.client.get(reverse('file-download', kwargs={'file_id': self.file_obj.id}))
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.content, sync_response.content)
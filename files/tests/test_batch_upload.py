@@ -0,0 +1,189 @@
+import io
+import tarfile
+import zipfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.batches import _describe
+from files.caching import organization_version_key, read_version
+from files.models import Blob, User, Organization, File
+
+
+def upload(name, content):
+    return SimpleUploadedFile(name, content, content_type='application/octet-stream')
+
+
+class FileBatchUploadViewTestCase(TestCase):
+    """Test cases for FileBatchUploadView"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.other_org = Organization.objects.create(name='Globex Industries')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.url = reverse('organization-file-batch-upload', kwargs={'org_id': self.org.id})
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+
+    def post(self, **data):
+        return self.client.post(self.url, data, format='multipart')
+
+    def test_multiple_files(self):
+        """Test that every file of a multipart batch is created with one INSERT"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(files=[upload('a.txt', b'alpha'), upload('b.txt', b'beta'), upload('c.txt', b'alpha')])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['name'] for item in response.data['results']], ['a.txt', 'b.txt', 'c.txt'])
+        self.assertTrue(all(item['status'] == 201 for item in response.data['results']))
+        self.assertEqual(response.data['results'][1]['file']['file_size'], 4)
+        self.assertEqual(response.data['results'][1]['file']['download_count'], 0)
+        self.assertEqual(File.objects.filter(organization=self.org).count(), 3)
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "files_file"')]
+        self.assertEqual(len(inserts), 1)
+        # Identical content is stored once.
+        self.assertEqual(Blob.objects.count(), 2)
+        self.assertEqual(Blob.objects.get(size=5).ref_count, 2)
+
+    def test_contents_are_described_outside_the_transaction(self):
+        """Test that uploads are hashed and sniffed before the transaction that stores them opens"""
+        outside = len(connection.atomic_blocks)
+        depths = []
+
+        def describe(upload):
+            depths.append(len(connection.atomic_blocks))
+            return _describe(upload)
+
+        with mock.patch('files.batches._describe', side_effect=describe):
+            response = self.post(files=[upload('a.txt', b'alpha'), upload('b.txt', b'beta')])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(depths, [outside, outside])
+
+    def test_downloads_created_files(self):
+        """Test that a batch-uploaded file downloads with its content"""
+        response = self.post(files=[upload('a.txt', b'alpha')])
+        file_id = response.data['results'][0]['file']['id']
+
+        download = self.client.get(reverse('file-download', kwargs={'file_id': file_id}))
+        self.assertEqual(b''.join(download.streaming_content), b'alpha')
+
+    def test_conflicts_are_reported_per_file(self):
+        """Test that taken names fail alone with 409 and the rest is created"""
+        self.post(files=[upload('taken.txt', b'old')])
+
+        response = self.post(files=[upload('taken.txt', b'new bytes'), upload('free.txt', b'free')])
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        taken, free = response.data['results']
+        self.assertEqual(taken['status'], 409)
+        self.assertIn('already exists', taken['detail'])
+        self.assertEqual(free['status'], 201)
+        self.assertEqual(File.objects.get(name='taken.txt').file_size, 3)
+        # The conflicting content is not left behind as an unreferenced blob.
+        self.assertFalse(Blob.objects.filter(size=len(b'new bytes')).exists())
+
+    def test_duplicate_names_in_a_batch(self):
+        """Test that only the first of two equal names is created"""
+        response = self.post(files=[upload('same.txt', b'one'), upload('same.txt', b'two')])
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([item['status'] for item in response.data['results']], [201, 409])
+        self.assertEqual(File.objects.get(name='same.txt').file_size, 3)
+
+    def test_zip_archive(self):
+        """Test that a zip archive is unpacked into files named by their paths"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as bundle:
+            bundle.writestr('docs/', '')
+            bundle.writestr('docs/readme.md', '# Readme')
+            bundle.writestr('./top.txt', 'top')
+        response = self.post(archive=upload('sync.zip', buffer.getvalue()))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['name'] for item in response.data['results']], ['docs/readme.md', 'top.txt'])
+        self.assertEqual(File.objects.get(name='docs/readme.md').file_size, len(b'# Readme'))
+
+    def test_compressed_tar_archive(self):
+        """Test that a gzipped tar is unpacked as a stream"""
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w:gz') as bundle:
+            for name, content in (('a.txt', b'alpha'), ('nested/b.bin', b'\x00\x01\x02')):
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                bundle.addfile(info, io.BytesIO(content))
+            link = tarfile.TarInfo('link.txt')
+            link.type, link.linkname = tarfile.SYMTYPE, 'a.txt'
+            bundle.addfile(link)
+        response = self.post(archive=upload('sync.tar.gz', buffer.getvalue()))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(File.objects.values_list('name', 'file_size')),
+            [('a.txt', 5), ('nested/b.bin', 3)]
+        )
+
+    def test_unreadable_archive(self):
+        """Test that something that is not an archive is rejected"""
+        response = self.post(archive=upload('sync.zip', b'not an archive'))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(File.objects.exists())
+
+    @override_settings(BATCH_UPLOAD_MAX_BYTES=10)
+    def test_archive_size_limit(self):
+        """Test that an archive unpacking to more than BATCH_UPLOAD_MAX_BYTES is rejected"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as bundle:
+            bundle.writestr('a.txt', b'alpha')
+            bundle.writestr('b.txt', b'x' * 1000)
+
+        response = self.post(archive=upload('big.zip', buffer.getvalue()))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(File.objects.exists())
+        self.assertFalse(Blob.objects.exists())
+
+    def test_files_or_archive_required(self):
+        """Test that exactly one kind of payload is accepted"""
+        self.assertEqual(self.post().status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.post(files=[upload('a.txt', b'a')], archive=upload('sync.zip', b'zip'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(BATCH_UPLOAD_MAX_FILES=2)
+    def test_too_many_files(self):
+        """Test that an oversized batch creates nothing and leaves no blobs"""
+        response = self.post(files=[upload(f'{i}.txt', str(i).encode()) for i in range(3)])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(File.objects.exists())
+        self.assertFalse(Blob.objects.exists())
+
+    def test_other_organization_forbidden(self):
+        """Test that users cannot upload into another organization"""
+        url = reverse('organization-file-batch-upload', kwargs={'org_id': self.other_org.id})
+        response = self.client.post(url, {'files': [upload('a.txt', b'a')]}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(File.objects.exists())
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_invalidates_organization_listings(self):
+        """Test that a batch bumps its organization's cache version"""
+        cache.clear()
+        before = read_version(organization_version_key(self.org.id))
+
+        self.post(files=[upload('a.txt', b'a')])
+
+        self.assertGreater(read_version(organization_version_key(self.org.id)), before)
@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from files.benchmark import compare_results, percentile
+from files.seeding import generate_dataset
+
+
+class BenchmarkCommandTestCase(TestCase):
+    """Test cases for the benchmark management command"""
+
+    def setUp(self):
+        """Set up test data"""
+        generate_dataset(organizations=2, users=3, files=5, downloads=20, blobs=2, blob_size=256)
+        handle, self.report_path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+
+    def tearDown(self):
+        """Remove the report"""
+        os.remove(self.report_path)
+
+    def run_benchmark(self, *args):
+        call_command(
+            'benchmark', '--requests', '6', '--concurrency', '1', '--warmup', '1',
+            '--output', self.report_path, *args, stderr=StringIO()
+        )
+        with open(self.report_path) as handle:
+            return json.load(handle)
+
+    def test_report(self):
+        """Test that every endpoint is measured and reported as JSON"""
+        report = self.run_benchmark()
+
+        self.assertEqual(report['dataset']['files'], 5)
+        for name, result in report['endpoints'].items():
+            with self.subTest(endpoint=name):
+                self.assertEqual(result['requests'], 6)
+                self.assertEqual(result['errors'], 0)
+                self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p99'])
+                self.assertGreater(result['queries_per_request'], 0)
+
+    def test_asgi_handler(self):
+        """Test that endpoints can be driven through the ASGI handler"""
+        report = self.run_benchmark('--asgi', '--endpoints', 'files,download')
+
+        self.assertEqual(report['environment']['handler'], 'asgi')
+        self.assertEqual(report['endpoints']['download']['status_codes'], {'200': 6})
+
+    def test_unknown_endpoint(self):
+        """Test that unknown endpoint names are rejected"""
+        with self.assertRaises(CommandError):
+            self.run_benchmark('--endpoints', 'nope')
+
+
+class CompareResultsTestCase(TestCase):
+    """Test cases for comparing benchmark reports"""
+
+    def report(self, p95, throughput, queries=3):
+        return {'endpoints': {'files': {
+            'latency_ms': {'p95': p95},
+            'throughput_rps': throughput,
+            'queries_per_request': queries,
+        }}}
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_within_threshold(self):
+        """Test that small changes are not regressions"""
+        rows, regressions = compare_results(self.report(10, 100), self.report(10.5, 96), max_regression=10)
+
+        self.assertEqual(rows[0]['p95_change_pct'], 5.0)
+        self.assertEqual(regressions, [])
+
+    def test_regressions(self):
+        """Test that slower p95, lower throughput and extra queries are regressions"""
+        for current in (self.report(12, 100), self.report(10, 80), self.report(10, 100, queries=4)):
+            with self.subTest(current=current):
+                _, regressions = compare_results(self.report(10, 100), current, max_regression=10)
+                self.assertEqual([row['endpoint'] for row in regressions], ['files'])
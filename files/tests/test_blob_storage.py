@@ -0,0 +1,89 @@
+from django.test import TestCase
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.models import User, Organization, File, Blob
+
+
+class BlobStorageTestCase(TestCase):
+    """Test cases for content-addressed, deduplicated uploads"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org1 = Organization.objects.create(name='Acme Corp')
+        self.org2 = Organization.objects.create(name='Globex Industries')
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org1
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            password='testpass123',
+            organization=self.org2
+        )
+        self.client = APIClient()
+
+    def upload(self, username, org, name, content):
+        self.client.login(username=username, password='testpass123')
+        url = reverse('organization-file-list-create', kwargs={'org_id': org.id})
+        response = self.client.post(url, {
+            'name': name,
+            'file': SimpleUploadedFile(name, content, content_type='text/plain'),
+        }, format='multipart')
+        self.client.logout()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return File.objects.get(organization=org, name=name)
+
+    def test_identical_content_shares_one_blob(self):
+        """Test that the same bytes uploaded twice are stored once"""
+        first = self.upload('testuser1', self.org1, 'report.txt', b'Shared content')
+        second = self.upload('testuser2', self.org2, 'copy-of-report.txt', b'Shared content')
+
+        self.assertEqual(Blob.objects.count(), 1)
+        blob = Blob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(first.blob, blob)
+        self.assertEqual(second.blob, blob)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertTrue(default_storage.exists(blob.file.name))
+
+    def test_different_content_gets_separate_blobs(self):
+        """Test that distinct bytes are stored as distinct blobs"""
+        self.upload('testuser1', self.org1, 'a.txt', b'Content A')
+        self.upload('testuser1', self.org1, 'b.txt', b'Content B')
+
+        self.assertEqual(Blob.objects.count(), 2)
+        self.assertEqual(set(Blob.objects.values_list('ref_count', flat=True)), {1})
+
+    def test_blob_is_kept_until_last_reference_is_deleted(self):
+        """Test that deleting a File only removes the bytes with the last reference"""
+        first = self.upload('testuser1', self.org1, 'report.txt', b'Refcounted content')
+        second = self.upload('testuser2', self.org2, 'report.txt', b'Refcounted content')
+        blob = first.blob
+        name = blob.file.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertTrue(default_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(Blob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(default_storage.exists(name))
+
+    def test_deduplicated_file_downloads(self):
+        """Test that a File pointing at a shared blob downloads its content"""
+        self.upload('testuser1', self.org1, 'one.txt', b'Download me')
+        second = self.upload('testuser2', self.org2, 'two.txt', b'Download me')
+
+        self.client.login(username='testuser2', password='testpass123')
+        response = self.client.get(reverse('file-download', kwargs={'file_id': second.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), b'Download me')
+        self.assertIn('filename="two.txt"', response['Content-Disposition'])
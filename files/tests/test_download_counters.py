@@ -0,0 +1,144 @@
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.models import (
+    User,
+    Organization,
+    File,
+    Download,
+    ArchivedDownloadCount,
+    FileDownloadCounter,
+    OrganizationDownloadCounter,
+)
+from files.sinks import DownloadEvent, write_download_events
+
+
+class DownloadCounterTestCase(TestCase):
+    """Test cases for the sharded file and organization download counters"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.file_obj = File.objects.create(
+            organization=self.org,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile(name='counted.txt', content=b'counted', content_type='text/plain'),
+            name='counted.txt',
+            file_size=7,
+            content_type='text/plain'
+        )
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+
+    def file_total(self):
+        return FileDownloadCounter.objects.filter(file=self.file_obj).aggregate(total=Sum('count'))['total']
+
+    def organization_total(self):
+        return OrganizationDownloadCounter.objects.filter(organization=self.org).aggregate(total=Sum('count'))['total']
+
+    def test_download_view_increments_counters(self):
+        """Test that downloading through the API bumps both counters"""
+        url = reverse('file-download', kwargs={'file_id': self.file_obj.id})
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.file_total(), 3)
+        self.assertEqual(self.organization_total(), 3)
+
+    def test_batched_writes_increment_counters(self):
+        """Test that a bulk write of events bumps the counters once per batch"""
+        now = timezone.now()
+        write_download_events([DownloadEvent(self.file_obj.id, self.user.id, now) for _ in range(5)])
+
+        self.assertEqual(Download.objects.count(), 5)
+        self.assertEqual(self.file_total(), 5)
+        self.assertEqual(self.organization_total(), 5)
+
+    def test_deleting_a_file_discounts_its_downloads(self):
+        """Test that an organization stops counting the downloads of a deleted file"""
+        other = File.objects.create(
+            organization=self.org,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile(name='kept.txt', content=b'kept', content_type='text/plain'),
+            name='kept.txt',
+            file_size=4,
+            content_type='text/plain'
+        )
+        now = timezone.now()
+        write_download_events([DownloadEvent(self.file_obj.id, self.user.id, now) for _ in range(3)])
+        write_download_events([DownloadEvent(other.id, self.user.id, now) for _ in range(2)])
+
+        self.file_obj.delete()
+
+        organizations = self.client.get(reverse('organizations-list')).data['results']
+        self.assertEqual(organizations[0]['total_downloads'], 2)
+        self.assertEqual(self.organization_total(), 2)
+
+    def test_deleting_a_user_discounts_their_downloads(self):
+        """Test that the counters stop counting the downloads of a deleted user"""
+        other = User.objects.create_user(username='testuser2', password='testpass123', organization=self.org)
+        theirs = File.objects.create(
+            organization=self.org,
+            uploaded_by=other,
+            file=SimpleUploadedFile(name='theirs.txt', content=b'theirs', content_type='text/plain'),
+            name='theirs.txt',
+            file_size=6,
+            content_type='text/plain'
+        )
+        now = timezone.now()
+        write_download_events([DownloadEvent(self.file_obj.id, other.id, now) for _ in range(3)])
+        write_download_events([DownloadEvent(theirs.id, other.id, now) for _ in range(2)])
+        write_download_events([DownloadEvent(self.file_obj.id, self.user.id, now)])
+
+        other.delete()
+
+        self.assertEqual(self.file_total(), 1)
+        self.assertEqual(self.organization_total(), 1)
+        files = self.client.get(reverse('global-file-list')).data['results']
+        self.assertEqual([(item['name'], item['download_count']) for item in files], [('counted.txt', 1)])
+
+    def test_shards_are_summed(self):
+        """Test that list endpoints report the sum across counter shards"""
+        FileDownloadCounter.objects.create(file=self.file_obj, shard=0, count=2)
+        FileDownloadCounter.objects.create(file=self.file_obj, shard=5, count=3)
+        OrganizationDownloadCounter.objects.create(organization=self.org, shard=1, count=4)
+
+        files = self.client.get(reverse('global-file-list')).data['results']
+        organizations = self.client.get(reverse('organizations-list')).data['results']
+
+        self.assertEqual(files[0]['download_count'], 5)
+        self.assertEqual(organizations[0]['total_downloads'], 4)
+
+    def test_rebuild_recomputes_from_downloads(self):
+        """Test that rebuild_download_counters discards drift and collapses shards"""
+        for _ in range(4):
+            Download.objects.create(file=self.file_obj, downloaded_by=self.user)
+        FileDownloadCounter.objects.filter(file=self.file_obj).update(count=100)
+
+        call_command('rebuild_download_counters', stdout=StringIO())
+
+        self.assertEqual(list(FileDownloadCounter.objects.values_list('shard', 'count')), [(0, 4)])
+        self.assertEqual(list(OrganizationDownloadCounter.objects.values_list('shard', 'count')), [(0, 4)])
+
+    def test_rebuild_adds_archived_counts(self):
+        """Test that rebuild_download_counters keeps the downloads of detached partitions"""
+        for _ in range(2):
+            Download.objects.create(file=self.file_obj, downloaded_by=self.user)
+        ArchivedDownloadCount.objects.create(file=self.file_obj, count=5)
+
+        call_command('rebuild_download_counters', stdout=StringIO())
+
+        self.assertEqual(self.file_total(), 7)
+        self.assertEqual(self.organization_total(), 7)
@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.models import User, Organization, File, Download
+
+
+class DownloadExportTestCase(TestCase):
+    """Test cases for UserDownloadExportView and FileDownloadExportView"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.other_org = Organization.objects.create(name='Globex Industries')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='one@example.com',
+            password='testpass123',
+            organization=self.org
+        )
+        self.other_user = User.objects.create_user(
+            username='testuser2',
+            password='testpass123',
+            organization=self.other_org
+        )
+        self.file = self.create_file(self.org, 'notes.txt')
+        self.other_file = self.create_file(self.other_org, 'plans.txt')
+        self.downloads = [
+            Download.objects.create(
+                file=file_object,
+                downloaded_by=user,
+                downloaded_at=datetime(2024, 1, day, tzinfo=dt_timezone.utc)
+            )
+            for day, file_object, user in (
+                (3, self.file, self.user),
+                (1, self.other_file, self.user),
+                (2, self.file, self.other_user),
+            )
+        ]
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+
+    def create_file(self, organization, name):
+        return File.objects.create(
+            organization=organization,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile(name, b'content', content_type='text/plain'),
+            name=name,
+            file_size=7,
+            content_type='text/plain'
+        )
+
+    def export(self, name, export_format, query='', **kwargs):
+        response = self.client.get(reverse(name, kwargs={'export_format': export_format, **kwargs}) + query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_user_export_csv(self):
+        """Test that a user's downloads are exported oldest first with flattened columns"""
+        response, body = self.export('user-download-export', 'csv', user_id=self.user.id)
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="user-{self.user.id}-downloads.csv"')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([row['file_info.name'] for row in rows], ['plans.txt', 'notes.txt'])
+        self.assertEqual(rows[1]['file_info.organization_name'], 'Acme Corp')
+        self.assertEqual(rows[1]['downloaded_at'], '2024-01-03T00:00:00Z')
+        self.assertEqual(rows[1]['file_info.download_count'], '2')
+
+    def test_file_export_ndjson_matches_history(self):
+        """Test that NDJSON records are the history endpoint's records"""
+        history = self.client.get(reverse('file-download-history', kwargs={'file_id': self.file.id})).json()
+        response, body = self.export('file-download-export', 'ndjson', file_id=self.file.id)
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(records, list(reversed(history['results'])))
+
+    def test_missing_organization_is_left_empty(self):
+        """Test that a downloader without an organization gets empty organization columns"""
+        self.other_user.organization = None
+        self.other_user.save()
+
+        _, body = self.export('file-download-export', 'csv', file_id=self.file.id)
+
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual((rows[0]['user_info.organization.id'], rows[0]['user_info.organization.name']), ('', ''))
+        self.assertEqual(rows[1]['user_info.organization.name'], 'Acme Corp')
+
+    def test_date_range(self):
+        """Test that start is inclusive and end exclusive"""
+        _, body = self.export(
+            'user-download-export', 'ndjson', '?start=2024-01-01T00:00:00Z&end=2024-01-03T00:00:00Z',
+            user_id=self.user.id
+        )
+
+        self.assertEqual([json.loads(line)['file_info']['name'] for line in body.splitlines()], ['plans.txt'])
+
+    def test_organization_filter(self):
+        """Test that organization filters on the file for users and on the downloader for files"""
+        _, body = self.export('user-download-export', 'ndjson', f'?organization={self.org.id}', user_id=self.user.id)
+        self.assertEqual([json.loads(line)['file_info']['name'] for line in body.splitlines()], ['notes.txt'])
+
+        _, body = self.export('file-download-export', 'ndjson', f'?organization={self.other_org.id}', file_id=self.file.id)
+        self.assertEqual([json.loads(line)['user_info']['username'] for line in body.splitlines()], ['testuser2'])
+
+    @override_settings(EXPORT_CHUNK_SIZE=1)
+    def test_streamed_in_chunks(self):
+        """Test that rows are sent as they are read rather than in one piece"""
+        response = self.client.get(reverse('user-download-export', kwargs={'user_id': self.user.id, 'export_format': 'csv'}))
+
+        self.assertEqual(len(list(response.streaming_content)), 3)
+
+    def test_empty_csv_has_a_header(self):
+        """Test that an export without rows still names its columns"""
+        _, body = self.export('user-download-export', 'csv', '?start=2030-01-01T00:00:00Z', user_id=self.user.id)
+
+        self.assertTrue(body.startswith('id,downloaded_at,file_info.id,'))
+        self.assertEqual(len(body.splitlines()), 1)
+
+    def test_invalid_filters(self):
+        """Test that an empty range is rejected"""
+        url = reverse('user-download-export', kwargs={'user_id': self.user.id, 'export_format': 'csv'})
+        response = self.client.get(url + '?start=2024-01-03T00:00:00Z&end=2024-01-01T00:00:00Z')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_subject_or_format(self):
+        """Test that missing users and unsupported formats return 404"""
+        response = self.client.get(reverse('user-download-export', kwargs={'user_id': 9999, 'export_format': 'csv'}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(f'/api/v1/users/{self.user.id}/downloads/export.xml')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unauthenticated(self):
+        """Test that exports require authentication"""
+        self.client.logout()
+        response = self.client.get(reverse('file-download-export', kwargs={'file_id': self.file.id, 'export_format': 'csv'}))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
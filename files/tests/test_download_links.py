@@ -0,0 +1,145 @@
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.links import sign_download
+from files.models import User, Organization, File, Download
+
+
+class DownloadLinkTestCase(TestCase):
+    """Test cases for DownloadLinkView and SignedFileDownloadView"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.file = File.objects.create(
+            organization=self.org,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile('report.txt', b'quarterly numbers', content_type='text/plain'),
+            name='report.txt',
+            file_size=17,
+            content_type='text/plain',
+            checksum='a' * 64
+        )
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+
+    def issue(self, **data):
+        return self.client.post(reverse('file-download-link', kwargs={'file_id': self.file.id}), data, format='json')
+
+    def issue_for(self, file_object):
+        response = self.client.post(reverse('file-download-link', kwargs={'file_id': file_object.id}))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['url']
+
+    def test_issue_and_download(self):
+        """Test that an issued link downloads the file without a session"""
+        response = self.issue()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('expires_at', response.data)
+
+        anonymous = APIClient()
+        download = anonymous.get(response.data['url'])
+
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(download.streaming_content), b'quarterly numbers')
+        self.assertEqual(download['Content-Type'], 'text/plain')
+        self.assertEqual(download['ETag'], f'"{"a" * 64}"')
+        self.assertIn('public', download['Cache-Control'])
+        self.assertEqual(Download.objects.get().downloaded_by, self.user)
+
+    def test_served_without_file_or_session_queries(self):
+        """Test that the signature alone authorizes the download"""
+        token, _ = sign_download(self.file, self.user)
+        anonymous = APIClient()
+
+        # The download is handed to the sink, which writes it outside the request in production.
+        with mock.patch('files.views.record_download') as record, CaptureQueriesContext(connection) as queries:
+            response = anonymous.get(reverse('file-signed-download', kwargs={'token': token}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 0)
+        file_object, user = record.call_args.args
+        self.assertEqual((file_object.pk, user.pk), (self.file.id, self.user.id))
+
+    def test_ranges_and_conditional_requests(self):
+        """Test that links honour Range and If-None-Match like the regular download"""
+        token, _ = sign_download(self.file, self.user)
+        url = reverse('file-signed-download', kwargs={'token': token})
+
+        response = self.client.get(url, HTTP_RANGE='bytes=0-8')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), b'quarterly')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=f'"{"a" * 64}"')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_expired_link(self):
+        """Test that a link stops working when it expires"""
+        token, claims = sign_download(self.file, self.user, lifetime=60)
+
+        with mock.patch('files.links.time.time', return_value=claims['exp']):
+            response = self.client.get(reverse('file-signed-download', kwargs={'token': token}))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['detail'], 'Download link has expired.')
+        self.assertFalse(Download.objects.exists())
+
+    def test_tampered_link(self):
+        """Test that a link for another file cannot be forged"""
+        token, _ = sign_download(self.file, self.user)
+        payload, _, signature = token.rpartition(':')
+
+        response = self.client.get(reverse('file-signed-download', kwargs={'token': payload + ':' + 'x' * len(signature)}))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['detail'], 'Invalid download link.')
+
+    def test_lifetime_limit(self):
+        """Test that links cannot outlive DOWNLOAD_LINKS['MAX_LIFETIME']"""
+        with self.settings(DOWNLOAD_LINKS={'LIFETIME': 60, 'MAX_LIFETIME': 3600}):
+            self.assertEqual(self.issue(expires_in=3600).status_code, status.HTTP_201_CREATED)
+            self.assertEqual(self.issue(expires_in=3601).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_issue_requires_authentication(self):
+        """Test that anonymous users cannot issue links"""
+        self.client.logout()
+
+        self.assertEqual(self.issue().status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_missing_file(self):
+        """Test that a link to a file that does not exist returns 404"""
+        self.assertEqual(
+            self.client.post(reverse('file-download-link', kwargs={'file_id': 9999})).status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+
+    def test_link_to_deleted_file_sharing_a_blob(self):
+        """Test that a link outliving its File still serves the shared bytes without recording a download"""
+        url = reverse('organization-file-list-create', kwargs={'org_id': self.org.id})
+        for name in ('first.txt', 'second.txt'):
+            response = self.client.post(url, {
+                'name': name,
+                'file': SimpleUploadedFile(name, b'shared bytes', content_type='text/plain'),
+            }, format='multipart')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        first, second = File.objects.get(name='first.txt'), File.objects.get(name='second.txt')
+        self.assertEqual(first.blob_id, second.blob_id)
+        link = self.issue_for(first)
+        first.delete()
+
+        response = APIClient().get(link)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), b'shared bytes')
+        self.assertFalse(Download.objects.exists())
@@ -0,0 +1,184 @@
+import gzip
+from unittest import mock
+from urllib.parse import unquote
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models.fields.files import FieldFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.models import User, Organization, File, Download
+
+
+ACCEL = {'MODE': 'accel', 'ACCEL_PREFIX': '/protected/'}
+SENDFILE = {'MODE': 'sendfile'}
+
+# nginx drops these upstream headers on an X-Accel-Redirect; the add_header
+# lines of the internal location in the README put them back.
+ACCEL_DROPPED_HEADERS = ('Content-Encoding', 'ETag', 'Vary')
+ACCEL_ADDED_HEADERS = ('Content-Encoding', 'ETag', 'Vary')
+
+
+class StandInProxy:
+    """
+    The part of nginx / mod_xsendfile the app relies on: pass the request
+    upstream and, when the response names an internal file, replace its body
+    with that file (or the requested byte range of it). ``headers`` holds
+    the headers the client received for the last request.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.headers = {}
+
+    def get(self, url, **headers):
+        upstream = self.client.get(url, **headers)
+        self.headers = dict(upstream.items())
+        if 'X-Accel-Redirect' in upstream:
+            for name in ACCEL_DROPPED_HEADERS:
+                self.headers.pop(name, None)
+            self.headers.update((name, upstream[name]) for name in ACCEL_ADDED_HEADERS if name in upstream)
+            location = upstream['X-Accel-Redirect']
+            path = default_storage.path(unquote(location[len(ACCEL['ACCEL_PREFIX']):]))
+        elif 'X-Sendfile' in upstream:
+            path = upstream['X-Sendfile']
+        elif upstream.streaming:
+            return upstream.status_code, upstream, b''.join(upstream.streaming_content)
+        else:
+            return upstream.status_code, upstream, upstream.content
+
+        assert not upstream.streaming and upstream.content == b'', 'The app sent the file bytes itself'
+        with open(path, 'rb') as handle:
+            body = handle.read()
+        range_header = headers.get('HTTP_RANGE')
+        if range_header:
+            start, end = (int(value) for value in range_header.split('=')[1].split('-'))
+            return status.HTTP_206_PARTIAL_CONTENT, upstream, body[start:end + 1]
+        return upstream.status_code, upstream, body
+
+
+class DownloadOffloadTestCase(TestCase):
+    """Test cases for delivering downloads through the front proxy"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.content = b'0123456789abcdefghij'
+        self.file_obj = File.objects.create(
+            organization=self.org,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile(name='offload report.txt', content=self.content, content_type='text/plain'),
+            name='offload report.txt',
+            file_size=len(self.content),
+            content_type='text/plain',
+            checksum='b' * 64
+        )
+        self.url = reverse('file-download', kwargs={'file_id': self.file_obj.id})
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+        self.proxy = StandInProxy(self.client)
+
+    @override_settings(DOWNLOAD_DELIVERY=ACCEL)
+    def test_accel_redirect(self):
+        """Test that nginx mode returns headers only and records the download"""
+        code, upstream, body = self.proxy.get(self.url)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual(body, self.content)
+        self.assertTrue(upstream['X-Accel-Redirect'].startswith('/protected/uploads/'))
+        self.assertNotIn(' ', upstream['X-Accel-Redirect'])
+        self.assertEqual(upstream['Content-Type'], 'text/plain')
+        self.assertEqual(upstream['Content-Disposition'], 'attachment; filename="offload report.txt"')
+        self.assertEqual(upstream['ETag'], f'"{"b" * 64}"')
+        self.assertEqual(Download.objects.filter(file=self.file_obj, downloaded_by=self.user).count(), 1)
+
+    @override_settings(DOWNLOAD_DELIVERY=ACCEL)
+    def test_accel_redirect_of_an_encoded_file(self):
+        """Test that the documented nginx location passes the encoding and validators of a gzip-stored file"""
+        encoded = gzip.compress(self.content, mtime=0)
+        stored = File.objects.create(
+            organization=self.org,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile(name='encoded.txt', content=encoded, content_type='text/plain'),
+            name='encoded.txt',
+            file_size=len(self.content),
+            content_type='text/plain',
+            checksum='c' * 64,
+            content_encoding='gzip',
+            stored_size=len(encoded)
+        )
+
+        code, upstream, body = self.proxy.get(
+            reverse('file-download', kwargs={'file_id': stored.id}), HTTP_ACCEPT_ENCODING='gzip'
+        )
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertIn('X-Accel-Redirect', upstream)
+        self.assertEqual(self.proxy.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(self.proxy.headers['ETag'], upstream['ETag'])
+        self.assertIn('Accept-Encoding', self.proxy.headers['Vary'])
+        self.assertEqual(gzip.decompress(body), self.content)
+
+    @override_settings(DOWNLOAD_DELIVERY=SENDFILE)
+    def test_sendfile(self):
+        """Test that X-Sendfile mode names the absolute path of the stored file"""
+        code, upstream, body = self.proxy.get(self.url)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual(body, self.content)
+        self.assertEqual(upstream['X-Sendfile'], self.file_obj.file.path)
+        self.assertEqual(Download.objects.count(), 1)
+
+    @override_settings(DOWNLOAD_DELIVERY=ACCEL)
+    def test_resumed_range_is_not_recorded(self):
+        """Test that the proxy serves ranges and a resume is not a new download"""
+        code, _, body = self.proxy.get(self.url, HTTP_RANGE='bytes=5-9')
+
+        self.assertEqual(code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(body, self.content[5:10])
+        self.assertEqual(Download.objects.count(), 0)
+
+    @override_settings(DOWNLOAD_DELIVERY=ACCEL)
+    def test_conditional_requests_are_answered_by_the_app(self):
+        """Test that a 304 never reaches the proxy's file handling"""
+        code, upstream, _ = self.proxy.get(self.url, HTTP_IF_NONE_MATCH=f'"{"b" * 64}"')
+
+        self.assertEqual(code, status.HTTP_304_NOT_MODIFIED)
+        self.assertNotIn('X-Accel-Redirect', upstream)
+        self.assertEqual(Download.objects.count(), 0)
+
+    @override_settings(DOWNLOAD_DELIVERY=ACCEL)
+    def test_unauthenticated(self):
+        """Test that offloading does not bypass authentication"""
+        self.client.logout()
+        code, upstream, _ = self.proxy.get(self.url)
+
+        self.assertEqual(code, status.HTTP_403_FORBIDDEN)
+        self.assertNotIn('X-Accel-Redirect', upstream)
+
+    @override_settings(DOWNLOAD_DELIVERY=SENDFILE)
+    def test_sendfile_falls_back_to_streaming(self):
+        """Test that storages without local paths are streamed by the app"""
+        no_path = mock.PropertyMock(side_effect=NotImplementedError)
+        with mock.patch.object(FieldFile, 'path', new=no_path):
+            code, upstream, body = self.proxy.get(self.url)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertNotIn('X-Sendfile', upstream)
+        self.assertEqual(body, self.content)
+        self.assertEqual(Download.objects.count(), 1)
+
+    def test_streams_by_default(self):
+        """Test that the default mode streams the file from the app"""
+        code, upstream, body = self.proxy.get(self.url)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertNotIn('X-Accel-Redirect', upstream)
+        self.assertEqual(body, self.content)
@@ -0,0 +1,142 @@
+import gzip
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock, skipUnless
+
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from files.models import User, Organization, File, Download, RollupWatermark, ArchivedDownloadCount
+from files.partitions import (
+    DEFAULT_PARTITION,
+    LEGACY_PARTITION,
+    add_months,
+    create_partitions,
+    month_start,
+    partition_name,
+    partitions,
+    retention_cutoff,
+    split_legacy_partition,
+)
+from files.rollups import WATERMARK_NAME
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class PartitionCalendarTestCase(SimpleTestCase):
+    """Test cases for the month arithmetic behind the partitions"""
+
+    def test_month_start(self):
+        """Test that any moment maps to the start of its UTC month"""
+        self.assertEqual(month_start(utc(2024, 2, 29, 23, 59)), utc(2024, 2, 1))
+
+    def test_add_months(self):
+        """Test that months roll over into the next and previous years"""
+        self.assertEqual(add_months(utc(2024, 11, 1), 3), utc(2025, 2, 1))
+        self.assertEqual(add_months(utc(2024, 1, 1), -1), utc(2023, 12, 1))
+
+    def test_partition_name(self):
+        """Test that partitions are named by year and month"""
+        self.assertEqual(partition_name(utc(2024, 3, 1)), 'files_download_p202403')
+
+    def test_retention_cutoff(self):
+        """Test that the current month and keep_months full months are kept"""
+        self.assertEqual(retention_cutoff(12, now=utc(2025, 6, 15)), utc(2024, 6, 1))
+
+
+@skipUnless(connection.vendor != 'postgresql', 'Checks the behaviour without PostgreSQL')
+class PartitionCommandsWithoutPostgresTestCase(TestCase):
+    """Test cases for the partition commands on other databases"""
+
+    def test_commands_refuse(self):
+        """Test that the commands explain that partitioning needs PostgreSQL"""
+        with self.assertRaisesMessage(CommandError, 'PostgreSQL'):
+            call_command('create_download_partitions')
+        with self.assertRaisesMessage(CommandError, 'PostgreSQL'):
+            call_command('apply_download_retention')
+        with self.assertRaisesMessage(CommandError, 'PostgreSQL'):
+            call_command('split_legacy_downloads')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Download partitioning needs PostgreSQL')
+class DownloadPartitionsTestCase(TransactionTestCase):
+    """Test cases for the partitioned Download table"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(username='testuser1', password='testpass123', organization=self.org)
+        self.file = File.objects.create(organization=self.org, uploaded_by=self.user, file='uploads/a.txt', name='a.txt')
+
+    def partition_of(self, download):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM files_download WHERE id = %s', [download.id])
+            return cursor.fetchone()[0]
+
+    def test_rows_are_routed_by_month(self):
+        """Test that downloads land in the partition of their month"""
+        now = datetime.now(dt_timezone.utc)
+        create_partitions(2, now=now)
+        next_month = add_months(month_start(now), 1)
+        download = Download.objects.create(file=self.file, downloaded_by=self.user, downloaded_at=next_month)
+
+        self.assertEqual(self.partition_of(download), partition_name(next_month))
+
+    def test_stray_rows_move_out_of_the_default_partition(self):
+        """Test that creating a partition adopts rows that went to the default one"""
+        far = add_months(month_start(datetime.now(dt_timezone.utc)), 12)
+        download = Download.objects.create(file=self.file, downloaded_by=self.user, downloaded_at=far)
+        self.assertEqual(self.partition_of(download), DEFAULT_PARTITION)
+
+        create_partitions(12)
+
+        self.assertEqual(self.partition_of(download), partition_name(far))
+        self.assertTrue(Download.objects.filter(pk=download.pk).exists())
+
+    def test_retention_archives_rolled_up_partitions(self):
+        """Test that old partitions are detached, archived and dropped, keeping their counts"""
+        now = datetime.now(dt_timezone.utc)
+        with connection.cursor() as cursor:
+            oldest, oldest_until = partitions(cursor)[0]
+        old = Download.objects.create(
+            file=self.file, downloaded_by=self.user, downloaded_at=add_months(month_start(now), -1)
+        )
+        RollupWatermark.objects.create(name=WATERMARK_NAME, last_download_id=old.id)
+
+        # Once the month after the oldest partition's last one has started, it is past retention.
+        with mock.patch('files.partitions.timezone.now', return_value=oldest_until):
+            call_command('apply_download_retention', keep_months=0, archive_dir='test-archives')
+
+        self.assertFalse(Download.objects.filter(pk=old.pk).exists())
+        self.assertEqual(ArchivedDownloadCount.objects.get(file=self.file).count, 1)
+        with default_storage.open(f'test-archives/{oldest}.csv.gz') as archive:
+            self.assertIn(str(old.id).encode(), gzip.decompress(archive.read()))
+        default_storage.delete(f'test-archives/{oldest}.csv.gz')
+
+    def test_old_legacy_rows_are_split_into_months(self):
+        """Test that legacy rows before a month move into monthly partitions of their own"""
+        with connection.cursor() as cursor:
+            legacy_until = dict(partitions(cursor))[LEGACY_PARTITION]
+        old = Download.objects.create(file=self.file, downloaded_by=self.user, downloaded_at=utc(2001, 3, 15))
+        kept = Download.objects.create(file=self.file, downloaded_by=self.user, downloaded_at=utc(2001, 6, 2))
+        self.assertEqual(self.partition_of(old), LEGACY_PARTITION)
+
+        created = split_legacy_partition(utc(2001, 6, 10))
+        self.addCleanup(self.restore_legacy, created, legacy_until)
+
+        self.assertEqual(created, ['files_download_p200103', 'files_download_p200104', 'files_download_p200105'])
+        self.assertEqual(self.partition_of(old), 'files_download_p200103')
+        self.assertEqual(self.partition_of(kept), LEGACY_PARTITION)
+        self.assertEqual(split_legacy_partition(utc(2001, 6, 10)), [])
+
+    def restore_legacy(self, created, legacy_until):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE files_download DETACH PARTITION {LEGACY_PARTITION}')
+            for name in created:
+                cursor.execute(f'DROP TABLE {name}')
+            cursor.execute(
+                f'ALTER TABLE files_download ATTACH PARTITION {LEGACY_PARTITION} FOR VALUES FROM (MINVALUE) TO (%s)',
+                [legacy_until]
+            )
@@ -0,0 +1,234 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.models import User, Organization, File, Download, DownloadRollup, RollupWatermark
+from files.rollups import WATERMARK_NAME, roll_up_downloads
+from files.sinks import DownloadEvent, write_download_events
+
+
+class DownloadRollupTestCase(TestCase):
+    """Test cases for the hourly and daily download rollups"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.file1 = self.create_file('report.txt')
+        self.file2 = self.create_file('notes.txt')
+        self.day = datetime(2025, 3, 10, tzinfo=dt_timezone.utc)
+
+    def create_file(self, name):
+        return File.objects.create(
+            organization=self.org,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile(name=name, content=b'rolled up', content_type='text/plain'),
+            name=name,
+            file_size=9,
+            content_type='text/plain'
+        )
+
+    def download(self, file_object, at, times=1):
+        write_download_events([DownloadEvent(file_object.id, self.user.id, at) for _ in range(times)])
+
+    def rollup(self, granularity, dimension, dimension_id, bucket):
+        return DownloadRollup.objects.get(
+            granularity=granularity,
+            dimension=dimension,
+            dimension_id=dimension_id,
+            bucket=bucket
+        ).count
+
+    def test_downloads_are_bucketed_per_dimension(self):
+        """Test that downloads are counted per hour and day for every dimension"""
+        self.download(self.file1, self.day + timedelta(hours=9, minutes=5), times=2)
+        self.download(self.file1, self.day + timedelta(hours=14, minutes=30))
+        self.download(self.file2, self.day + timedelta(hours=9, minutes=59))
+
+        roll_up_downloads(settle_seconds=0)
+
+        self.assertEqual(self.rollup('hour', 'file', self.file1.id, self.day + timedelta(hours=9)), 2)
+        self.assertEqual(self.rollup('hour', 'file', self.file1.id, self.day + timedelta(hours=14)), 1)
+        self.assertEqual(self.rollup('day', 'file', self.file1.id, self.day), 3)
+        self.assertEqual(self.rollup('day', 'file', self.file2.id, self.day), 1)
+        self.assertEqual(self.rollup('hour', 'organization', self.org.id, self.day + timedelta(hours=9)), 3)
+        self.assertEqual(self.rollup('day', 'organization', self.org.id, self.day), 4)
+        self.assertEqual(self.rollup('day', 'user', self.user.id, self.day), 4)
+
+    def test_incremental_runs_resume_from_watermark(self):
+        """Test that a second run adds only new downloads to existing buckets"""
+        self.download(self.file1, self.day + timedelta(hours=9))
+        roll_up_downloads(settle_seconds=0)
+        self.assertIsNone(roll_up_downloads(settle_seconds=0))
+
+        self.download(self.file1, self.day + timedelta(hours=9, minutes=30), times=2)
+        roll_up_downloads(settle_seconds=0)
+
+        self.assertEqual(self.rollup('hour', 'file', self.file1.id, self.day + timedelta(hours=9)), 3)
+        self.assertEqual(
+            RollupWatermark.objects.get(name=WATERMARK_NAME).last_download_id,
+            Download.objects.latest('id').id
+        )
+
+    def test_batches_are_limited(self):
+        """Test that each run processes at most batch_size downloads"""
+        self.download(self.file1, self.day, times=5)
+
+        roll_up_downloads(batch_size=2, settle_seconds=0)
+        self.assertEqual(self.rollup('day', 'file', self.file1.id, self.day), 2)
+
+        while roll_up_downloads(batch_size=2, settle_seconds=0) is not None:
+            pass
+        self.assertEqual(self.rollup('day', 'file', self.file1.id, self.day), 5)
+
+    def test_unsettled_downloads_are_left_for_later(self):
+        """Test that downloads inside the settle window are not rolled up yet"""
+        self.download(self.file1, timezone.now())
+
+        self.assertIsNone(roll_up_downloads(settle_seconds=60))
+        self.assertFalse(DownloadRollup.objects.exists())
+
+    def test_settle_window_uses_insert_time(self):
+        """Test that a just-written download with an old event time is not rolled up yet"""
+        self.download(self.file1, self.day)
+
+        self.assertIsNone(roll_up_downloads(settle_seconds=60))
+
+        Download.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        self.assertIsNotNone(roll_up_downloads(settle_seconds=60))
+        self.assertEqual(self.rollup('day', 'file', self.file1.id, self.day), 1)
+
+    def test_management_command(self):
+        """Test that the rollup_downloads command drains every pending batch"""
+        self.download(self.file1, self.day, times=3)
+        out = StringIO()
+
+        with override_settings(ROLLUP_SETTLE_SECONDS=0):
+            call_command('rollup_downloads', '--batch-size', '2', stdout=out)
+
+        self.assertEqual(self.rollup('day', 'file', self.file1.id, self.day), 3)
+        self.assertIn('up to date', out.getvalue())
+
+
+class DownloadAnalyticsViewTestCase(TestCase):
+    """Test cases for the analytics endpoints"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.day = datetime(2025, 3, 10, tzinfo=dt_timezone.utc)
+        # Rollups are written directly; the endpoints never look at Download rows.
+        for offset, count in [(0, 4), (2, 1)]:
+            DownloadRollup.objects.create(
+                granularity='day', dimension='organization', dimension_id=self.org.id,
+                bucket=self.day + timedelta(days=offset), count=count
+            )
+        for file_id, count in [(1, 3), (2, 7), (3, 5)]:
+            DownloadRollup.objects.create(
+                granularity='day', dimension='file', dimension_id=file_id, bucket=self.day, count=count
+            )
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+
+    def test_time_series_is_zero_filled(self):
+        """Test that the series has one entry per bucket, including empty ones"""
+        response = self.client.get(reverse('analytics-download-series'), {
+            'dimension': 'organization',
+            'id': self.org.id,
+            'granularity': 'day',
+            'start': '2025-03-10T00:00:00Z',
+            'end': '2025-03-13T00:00:00Z',
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([point['count'] for point in response.data['series']], [4, 0, 1])
+        self.assertEqual(response.data['series'][0]['bucket'], '2025-03-10T00:00:00Z')
+
+    def test_time_series_with_unaligned_start(self):
+        """Test that the bucket containing an unaligned start reports its count"""
+        response = self.client.get(reverse('analytics-download-series'), {
+            'dimension': 'organization',
+            'id': self.org.id,
+            'granularity': 'day',
+            'start': '2025-03-10T10:30:00Z',
+            'end': '2025-03-13T00:00:00Z',
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['series'][0]['bucket'], '2025-03-10T00:00:00Z')
+        self.assertEqual([point['count'] for point in response.data['series']], [4, 0, 1])
+
+    def test_time_series_defaults_to_recent_range(self):
+        """Test that omitting start and end returns the last 30 days"""
+        response = self.client.get(reverse('analytics-download-series'), {'dimension': 'organization', 'id': self.org.id})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['series']), 30)
+
+    def test_time_series_requires_id(self):
+        """Test that a series request without an id is rejected"""
+        response = self.client.get(reverse('analytics-download-series'), {'dimension': 'file'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(ANALYTICS_MAX_BUCKETS=24)
+    def test_range_is_capped(self):
+        """Test that ranges longer than ANALYTICS_MAX_BUCKETS are rejected"""
+        response = self.client.get(reverse('analytics-download-series'), {
+            'dimension': 'file',
+            'id': 1,
+            'granularity': 'hour',
+            'start': '2025-03-10T00:00:00Z',
+            'end': '2025-03-12T00:00:00Z',
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_top_downloads(self):
+        """Test that top-N returns the busiest ids in descending order"""
+        response = self.client.get(reverse('analytics-top'), {
+            'dimension': 'file',
+            'start': '2025-03-01T00:00:00Z',
+            'end': '2025-03-31T00:00:00Z',
+            'limit': 2,
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': 2, 'count': 7}, {'id': 3, 'count': 5}])
+
+    def test_top_downloads_with_unaligned_start(self):
+        """Test that top-N counts the bucket containing an unaligned start, like the series"""
+        response = self.client.get(reverse('analytics-top'), {
+            'dimension': 'file',
+            'granularity': 'day',
+            'start': '2025-03-10T10:30:00Z',
+            'end': '2025-03-13T00:00:00Z',
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'],
+            [{'id': 2, 'count': 7}, {'id': 3, 'count': 5}, {'id': 1, 'count': 3}]
+        )
+
+    def test_requires_authentication(self):
+        """Test that anonymous users cannot read analytics"""
+        self.client.logout()
+        response = self.client.get(reverse('analytics-top'), {'dimension': 'file'})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
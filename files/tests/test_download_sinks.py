@@ -0,0 +1,153 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from files.models import User, Organization, File, Download
+from files.sinks import (
+    BufferedDownloadSink,
+    DownloadEvent,
+    SyncDownloadSink,
+    get_download_sink,
+)
+
+
+def make_event(file_id=1, user_id=1):
+    return DownloadEvent(file_id, user_id, timezone.now())
+
+
+class BufferedDownloadSinkTestCase(SimpleTestCase):
+    """Test cases for BufferedDownloadSink batching, independent of the database"""
+
+    def setUp(self):
+        """Capture batches instead of writing them"""
+        self.batches = []
+        patcher = mock.patch('files.sinks.write_download_events', side_effect=self.batches.append)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_flushes_when_batch_size_is_reached(self):
+        """Test that a full batch is written without waiting for the interval"""
+        sink = BufferedDownloadSink(batch_size=3, flush_interval=60)
+        self.addCleanup(sink.close)
+
+        for _ in range(3):
+            sink.emit(make_event())
+
+        deadline = time.monotonic() + 2
+        while not self.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual([len(batch) for batch in self.batches], [3])
+
+    def test_flushes_when_interval_elapses(self):
+        """Test that a partial batch is written once the flush interval passes"""
+        sink = BufferedDownloadSink(batch_size=100, flush_interval=0.05)
+        self.addCleanup(sink.close)
+
+        sink.emit(make_event())
+
+        deadline = time.monotonic() + 2
+        while not self.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual([len(batch) for batch in self.batches], [1])
+
+    def test_explicit_flush_writes_pending_events(self):
+        """Test that flush() returns only after buffered events are written"""
+        sink = BufferedDownloadSink(batch_size=100, flush_interval=60)
+        self.addCleanup(sink.close)
+
+        sink.emit(make_event())
+        sink.emit(make_event())
+        sink.flush(timeout=2)
+
+        self.assertEqual(sum(len(batch) for batch in self.batches), 2)
+
+    def test_close_flushes_pending_events(self):
+        """Test that closing the sink (as on shutdown) writes what is left"""
+        sink = BufferedDownloadSink(batch_size=100, flush_interval=60)
+
+        sink.emit(make_event())
+        sink.close()
+
+        self.assertEqual(sum(len(batch) for batch in self.batches), 1)
+
+    def test_overflow_drop_discards_events(self):
+        """Test that the 'drop' policy discards events when the queue is full"""
+        sink = BufferedDownloadSink(max_queue_size=1, overflow='drop')
+        # Keep the worker from draining the queue.
+        sink._ensure_worker = lambda: None
+
+        sink.emit(make_event())
+        with self.assertLogs('files.sinks', level='WARNING'):
+            sink.emit(make_event())
+
+        self.assertEqual(sink.dropped, 1)
+        self.assertEqual(self.batches, [])
+
+    def test_overflow_sync_writes_inline(self):
+        """Test that the 'sync' policy writes overflowing events in the caller"""
+        sink = BufferedDownloadSink(max_queue_size=1, overflow='sync')
+        sink._ensure_worker = lambda: None
+
+        sink.emit(make_event())
+        sink.emit(make_event(file_id=2))
+
+        self.assertEqual(sink.dropped, 0)
+        self.assertEqual([[event.file_id for event in batch] for batch in self.batches], [[2]])
+
+    def test_unknown_overflow_policy_rejected(self):
+        """Test that an unknown overflow policy is a configuration error"""
+        with self.assertRaises(ValueError):
+            BufferedDownloadSink(overflow='explode')
+
+
+class DownloadSinkPersistenceMixin:
+    """Shared fixtures for sinks that write to the database"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(username='testuser1', password='testpass123', organization=self.org)
+        self.file_obj = File.objects.create(
+            organization=self.org,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile(name='sink.txt', content=b'sink', content_type='text/plain'),
+            name='sink.txt',
+            file_size=4,
+            content_type='text/plain'
+        )
+
+
+class SyncDownloadSinkTestCase(DownloadSinkPersistenceMixin, TestCase):
+    """Test cases for SyncDownloadSink"""
+
+    def test_emit_writes_immediately(self):
+        """Test that the synchronous sink writes the row before returning"""
+        SyncDownloadSink().emit(make_event(self.file_obj.id, self.user.id))
+        self.assertEqual(Download.objects.filter(file=self.file_obj).count(), 1)
+
+    def test_event_timestamp_is_preserved(self):
+        """Test that downloaded_at comes from the event rather than the INSERT"""
+        event = DownloadEvent(self.file_obj.id, self.user.id, timezone.now() - timedelta(hours=1))
+        SyncDownloadSink().emit(event)
+        self.assertEqual(Download.objects.get().downloaded_at, event.downloaded_at)
+
+    @override_settings(DOWNLOAD_EVENTS={'SINK': 'files.sinks.SyncDownloadSink'})
+    def test_configured_sink_is_used(self):
+        """Test that get_download_sink() honours settings.DOWNLOAD_EVENTS"""
+        self.assertIsInstance(get_download_sink(), SyncDownloadSink)
+
+
+class BufferedDownloadSinkPersistenceTestCase(DownloadSinkPersistenceMixin, TransactionTestCase):
+    """Test that the background worker writes rows through its own connection"""
+
+    def test_bulk_writes_from_worker_thread(self):
+        """Test that buffered events end up as Download rows after a flush"""
+        sink = BufferedDownloadSink(batch_size=100, flush_interval=60)
+        for _ in range(5):
+            sink.emit(make_event(self.file_obj.id, self.user.id))
+        sink.close()
+
+        self.assertEqual(Download.objects.filter(file=self.file_obj).count(), 5)
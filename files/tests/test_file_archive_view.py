@@ -0,0 +1,160 @@
+import io
+import os
+import zipfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.models import User, Organization, File, Download
+
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 2000
+
+
+class FileArchiveViewTestCase(TestCase):
+    """Test cases for FileArchiveView"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.other_org = Organization.objects.create(name='Globex Industries')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.notes = self.create_file(self.org, 'docs/notes.txt', b'notes ' * 1000, 'text/plain')
+        self.image = self.create_file(self.org, 'docs/image.png', PNG, 'image/png')
+        self.readme = self.create_file(self.org, 'readme.txt', b'read me', 'text/plain')
+        self.other = self.create_file(self.other_org, 'readme.txt', b'other read me', 'text/plain')
+        self.url = reverse('file-archive')
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+
+    def create_file(self, organization, name, content, content_type):
+        return File.objects.create(
+            organization=organization,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile(name=os.path.basename(name), content=content, content_type=content_type),
+            name=name,
+            file_size=len(content),
+            content_type=content_type
+        )
+
+    def get_archive(self, query):
+        response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        return response, archive
+
+    def test_files_by_id(self):
+        """Test that the requested files are archived in the requested order"""
+        ids = [self.readme.id, self.notes.id, self.image.id]
+        response, archive = self.get_archive('?' + '&'.join(f'ids={file_id}' for file_id in ids))
+
+        self.assertEqual(archive.namelist(), ['readme.txt', 'docs/notes.txt', 'docs/image.png'])
+        self.assertEqual(archive.read('docs/notes.txt'), b'notes ' * 1000)
+        self.assertEqual(archive.read('docs/image.png'), PNG)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="files.zip"')
+
+    def test_compressed_types_are_stored(self):
+        """Test that images are stored and text is deflated"""
+        _, archive = self.get_archive(f'?ids={self.notes.id}&ids={self.image.id}')
+
+        self.assertEqual(archive.getinfo('docs/image.png').compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(archive.getinfo('docs/notes.txt').compress_type, zipfile.ZIP_DEFLATED)
+        self.assertLess(archive.getinfo('docs/notes.txt').compress_size, 1000)
+
+    def test_equal_names_are_made_unique(self):
+        """Test that files with the same name do not overwrite each other"""
+        _, archive = self.get_archive(f'?ids={self.readme.id}&ids={self.other.id}')
+
+        self.assertEqual(archive.namelist(), ['readme.txt', 'readme (2).txt'])
+        self.assertEqual(archive.read('readme (2).txt'), b'other read me')
+
+    def test_organization_with_prefix(self):
+        """Test that an organization and name prefix select the files"""
+        response, archive = self.get_archive(f'?organization={self.org.id}&name_prefix=docs/')
+
+        self.assertEqual(archive.namelist(), ['docs/image.png', 'docs/notes.txt'])
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="Acme Corp.zip"')
+
+    def test_organization_name_is_escaped(self):
+        """Test that quotes and non-ASCII characters in the organization name cannot break the header"""
+        self.org.name = 'Acme "R&D" Zürich'
+        self.org.save()
+
+        response, _ = self.get_archive(f'?organization={self.org.id}')
+
+        self.assertEqual(
+            response['Content-Disposition'],
+            "attachment; filename*=utf-8''Acme%20%22R%26D%22%20Z%C3%BCrich.zip"
+        )
+
+    def test_downloads_recorded_in_one_write(self):
+        """Test that every archived file gets a Download from a single INSERT"""
+        with CaptureQueriesContext(connection) as queries:
+            self.get_archive(f'?organization={self.org.id}')
+
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "files_download"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            set(Download.objects.filter(downloaded_by=self.user).values_list('file_id', flat=True)),
+            {self.notes.id, self.image.id, self.readme.id}
+        )
+
+    def test_archive_is_streamed(self):
+        """Test that a large file is sent in pieces rather than buffered"""
+        big = self.create_file(self.org, 'big.bin', os.urandom(2 * 1024 * 1024), 'application/octet-stream')
+        response = self.client.get(f'{self.url}?ids={big.id}')
+
+        self.assertNotIn('Content-Length', response)
+        pieces = [len(piece) for piece in response.streaming_content]
+        self.assertGreater(len(pieces), 10)
+        self.assertLess(max(pieces), 256 * 1024)
+
+    def test_missing_bytes_are_left_out(self):
+        """Test that a file missing from storage does not break the archive"""
+        self.readme.file.storage.delete(self.readme.file.name)
+
+        with self.assertLogs('files.zipstream', 'WARNING'):
+            _, archive = self.get_archive(f'?ids={self.readme.id}&ids={self.notes.id}')
+
+        self.assertEqual(archive.namelist(), ['docs/notes.txt'])
+
+    def test_nothing_matches(self):
+        """Test that an empty selection returns 404"""
+        response = self.client.get(f'{self.url}?organization={self.org.id}&name_prefix=nothing/')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Download.objects.exists())
+
+    @override_settings(ARCHIVE_MAX_FILES=2)
+    def test_too_many_files(self):
+        """Test that selections over the limit are rejected"""
+        response = self.client.get(f'{self.url}?organization={self.org.id}')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Download.objects.exists())
+
+    def test_invalid_selection(self):
+        """Test that ids and organization cannot be combined or both left out"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(f'{self.url}?ids={self.readme.id}&organization={self.org.id}')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(f'{self.url}?ids={self.readme.id}&name_prefix=docs/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unauthenticated(self):
+        """Test that unauthenticated users cannot download archives"""
+        self.client.logout()
+        response = self.client.get(f'{self.url}?ids={self.readme.id}')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -79,7 +79,7 @@ class FileDownloadHistoryViewTestCase(TestCase):
         
         # Assert response
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 3)  # file1 has 3 downloads
+        self.assertEqual(len(response.data['results']), 3)  # file1 has 3 downloads
     
     def test_list_file_downloads_unauthenticated(self):
         """Test that unauthenticated users cannot list download history"""
@@ -103,10 +103,10 @@ class FileDownloadHistoryViewTestCase(TestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 3)  # file1 has 3 downloads
+        self.assertEqual(len(response.data['results']), 3)  # file1 has 3 downloads
         
         # Verify the downloads belong to file1
-        download_ids = [d['id'] for d in response.data]
+        download_ids = [d['id'] for d in response.data['results']]
         self.assertIn(self.download1.id, download_ids)
         self.assertIn(self.download2.id, download_ids)
         self.assertIn(self.download3.id, download_ids)
@@ -116,7 +116,7 @@ class FileDownloadHistoryViewTestCase(TestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0)  # file2 has no downloads
+        self.assertEqual(len(response.data['results']), 0)  # file2 has no downloads
     
     def test_list_nonexistent_file_returns_404(self):
         """Test that requesting history for a nonexistent file returns 404"""
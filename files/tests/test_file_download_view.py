@@ -1,3 +1,5 @@
+import hashlib
+
 from django.test import TestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
@@ -76,6 +78,20 @@ class FileDownloadViewTestCase(TestCase):
         self.assertEqual(response['Content-Type'], 'text/plain')
         self.assertEqual(response['Content-Length'], str(len(self.test_file_content)))
     
+    def test_file_name_is_escaped(self):
+        """Test that quotes and non-ASCII characters in the file name cannot break the header"""
+        self.file_obj.name = 'Q3 "final" résumé.txt'
+        self.file_obj.save()
+        self.client.login(username='testuser1', password='testpass123')
+
+        response = self.client.get(reverse('file-download', kwargs={'file_id': self.file_obj.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response['Content-Disposition'],
+            "attachment; filename*=utf-8''Q3%20%22final%22%20r%C3%A9sum%C3%A9.txt"
+        )
+
     def test_file_download_creates_download_record(self):
         """Test that downloading a file creates a Download record"""
         # Ensure no downloads exist initially
@@ -213,3 +229,177 @@ class FileDownloadViewTestCase(TestCase):
         # Should fall back to application/octet-stream
         self.assertEqual(response['Content-Type'], 'application/octet-stream')
 
+
+class FileDownloadRangeTestCase(TestCase):
+    """Test cases for Range requests on FileDownloadView"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.content = b'0123456789abcdefghij'
+        self.file_obj = File.objects.create(
+            organization=self.org,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile(name='range.txt', content=self.content, content_type='text/plain'),
+            name='range.txt',
+            file_size=len(self.content),
+            content_type='text/plain'
+        )
+        self.url = reverse('file-download', kwargs={'file_id': self.file_obj.id})
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+
+    def test_full_download_advertises_ranges(self):
+        """Test that a plain GET advertises byte-range support"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('Last-Modified', response)
+
+    def test_single_range(self):
+        """Test that a single byte range returns 206 with the slice"""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], f'bytes 2-5/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '4')
+
+    def test_open_ended_range(self):
+        """Test that 'bytes=N-' returns everything from offset N"""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=15-')
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), b'fghij')
+
+    def test_suffix_range(self):
+        """Test that 'bytes=-N' returns the last N bytes"""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), b'hij')
+        self.assertEqual(response['Content-Range'], f'bytes 17-19/{len(self.content)}')
+
+    def test_multiple_ranges(self):
+        """Test that several ranges are returned as multipart/byteranges"""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-1,10-11')
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges; boundary='))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(len(body), int(response['Content-Length']))
+        self.assertIn(b'Content-Range: bytes 0-1/20\r\n\r\n01\r\n', body)
+        self.assertIn(b'Content-Range: bytes 10-11/20\r\n\r\nab\r\n', body)
+
+    def test_unsatisfiable_range(self):
+        """Test that a range past the end returns 416"""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-200')
+
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+        self.assertEqual(Download.objects.count(), 0)
+
+    def test_malformed_range_is_ignored(self):
+        """Test that an unparseable Range header falls back to the full file"""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=abc')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_stale_if_range_returns_full_file(self):
+        """Test that a non-matching If-Range validator ignores the Range header"""
+        response = self.client.get(
+            self.url,
+            HTTP_RANGE='bytes=2-5',
+            HTTP_IF_RANGE='Wed, 21 Oct 2015 07:28:00 GMT'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_matching_if_range_honours_range(self):
+        """Test that a matching If-Range validator keeps the partial response"""
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=last_modified)
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+
+    def test_resumed_download_is_recorded_once(self):
+        """Test that a download split into range requests creates one Download"""
+        self.client.get(self.url, HTTP_RANGE='bytes=0-9')
+        self.client.get(self.url, HTTP_RANGE='bytes=10-')
+
+        self.assertEqual(Download.objects.filter(file=self.file_obj).count(), 1)
+
+
+class FileDownloadConditionalTestCase(TestCase):
+    """Test cases for ETag / Last-Modified revalidation on FileDownloadView"""
+
+    def setUp(self):
+        """Upload a file through the API so its checksum is recorded"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+        self.content = b'Conditional content'
+        upload_url = reverse('organization-file-list-create', kwargs={'org_id': self.org.id})
+        self.client.post(upload_url, {
+            'name': 'conditional.txt',
+            'file': SimpleUploadedFile('conditional.txt', self.content, content_type='text/plain'),
+        }, format='multipart')
+        self.file_obj = File.objects.get(name='conditional.txt')
+        self.url = reverse('file-download', kwargs={'file_id': self.file_obj.id})
+
+    def test_upload_records_checksum(self):
+        """Test that the upload stores the SHA-256 of its content"""
+        self.assertEqual(self.file_obj.checksum, hashlib.sha256(self.content).hexdigest())
+
+    def test_download_sends_etag(self):
+        """Test that downloads carry a strong ETag built from the checksum"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], f'"{self.file_obj.checksum}"')
+        self.assertIn('Last-Modified', response)
+
+    def test_if_none_match_returns_304(self):
+        """Test that a matching If-None-Match returns 304 without a body or Download"""
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.file_obj.checksum}"')
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], f'"{self.file_obj.checksum}"')
+        self.assertEqual(Download.objects.count(), 0)
+
+    def test_if_none_match_mismatch_returns_file(self):
+        """Test that a stale If-None-Match gets the full file"""
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_if_modified_since_returns_304(self):
+        """Test that If-Modified-Since at or after Last-Modified returns 304"""
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_range_with_etag(self):
+        """Test that If-Range accepts the strong ETag"""
+        response = self.client.get(
+            self.url,
+            HTTP_RANGE='bytes=0-3',
+            HTTP_IF_RANGE=f'"{self.file_obj.checksum}"'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), self.content[:4])
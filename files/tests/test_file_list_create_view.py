@@ -1,9 +1,15 @@
+import hashlib
+import os
+
 from django.test import TestCase
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
+from files.delivery import open_content
 from files.models import User, Organization, File, Download
+from files.uploadhandlers import INCOMING_DIR
 
 
 class FileListCreateViewTestCase(TestCase):
@@ -59,10 +65,10 @@ class FileListCreateViewTestCase(TestCase):
         
         # Assert response
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
         # FileUploadSerializer only has 'name' and 'file' fields
-        self.assertEqual(response.data[0]['name'], 'existing_file.txt')
-        self.assertIn('file', response.data[0])  # file field contains the file URL
+        self.assertEqual(response.data['results'][0]['name'], 'existing_file.txt')
+        self.assertIn('file', response.data['results'][0])  # file field contains the file URL
     
     def test_list_files_unauthenticated(self):
         """Test that unauthenticated users cannot list files"""
@@ -103,8 +109,8 @@ class FileListCreateViewTestCase(TestCase):
         
         # Should only see org1 files
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['name'], 'existing_file.txt')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['name'], 'existing_file.txt')
         
         # List files for org2
         url = reverse('organization-file-list-create', kwargs={'org_id': self.org2.id})
@@ -112,8 +118,8 @@ class FileListCreateViewTestCase(TestCase):
         
         # Should only see org2 files
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['name'], 'org2_file.txt')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['name'], 'org2_file.txt')
     
     def test_upload_file_to_own_organization(self):
         """Test that users can upload files to their own organization"""
@@ -262,3 +268,63 @@ class FileListCreateViewTestCase(TestCase):
         final_count = File.objects.filter(organization=self.org1).count()
         self.assertEqual(final_count, initial_count + 2)
 
+
+class FileUploadHandlerTestCase(TestCase):
+    """Test cases for the single-pass BlobUploadHandler used by FileListCreateView"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+        self.url = reverse('organization-file-list-create', kwargs={'org_id': self.org.id})
+
+    def upload(self, name, content, content_type):
+        response = self.client.post(self.url, {
+            'name': name,
+            'file': SimpleUploadedFile(name, content, content_type=content_type),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return File.objects.get(name=name)
+
+    def test_content_type_is_sniffed_from_bytes(self):
+        """Test that a binary signature overrides the client's claimed type"""
+        png = b'\x89PNG\r\n\x1a\n' + b'\x00' * 32
+        uploaded = self.upload('image.txt', png, 'text/plain')
+
+        self.assertEqual(uploaded.content_type, 'image/png')
+
+    def test_text_keeps_claimed_textual_type(self):
+        """Test that a textual claim is kept for content that is text"""
+        uploaded = self.upload('data.csv', b'a,b\n1,2\n', 'text/csv')
+
+        self.assertEqual(uploaded.content_type, 'text/csv')
+
+    def test_binary_claimed_as_text_is_not_trusted(self):
+        """Test that unrecognised binary content is not labelled as text"""
+        uploaded = self.upload('blob.txt', b'\x00\x01\x02\x03binary', 'text/plain')
+
+        self.assertEqual(uploaded.content_type, 'application/octet-stream')
+
+    def test_size_and_checksum_come_from_received_bytes(self):
+        """Test that size and checksum are measured while streaming"""
+        content = b'x' * 100000
+        uploaded = self.upload('big.bin', content, 'application/octet-stream')
+
+        self.assertEqual(uploaded.file_size, len(content))
+        self.assertEqual(uploaded.checksum, hashlib.sha256(content).hexdigest())
+        with open_content(uploaded) as handle:
+            self.assertEqual(handle.read(), content)
+
+    def test_incoming_area_is_left_empty(self):
+        """Test that nothing is left in the incoming area after new and duplicate uploads"""
+        self.upload('one.bin', b'same bytes', 'application/octet-stream')
+        self.upload('two.bin', b'same bytes', 'application/octet-stream')
+
+        incoming = default_storage.path(INCOMING_DIR)
+        self.assertEqual(os.listdir(incoming), [])
@@ -0,0 +1,141 @@
+import os
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Sum
+from django.test import TestCase
+from files.models import Blob, Download, File, FileDownloadCounter, Organization, OrganizationDownloadCounter, User
+from files.seeding import ZipfSampler, generate_dataset
+
+
+class GenerateDatasetTestCase(TestCase):
+    """Test cases for the synthetic data generator"""
+
+    END = datetime(2025, 6, 1, tzinfo=dt_timezone.utc)
+
+    def generate(self, **options):
+        arguments = dict(organizations=3, users=6, files=40, downloads=500, blobs=4, blob_size=1024, end=self.END)
+        arguments.update(options)
+        return generate_dataset(**arguments)
+
+    def snapshot(self):
+        files = list(File.objects.order_by('id').values_list(
+            'name', 'organization__name', 'uploaded_by__username', 'checksum', 'uploaded_at'
+        ))
+        downloads = list(Download.objects.order_by('id').values_list(
+            'file__name', 'downloaded_by__username', 'downloaded_at'
+        ))
+        return files, downloads
+
+    def wipe(self):
+        Download.objects.all().delete()
+        FileDownloadCounter.objects.all().delete()
+        File.objects.all().delete()
+        Blob.objects.all().delete()
+        User.objects.all().delete()
+        Organization.objects.all().delete()
+
+    def test_volumes(self):
+        """Test that the requested numbers of rows are created and counted"""
+        ids = self.generate()
+
+        self.assertEqual(len(ids['file_ids']), 40)
+        self.assertEqual(File.objects.count(), 40)
+        self.assertEqual(Download.objects.count(), 500)
+        self.assertEqual(FileDownloadCounter.objects.aggregate(total=Sum('count'))['total'], 500)
+        self.assertEqual(Blob.objects.count(), 4)
+        self.assertEqual(Blob.objects.aggregate(total=Sum('ref_count'))['total'], 40)
+
+    def test_existing_counters_are_left_alone(self):
+        """Test that generating a dataset only writes counters for its own files"""
+        first = self.generate(seed=1)
+        FileDownloadCounter.objects.filter(file_id=first['file_ids'][0]).update(count=1000)
+        before = list(FileDownloadCounter.objects.order_by('file_id', 'shard').values_list('file_id', 'shard', 'count'))
+
+        second = self.generate(seed=2)
+
+        self.assertEqual(
+            list(FileDownloadCounter.objects.filter(file_id__in=first['file_ids'])
+                 .order_by('file_id', 'shard').values_list('file_id', 'shard', 'count')),
+            before
+        )
+        self.assertEqual(
+            OrganizationDownloadCounter.objects.filter(organization_id__in=second['organization_ids'])
+            .aggregate(total=Sum('count'))['total'],
+            500
+        )
+
+    def test_deterministic(self):
+        """Test that the same seed produces the same data"""
+        self.generate(seed=7)
+        first = self.snapshot()
+        self.wipe()
+        self.generate(seed=7)
+
+        self.assertEqual(self.snapshot(), first)
+
+    def test_same_seed_twice_is_rejected(self):
+        """Test that a dataset cannot be generated twice for one seed"""
+        self.generate(seed=3)
+
+        with self.assertRaises(ValueError):
+            self.generate(seed=3)
+
+    def test_downloads_are_skewed(self):
+        """Test that a few hot files get most of the downloads"""
+        self.generate(files=100, downloads=5000)
+        counts = sorted(Counter(Download.objects.values_list('file_id', flat=True)).values(), reverse=True)
+
+        self.assertGreater(sum(counts[:10]), 5000 // 2)
+
+    def test_timestamps_follow_ids(self):
+        """Test that downloads fall inside the window in id order"""
+        self.generate(days=10)
+        timestamps = list(Download.objects.order_by('id').values_list('downloaded_at', flat=True))
+
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertGreaterEqual(timestamps[0], self.END - timedelta(days=10))
+        self.assertLess(timestamps[-1], self.END)
+        self.assertLess(File.objects.latest('uploaded_at').uploaded_at, timestamps[0])
+
+    def test_real_blobs(self):
+        """Test that real blobs hold their full content"""
+        self.generate()
+        blob = Blob.objects.first()
+
+        with blob.file.open('rb') as handle:
+            self.assertEqual(len(handle.read()), 1024)
+
+    def test_sparse_blobs(self):
+        """Test that sparse blobs have the full size but no allocated data"""
+        self.generate(blob_size=8 * 1024 * 1024, sparse=True, blobs=1)
+        path = default_storage.path(Blob.objects.get().file.name)
+
+        self.assertEqual(os.path.getsize(path), 8 * 1024 * 1024)
+        self.assertLess(os.stat(path).st_blocks * 512, 1024 * 1024)
+
+    def test_zipf_sampler(self):
+        """Test that rank 0 is the most likely draw"""
+        sample = ZipfSampler(50, 1.1, random.Random(1))
+        draws = Counter(sample() for _ in range(2000))
+
+        self.assertEqual(draws.most_common(1)[0][0], 0)
+        self.assertTrue(all(0 <= rank < 50 for rank in draws))
+
+    def test_management_command(self):
+        """Test the generate_data command"""
+        out = StringIO()
+        call_command(
+            'generate_data', '--organizations', '2', '--users', '4', '--files', '10', '--downloads', '50',
+            '--blobs', '2', '--blob-size', '128', '--end', '2025-06-01', stdout=out
+        )
+
+        self.assertEqual(Download.objects.count(), 50)
+        self.assertIn('Generated dataset 0', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('generate_data', '--files', '1', '--downloads', '1', stdout=StringIO())
@@ -76,10 +76,10 @@ class GlobalFileListViewTestCase(TestCase):
         
         # Assert response
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
         
         # Check that both files are in the response
-        file_names = [file['name'] for file in response.data]
+        file_names = [file['name'] for file in response.data['results']]
         self.assertIn('file1.txt', file_names)
         self.assertIn('file2.txt', file_names)
     
@@ -106,11 +106,11 @@ class GlobalFileListViewTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         
         # Find file1 in the response
-        file1_data = next((f for f in response.data if f['id'] == self.file1.id), None)
+        file1_data = next((f for f in response.data['results'] if f['id'] == self.file1.id), None)
         self.assertIsNotNone(file1_data)
         self.assertEqual(file1_data['download_count'], 2)  # file1 has 2 downloads
         
         # Find file2 in the response
-        file2_data = next((f for f in response.data if f['id'] == self.file2.id), None)
+        file2_data = next((f for f in response.data['results'] if f['id'] == self.file2.id), None)
         self.assertIsNotNone(file2_data)
         self.assertEqual(file2_data['download_count'], 0)  # file2 has no downloads
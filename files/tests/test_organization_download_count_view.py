@@ -96,8 +96,20 @@ class OrganizationListViewTestCase(TestCase):
         
         # Assert response
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 3)  # All 3 organizations
+        self.assertEqual(len(response.data['results']), 3)  # All 3 organizations
     
+    def test_list_organizations_is_paginated(self):
+        """Test that organizations are listed in pages ordered by id"""
+        self.client.login(username='testuser1', password='testpass123')
+
+        response = self.client.get(reverse('organizations-list'), {'page_size': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([o['id'] for o in response.data['results']], [self.org1.id, self.org2.id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([o['id'] for o in response.data['results']], [self.org3.id])
+        self.assertIsNone(response.data['next'])
+
     def test_list_organizations_unauthenticated(self):
         """Test that unauthenticated users cannot list organizations"""
         # Do not authenticate
@@ -121,9 +133,9 @@ class OrganizationListViewTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         
         # Find organizations in the response
-        org1_data = next((o for o in response.data if o['id'] == self.org1.id), None)
-        org2_data = next((o for o in response.data if o['id'] == self.org2.id), None)
-        org3_data = next((o for o in response.data if o['id'] == self.org3.id), None)
+        org1_data = next((o for o in response.data['results'] if o['id'] == self.org1.id), None)
+        org2_data = next((o for o in response.data['results'] if o['id'] == self.org2.id), None)
+        org3_data = next((o for o in response.data['results'] if o['id'] == self.org3.id), None)
         
         self.assertIsNotNone(org1_data)
         self.assertEqual(org1_data['total_downloads'], 3)  # 2 for file1 + 1 for file2
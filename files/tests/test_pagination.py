@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.models import User, Organization, File, Download
+
+
+class KeysetPaginationTestCase(TestCase):
+    """Test cases for keyset pagination on the list and history endpoints"""
+
+    def setUp(self):
+        """Set up test data, with many rows sharing a timestamp"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.file_obj = File.objects.create(
+            organization=self.org,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile(name='paged.txt', content=b'paged', content_type='text/plain'),
+            name='paged.txt',
+            file_size=5,
+            content_type='text/plain'
+        )
+        now = timezone.now()
+        Download.objects.bulk_create([
+            Download(file=self.file_obj, downloaded_by=self.user, downloaded_at=now - timedelta(seconds=i // 5))
+            for i in range(23)
+        ])
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+        self.url = reverse('file-download-history', kwargs={'file_id': self.file_obj.id})
+
+    def walk(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data)
+            url = response.data['next']
+        return pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        """Test that following next links returns each row exactly once, newest first"""
+        pages = self.walk(f'{self.url}?page_size=10')
+
+        self.assertEqual([len(page['results']) for page in pages], [10, 10, 3])
+        seen = [row['id'] for page in pages for row in page['results']]
+        expected = list(
+            Download.objects.filter(file=self.file_obj)
+            .order_by('-downloaded_at', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_previous_link_returns_preceding_page(self):
+        """Test that the previous link of page two is page one"""
+        first = self.client.get(f'{self.url}?page_size=10').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+
+        self.assertIsNone(first['previous'])
+        self.assertEqual([row['id'] for row in back['results']], [row['id'] for row in first['results']])
+
+    def test_page_size_is_capped(self):
+        """Test that page_size cannot exceed API_MAX_PAGE_SIZE"""
+        with self.settings(API_MAX_PAGE_SIZE=5):
+            response = self.client.get(f'{self.url}?page_size=500')
+
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_no_count_query(self):
+        """Test that paginating never counts the whole table"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'{self.url}?page_size=10')
+
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in queries.captured_queries))
+
+    def test_invalid_cursor_returns_404(self):
+        """Test that a tampered cursor is rejected"""
+        response = self.client.get(f'{self.url}?cursor=not-a-cursor')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_global_file_list_is_paginated(self):
+        """Test that the global file list uses the same envelope"""
+        response = self.client.get(reverse('global-file-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {'next', 'previous', 'results'})
+        self.assertIsNone(response.data['next'])
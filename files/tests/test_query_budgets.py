@@ -0,0 +1,89 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from files.models import User, Organization, File, Download, FileDownloadCounter
+from files.tests.query_budget import QueryBudgetMixin
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """Test cases that every list endpoint runs a constant number of queries"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.file_obj = self.add_files(1)[0]
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+
+    def add_files(self, count):
+        """Bulk-create ``count`` files, each with a download counter shard"""
+        start = File.objects.count()
+        files = File.objects.bulk_create([
+            File(
+                organization=self.org,
+                uploaded_by=self.user,
+                file=f'uploads/budget-{i}.txt',
+                name=f'budget-{i}.txt',
+                file_size=1,
+                content_type='text/plain'
+            )
+            for i in range(start, start + count)
+        ])
+        FileDownloadCounter.objects.bulk_create([FileDownloadCounter(file=f, shard=0, count=1) for f in files])
+        return files
+
+    def ensure_files(self, size):
+        self.add_files(max(size - File.objects.count(), 0))
+
+    def ensure_organizations(self, size):
+        start = Organization.objects.count()
+        Organization.objects.bulk_create([Organization(name=f'Budget Org {i}') for i in range(start, size)])
+
+    def ensure_user_downloads(self, size):
+        # Every download is of a different file, so nested file data cannot be shared between rows.
+        missing = size - Download.objects.filter(downloaded_by=self.user).count()
+        if missing > 0:
+            Download.objects.bulk_create([
+                Download(file=file_object, downloaded_by=self.user) for file_object in self.add_files(missing)
+            ])
+
+    def ensure_file_downloads(self, size):
+        missing = size - Download.objects.filter(file=self.file_obj).count()
+        if missing <= 0:
+            return
+        start = User.objects.count()
+        users = User.objects.bulk_create([
+            User(username=f'budget-user{i}', organization=self.org) for i in range(start, start + missing)
+        ])
+        Download.objects.bulk_create([Download(file=self.file_obj, downloaded_by=user) for user in users])
+
+    def test_global_file_list(self):
+        """Test the query budget of GET /api/v1/files/"""
+        # Session, user, files with their download counts.
+        self.assertQueryBudget(reverse('global-file-list'), 3, self.ensure_files)
+
+    def test_organization_file_list(self):
+        """Test the query budget of GET /api/v1/organizations/<org_id>/files/"""
+        url = reverse('organization-file-list-create', kwargs={'org_id': self.org.id})
+        self.assertQueryBudget(url, 3, self.ensure_files)
+
+    def test_organization_list(self):
+        """Test the query budget of GET /api/v1/organizations/"""
+        self.assertQueryBudget(reverse('organizations-list'), 3, self.ensure_organizations)
+
+    def test_user_download_history(self):
+        """Test the query budget of GET /api/v1/users/<user_id>/downloads/"""
+        # Session, user, user lookup, downloads with their files and the files' download counts.
+        url = reverse('user-download-history', kwargs={'user_id': self.user.id})
+        self.assertQueryBudget(url, 4, self.ensure_user_downloads)
+
+    def test_file_download_history(self):
+        """Test the query budget of GET /api/v1/files/<file_id>/downloads/"""
+        # Session, user, file lookup, downloads with their users and organizations.
+        url = reverse('file-download-history', kwargs={'file_id': self.file_obj.id})
+        self.assertQueryBudget(url, 4, self.ensure_file_downloads)
@@ -0,0 +1,132 @@
+import json
+import unittest
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.models import User, Organization, File, Download
+
+
+# Tables that grow without bound; a query on them must never scan or sort the whole table.
+LARGE_TABLES = {File._meta.db_table, Download._meta.db_table}
+
+
+def _postgresql_problems(plan, problems, under_sort=False):
+    node_type = plan['Node Type']
+    relation = plan.get('Relation Name')
+    if relation in LARGE_TABLES:
+        if node_type == 'Seq Scan':
+            problems.append(f'sequential scan on {relation}')
+        if under_sort:
+            problems.append(f'sort over {relation}')
+    for child in plan.get('Plans', []):
+        _postgresql_problems(child, problems, under_sort or node_type in ('Sort', 'Incremental Sort'))
+    return problems
+
+
+def explain_problems(sql):
+    """
+    Plan problems (full scans or sorts on a large table) for one captured query.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return _postgresql_problems(plan[0]['Plan'], [])
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        problems = []
+        for *_, detail in cursor.fetchall():
+            words = detail.split()
+            if words[:1] == ['SCAN'] and words[1] in LARGE_TABLES and 'USING' not in words:
+                problems.append(f'full scan on {words[1]}')
+            if detail.startswith('USE TEMP B-TREE FOR') and 'ORDER BY' in detail:
+                problems.append('sort')
+        return problems
+
+
+@unittest.skipUnless(connection.vendor in ('postgresql', 'sqlite'), 'EXPLAIN parsing is backend specific')
+class QueryPlanTestCase(TestCase):
+    """Test cases that guard the access paths of the list and history endpoints"""
+
+    # A dashboard-sized page; with the default the planner may reasonably prefer a hash join.
+    PAGE_SIZE = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed enough rows for the planner to prefer the indexes"""
+        cls.orgs = Organization.objects.bulk_create([Organization(name=f'Org {i}') for i in range(10)])
+        cls.users = User.objects.bulk_create([
+            User(username=f'user{i}', organization=cls.orgs[i % 10]) for i in range(20)
+        ])
+        cls.user = cls.users[0]
+        cls.user.set_password('testpass123')
+        cls.user.save()
+        files = File.objects.bulk_create([
+            File(
+                organization=cls.orgs[i % 10],
+                uploaded_by=cls.users[i % 20],
+                file=f'uploads/seed-{i}.txt',
+                name=f'seed-{i}.txt',
+                file_size=1,
+                content_type='text/plain'
+            )
+            for i in range(5000)
+        ])
+        now = timezone.now()
+        Download.objects.bulk_create([
+            Download(
+                file=files[i % 500],
+                downloaded_by=cls.users[i % 20],
+                downloaded_at=now - timedelta(seconds=i)
+            )
+            for i in range(40000)
+        ], batch_size=5000)
+        cls.file_obj = files[0]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        """Log in"""
+        self.client = APIClient()
+        self.client.login(username='user0', password='testpass123')
+
+    def assert_plans_use_indexes(self, url):
+        """Explain every query an endpoint runs, for its first and second page"""
+        params = {'page_size': self.PAGE_SIZE}
+        for page in ('first', 'second'):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or not any(table in sql for table in LARGE_TABLES):
+                    continue
+                with self.subTest(url=url, page=page, sql=sql):
+                    self.assertEqual(explain_problems(sql), [])
+            params['cursor'] = response.data['next'].split('cursor=')[1].split('&')[0]
+
+    def test_organization_file_list(self):
+        """Test that an organization's files are read from the (organization, uploaded_at) index"""
+        self.assert_plans_use_indexes(
+            reverse('organization-file-list-create', kwargs={'org_id': self.user.organization_id})
+        )
+
+    def test_global_file_list(self):
+        """Test that the global file list is read from the uploaded_at index"""
+        self.assert_plans_use_indexes(reverse('global-file-list'))
+
+    def test_user_download_history(self):
+        """Test that a user's history is read from the (user, downloaded_at) index"""
+        self.assert_plans_use_indexes(reverse('user-download-history', kwargs={'user_id': self.user.id}))
+
+    def test_file_download_history(self):
+        """Test that a file's history is read from the (file, downloaded_at) index"""
+        self.assert_plans_use_indexes(reverse('file-download-history', kwargs={'file_id': self.file_obj.id}))
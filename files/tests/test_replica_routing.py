@@ -0,0 +1,204 @@
+import os
+import tempfile
+from contextlib import ExitStack
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.middleware import PIN_COOKIE
+from files.links import sign_download
+from files.models import User, Organization, File, Download
+from files.routers import ReplicaRouter, begin_request, current_state, end_request
+
+
+# A cache every worker shares, like Redis.
+SHARED_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'files-replica-routing-tests'),
+}}
+
+
+class ReplicaRouterTestCase(SimpleTestCase):
+    """Test cases for ReplicaRouter"""
+
+    def setUp(self):
+        """Set up a routing state as the middleware would"""
+        self.router = ReplicaRouter()
+        self.token = begin_request()
+        self.addCleanup(lambda: end_request(self.token))
+
+    def test_outside_a_request(self):
+        """Test that code outside a request is left to the default routing"""
+        current_state().replica = 'replica1'
+        end_request(self.token)
+
+        self.assertIsNone(current_state())
+        self.assertIsNone(self.router.db_for_read(File))
+        self.assertEqual(self.router.db_for_write(File), 'default')
+        self.token = begin_request()
+
+    def test_reads_go_to_the_chosen_replica(self):
+        """Test that reads use the replica chosen for the view"""
+        self.assertIsNone(self.router.db_for_read(File))
+        current_state().replica = 'replica1'
+
+        self.assertEqual(self.router.db_for_read(File), 'replica1')
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        """Test that a write pins the rest of the request to the primary"""
+        current_state().replica = 'replica1'
+
+        self.assertEqual(self.router.db_for_write(File), 'default')
+        self.assertIsNone(self.router.db_for_read(File))
+
+    def test_pinned_client(self):
+        """Test that a pinned request never reads from a replica"""
+        end_request(self.token)
+        self.token = begin_request(pinned=True)
+        current_state().replica = 'replica1'
+
+        self.assertIsNone(self.router.db_for_read(File))
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_no_migrations_on_replicas(self):
+        """Test that replicas are left to replication"""
+        self.assertFalse(self.router.allow_migrate('replica1', 'files'))
+        self.assertIsNone(self.router.allow_migrate('default', 'files'))
+
+
+class PrimaryPinningTestCase(TestCase):
+    """Test cases for PrimaryPinningMiddleware and the replica-read views"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.client = APIClient()
+        self.client.force_login(self.user)
+        self.client.cookies.pop(PIN_COOKIE, None)
+        # The replica "is" the primary here, so only the choice of it can be observed.
+        patcher = mock.patch('files.routers.choose_replica', return_value='default')
+        self.choose_replica = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_read_only_views_use_a_replica(self):
+        """Test that the list and history views ask for a replica"""
+        file_obj = File.objects.create(
+            organization=self.org, uploaded_by=self.user, file='uploads/a.txt', name='a.txt'
+        )
+        urls = [
+            reverse('global-file-list'),
+            reverse('organizations-list'),
+            reverse('user-download-history', kwargs={'user_id': self.user.id}),
+            reverse('file-download-history', kwargs={'file_id': file_obj.id}),
+        ]
+        for url in urls:
+            self.choose_replica.reset_mock()
+            response = self.client.get(url)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(self.choose_replica.call_count, 1, url)
+            self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_pins_the_client(self):
+        """Test that a write sets the pin cookie and later reads skip the replicas"""
+        response = self.client.post(reverse('organization-file-list-create', kwargs={'org_id': self.org.id}), {
+            'name': 'new.txt',
+            'file': SimpleUploadedFile('new.txt', b'new content', content_type='text/plain'),
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.DATABASE_REPLICA_PIN_SECONDS)
+
+        response = self.client.get(reverse('global-file-list'))
+        self.assertEqual([item['name'] for item in response.data['results']], ['new.txt'])
+        self.choose_replica.assert_not_called()
+
+    def test_public_responses_are_not_pinned(self):
+        """Test that a signed-link download records the download without setting the pin cookie"""
+        file_obj = File.objects.create(
+            organization=self.org,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile('a.txt', b'shared', content_type='text/plain'),
+            name='a.txt'
+        )
+        token, _ = sign_download(file_obj, self.user)
+
+        response = APIClient().get(reverse('file-signed-download', kwargs={'token': token}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertEqual(Download.objects.filter(file=file_obj).count(), 1)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    @override_settings(API_CACHE_TIMEOUT=300, DATABASE_REPLICA_PIN_SECONDS=10, CACHES=SHARED_CACHE)
+    def test_replica_results_are_cached_briefly(self):
+        """Test that a cached response read from a replica expires with the pin"""
+        with mock.patch('django.core.cache.backends.filebased.FileBasedCache.set') as cache_set:
+            self.client.get(reverse('global-file-list'))
+
+        self.assertEqual(cache_set.call_args.args[2], 10)
+
+    def test_unpinned_after_the_cookie_expires(self):
+        """Test that a client without the cookie reads from a replica again"""
+        self.client.cookies[PIN_COOKIE] = '1'
+        self.client.get(reverse('global-file-list'))
+        self.choose_replica.assert_not_called()
+
+        del self.client.cookies[PIN_COOKIE]
+        self.client.get(reverse('global-file-list'))
+        self.choose_replica.assert_called_once()
+
+
+@skipUnless(settings.DATABASE_REPLICAS, 'Needs POSTGRES_REPLICA_HOSTS')
+class ReplicaIntegrationTestCase(TransactionTestCase):
+    """Test cases for routing against the configured replicas"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        File.objects.create(organization=self.org, uploaded_by=self.user, file='uploads/a.txt', name='a.txt')
+        self.client = APIClient()
+        self.client.force_login(self.user)
+        self.client.cookies.pop(PIN_COOKIE, None)
+
+    def replica_queries(self, url):
+        with ExitStack() as stack:
+            replicas = [
+                stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in settings.DATABASE_REPLICAS
+            ]
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, sum(len(context) for context in replicas)
+
+    def test_list_reads_from_a_replica(self):
+        """Test that a listing queries a replica and pins after a write"""
+        response, queries = self.replica_queries(reverse('global-file-list'))
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertGreater(queries, 0)
+
+        self.client.post(reverse('organization-file-list-create', kwargs={'org_id': self.org.id}), {
+            'name': 'new.txt',
+            'file': SimpleUploadedFile('new.txt', b'new content', content_type='text/plain'),
+        }, format='multipart')
+
+        response, queries = self.replica_queries(reverse('global-file-list'))
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(queries, 0)
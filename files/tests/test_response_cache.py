@@ -0,0 +1,148 @@
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.caching import GENERATION_KEY, organization_version_key, read_version
+from files.models import User, Organization, File, Download
+from files.sinks import DownloadEvent, write_download_events
+
+
+# A cache every worker shares, like Redis.
+SHARED_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'files-response-cache-tests'),
+}}
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class ResponseCacheTestCase(TestCase):
+    """Test cases for cached list responses and their invalidation"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.other_org = Organization.objects.create(name='Globex Industries')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.file_obj = self.create_file(self.org, 'cached.txt')
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+
+    def create_file(self, organization, name):
+        return File.objects.create(
+            organization=organization,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile(name=name, content=b'cached', content_type='text/plain'),
+            name=name,
+            file_size=6,
+            content_type='text/plain'
+        )
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(queries)
+
+    def test_repeat_requests_are_served_from_cache(self):
+        """Test that a repeated listing runs no list queries"""
+        url = reverse('global-file-list')
+        first, uncached_queries = self.get(url)
+        second, cached_queries = self.get(url)
+
+        self.assertEqual(second.data, first.data)
+        self.assertLess(cached_queries, uncached_queries)
+
+    def test_download_invalidates_global_listings(self):
+        """Test that a download shows up in cached counts immediately"""
+        files_url, organizations_url = reverse('global-file-list'), reverse('organizations-list')
+        self.get(files_url)
+        self.get(organizations_url)
+
+        self.client.get(reverse('file-download', kwargs={'file_id': self.file_obj.id}))
+
+        response, _ = self.get(files_url)
+        self.assertEqual(response.data['results'][0]['download_count'], 1)
+        response, _ = self.get(organizations_url)
+        totals = {org['name']: org['total_downloads'] for org in response.data['results']}
+        self.assertEqual(totals['Acme Corp'], 1)
+
+    def test_batched_downloads_invalidate(self):
+        """Test that downloads written by the sink bump the generation"""
+        before = read_version(GENERATION_KEY)
+
+        write_download_events([DownloadEvent(self.file_obj.id, self.user.id, self.file_obj.uploaded_at)])
+
+        self.assertGreater(read_version(GENERATION_KEY), before)
+
+    def test_upload_invalidates_only_its_organization(self):
+        """Test that a new file bumps its organization's version and no other"""
+        org_version = read_version(organization_version_key(self.org.id))
+        other_version = read_version(organization_version_key(self.other_org.id))
+        url = reverse('organization-file-list-create', kwargs={'org_id': self.org.id})
+        self.get(url)
+
+        response = self.client.post(url, {
+            'name': 'new.txt',
+            'file': SimpleUploadedFile('new.txt', b'new content', content_type='text/plain'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertGreater(read_version(organization_version_key(self.org.id)), org_version)
+        self.assertEqual(read_version(organization_version_key(self.other_org.id)), other_version)
+        response, _ = self.get(url)
+        self.assertEqual({item['name'] for item in response.data['results']}, {'cached.txt', 'new.txt'})
+
+    def test_deleting_a_file_invalidates(self):
+        """Test that deleted files disappear from cached listings"""
+        url = reverse('global-file-list')
+        self.get(url)
+
+        self.file_obj.delete()
+
+        response, _ = self.get(url)
+        self.assertEqual(response.data['results'], [])
+
+    def test_evicted_version_does_not_revive_old_entries(self):
+        """Test that a version key recreated after eviction never matches an older one"""
+        url = reverse('global-file-list')
+        self.get(url)
+        old_version = read_version(GENERATION_KEY)
+        cache.delete(GENERATION_KEY)
+        Download.objects.bulk_create([Download(file=self.file_obj, downloaded_by=self.user)])
+
+        self.assertNotEqual(read_version(GENERATION_KEY), old_version)
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_process_local_cache_is_bypassed(self):
+        """Test that lists are not cached in a cache the other workers cannot invalidate"""
+        url = reverse('global-file-list')
+
+        _, first_queries = self.get(url)
+        _, second_queries = self.get(url)
+
+        self.assertEqual(second_queries, first_queries)
+
+    def test_pages_are_cached_separately(self):
+        """Test that the query string is part of the key"""
+        self.create_file(self.org, 'second.txt')
+        url = reverse('global-file-list')
+
+        first, _ = self.get(url + '?page_size=1')
+        everything, _ = self.get(url)
+
+        self.assertEqual(len(first.data['results']), 1)
+        self.assertEqual(len(everything.data['results']), 2)
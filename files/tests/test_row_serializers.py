@@ -0,0 +1,105 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.counters import file_download_count
+from files.models import User, Organization, File, Download, FileDownloadCounter
+from files.serializers import FileDetailSerializer, FileDownloadSerializer, UserDownloadSerializer
+
+
+class RowSerializerParityTestCase(TestCase):
+    """Test cases that the values() fast path renders exactly what the serializers render"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.other_org = Organization.objects.create(name='Globex "Industries" å')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            email='testuser1@example.com',
+            organization=self.org
+        )
+        # No organization and no email: nullable and blank values must match too.
+        self.loner = User.objects.create_user(username='loner', password='testpass123')
+        self.files = [
+            File.objects.create(
+                organization=self.org,
+                uploaded_by=self.user,
+                file='uploads/report.pdf',
+                name='report.pdf',
+                file_size=2048,
+                content_type='application/pdf'
+            ),
+            File.objects.create(
+                organization=self.other_org,
+                uploaded_by=self.loner,
+                file='uploads/unknown',
+                name='näme with ☃',
+                file_size=None,
+                content_type=None
+            ),
+        ]
+        FileDownloadCounter.objects.create(file=self.files[0], shard=0, count=3)
+        timestamps = [
+            datetime(2025, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc),
+            datetime(2025, 1, 2, 3, 4, 5, 123456, tzinfo=dt_timezone.utc),
+        ]
+        for downloaded_at in timestamps:
+            for file_object in self.files:
+                for user in (self.user, self.loner):
+                    Download.objects.create(file=file_object, downloaded_by=user, downloaded_at=downloaded_at)
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+
+    def assertRendersLike(self, url, expected):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(JSONRenderer().render(response.data['results']), JSONRenderer().render(expected))
+
+    def test_global_file_list(self):
+        """Test that GET /api/v1/files/ matches FileDetailSerializer"""
+        files = (
+            File.objects.select_related('organization', 'uploaded_by')
+            .annotate(download_count=file_download_count())
+            .order_by('-uploaded_at', '-id')
+        )
+        self.assertRendersLike(reverse('global-file-list'), FileDetailSerializer(files, many=True).data)
+
+    def test_user_download_history(self):
+        """Test that GET /api/v1/users/<user_id>/downloads/ matches UserDownloadSerializer"""
+        for user in (self.user, self.loner):
+            downloads = (
+                Download.objects.filter(downloaded_by=user)
+                .select_related('file__organization', 'file__uploaded_by')
+                .annotate(file_download_count=file_download_count('file_id'))
+                .order_by('-downloaded_at', '-id')
+            )
+            url = reverse('user-download-history', kwargs={'user_id': user.id})
+            self.assertRendersLike(url, UserDownloadSerializer(downloads, many=True).data)
+
+    def test_file_download_history(self):
+        """Test that GET /api/v1/files/<file_id>/downloads/ matches FileDownloadSerializer"""
+        for file_object in self.files:
+            downloads = (
+                Download.objects.filter(file=file_object)
+                .select_related('downloaded_by__organization')
+                .order_by('-downloaded_at', '-id')
+            )
+            url = reverse('file-download-history', kwargs={'file_id': file_object.id})
+            self.assertRendersLike(url, FileDownloadSerializer(downloads, many=True).data)
+
+    def test_paging_through_rows(self):
+        """Test that cursors built from values() rows walk every row once"""
+        url = reverse('file-download-history', kwargs={'file_id': self.files[0].id}) + '?page_size=1'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        expected = Download.objects.filter(file=self.files[0]).order_by('-downloaded_at', '-id')
+        self.assertEqual(seen, list(expected.values_list('id', flat=True)))
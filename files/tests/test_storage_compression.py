@@ -0,0 +1,186 @@
+import gzip
+import io
+import zipfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.client import RequestFactory
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.compression import accepts_encoding
+from files.models import Blob, User, Organization, File
+
+
+TEXT = b'timestamp,level,message\n' + b'2024-01-01T00:00:00,INFO,service started\n' * 5000
+PNG = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 40
+
+
+class AcceptsEncodingTestCase(SimpleTestCase):
+    """Test cases for accepts_encoding"""
+
+    def accepts(self, header):
+        headers = {'HTTP_ACCEPT_ENCODING': header} if header is not None else {}
+        return accepts_encoding(RequestFactory().get('/', **headers), 'gzip')
+
+    def test_headers(self):
+        """Test that q-values and wildcards are honoured"""
+        self.assertTrue(self.accepts('gzip, deflate, br'))
+        self.assertTrue(self.accepts('br;q=1.0, gzip;q=0.8'))
+        self.assertTrue(self.accepts('*'))
+        self.assertFalse(self.accepts('gzip;q=0'))
+        self.assertFalse(self.accepts('*;q=0.5, gzip;q=0'))
+        self.assertFalse(self.accepts('br, identity'))
+        self.assertFalse(self.accepts(None))
+
+
+class StorageCompressionTestCase(TestCase):
+    """Test cases for compressed storage and Content-Encoding downloads"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+
+    def upload(self, name, content, content_type):
+        response = self.client.post(reverse('organization-file-list-create', kwargs={'org_id': self.org.id}), {
+            'name': name,
+            'file': SimpleUploadedFile(name, content, content_type=content_type),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return File.objects.get(name=name)
+
+    def download(self, file_object, **headers):
+        return self.client.get(reverse('file-download', kwargs={'file_id': file_object.id}), **headers)
+
+    def test_text_is_stored_compressed(self):
+        """Test that textual uploads are stored gzip-encoded with their original size and checksum"""
+        uploaded = self.upload('log.csv', TEXT, 'text/csv')
+
+        self.assertEqual(uploaded.content_encoding, 'gzip')
+        self.assertEqual(uploaded.file_size, len(TEXT))
+        self.assertLess(uploaded.stored_size, len(TEXT) // 10)
+        with uploaded.file.open('rb') as handle:
+            stored = handle.read()
+        self.assertEqual(len(stored), uploaded.stored_size)
+        self.assertEqual(gzip.decompress(stored), TEXT)
+        self.assertEqual(uploaded.blob.content_encoding, 'gzip')
+        self.assertEqual(uploaded.blob.stored_size, uploaded.stored_size)
+
+    def test_compressed_formats_are_stored_as_is(self):
+        """Test that images are not encoded again"""
+        uploaded = self.upload('image.png', PNG, 'image/png')
+
+        self.assertEqual(uploaded.content_encoding, '')
+        self.assertIsNone(uploaded.stored_size)
+        with uploaded.file.open('rb') as handle:
+            self.assertEqual(handle.read(), PNG)
+
+    @override_settings(STORAGE_COMPRESSION={'ENCODING': '', 'LEVEL': 6})
+    def test_compression_disabled(self):
+        """Test that an empty encoding stores text as is"""
+        uploaded = self.upload('log.csv', TEXT, 'text/csv')
+
+        self.assertEqual(uploaded.content_encoding, '')
+        with uploaded.file.open('rb') as handle:
+            self.assertEqual(handle.read(), TEXT)
+
+    def test_stored_bytes_sent_to_clients_accepting_gzip(self):
+        """Test that gzip-capable clients get the stored bytes with Content-Encoding"""
+        uploaded = self.upload('log.csv', TEXT, 'text/csv')
+
+        response = self.download(uploaded, HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(int(response['Content-Length']), uploaded.stored_size)
+        self.assertEqual(response['ETag'], f'"{uploaded.checksum}-gzip"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), TEXT)
+
+    def test_decoded_for_other_clients(self):
+        """Test that clients without gzip get the original bytes"""
+        uploaded = self.upload('log.csv', TEXT, 'text/csv')
+
+        response = self.download(uploaded, HTTP_ACCEPT_ENCODING='gzip;q=0')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(int(response['Content-Length']), len(TEXT))
+        self.assertEqual(response['ETag'], f'"{uploaded.checksum}"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(b''.join(response.streaming_content), TEXT)
+
+    def test_ranges_of_decoded_content(self):
+        """Test that ranges index the original bytes when decoding"""
+        uploaded = self.upload('log.csv', TEXT, 'text/csv')
+
+        response = self.download(uploaded, HTTP_RANGE='bytes=100000-100099')
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], f'bytes 100000-100099/{len(TEXT)}')
+        self.assertEqual(b''.join(response.streaming_content), TEXT[100000:100100])
+
+    def test_ranges_of_encoded_content(self):
+        """Test that ranges index the stored bytes when sending them encoded"""
+        uploaded = self.upload('log.csv', TEXT, 'text/csv')
+        with uploaded.file.open('rb') as handle:
+            stored = handle.read()
+
+        response = self.download(uploaded, HTTP_ACCEPT_ENCODING='gzip', HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(stored)}')
+        self.assertEqual(b''.join(response.streaming_content), stored[10:20])
+
+    def test_etag_is_per_representation(self):
+        """Test that a validator of one representation does not match the other"""
+        uploaded = self.upload('log.csv', TEXT, 'text/csv')
+
+        response = self.download(
+            uploaded, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=f'"{uploaded.checksum}-gzip"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = self.download(uploaded, HTTP_IF_NONE_MATCH=f'"{uploaded.checksum}-gzip"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_duplicates_share_the_encoded_blob(self):
+        """Test that a second upload of the same text references the stored blob"""
+        first = self.upload('one.csv', TEXT, 'text/csv')
+        second = self.upload('two.csv', TEXT, 'text/csv')
+
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+        self.assertEqual(second.content_encoding, 'gzip')
+        self.assertEqual(second.stored_size, first.stored_size)
+
+    @override_settings(DOWNLOAD_DELIVERY={'MODE': 'accel', 'ACCEL_PREFIX': '/protected/'})
+    def test_offload_only_for_stored_bytes(self):
+        """Test that the proxy is only asked to send the bytes as stored"""
+        uploaded = self.upload('log.csv', TEXT, 'text/csv')
+
+        response = self.download(uploaded, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertIn('X-Accel-Redirect', response)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+        response = self.download(uploaded)
+        self.assertNotIn('X-Accel-Redirect', response)
+        self.assertEqual(b''.join(response.streaming_content), TEXT)
+
+    def test_archives_contain_decoded_content(self):
+        """Test that ZIP downloads hold the original bytes"""
+        uploaded = self.upload('log.csv', TEXT, 'text/csv')
+
+        response = self.client.get(f"{reverse('file-archive')}?ids={uploaded.id}", HTTP_ACCEPT_ENCODING='gzip')
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.read('log.csv'), TEXT)
@@ -0,0 +1,195 @@
+import base64
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.models import User, Organization, File, Download, RevokedToken
+from files.tokens import issue_token, revoke_token
+
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Two workers with a per-process cache each.
+WORKERS = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'worker-a'},
+    'worker-b': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'worker-b'},
+}
+
+# A cache every worker shares, like Redis.
+SHARED = {'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'files-token-tests'),
+}}
+
+
+class TokenAuthenticationTestCase(TestCase):
+    """Test cases for SignedTokenAuthentication and TokenView"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org = Organization.objects.create(name='Acme Corp')
+        self.other_org = Organization.objects.create(name='Globex Industries')
+        self.user = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org
+        )
+        self.file = File.objects.create(
+            organization=self.org,
+            uploaded_by=self.user,
+            file=SimpleUploadedFile('a.txt', b'alpha', content_type='text/plain'),
+            name='a.txt',
+            file_size=5,
+            content_type='text/plain'
+        )
+        self.client = APIClient()
+
+    def bearer(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def upload(self, org_id, name='new.txt'):
+        return self.client.post(reverse('organization-file-list-create', kwargs={'org_id': org_id}), {
+            'name': name,
+            'file': SimpleUploadedFile(name, b'new content', content_type='text/plain'),
+        }, format='multipart')
+
+    def test_issue_with_basic_auth(self):
+        """Test that a machine client gets a token with its password"""
+        credentials = base64.b64encode(b'testuser1:testpass123').decode()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Basic {credentials}')
+
+        response = self.client.post(reverse('auth-token'))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('expires_at', response.data)
+        self.bearer(response.data['token'])
+        self.assertEqual(self.client.get(reverse('global-file-list')).status_code, status.HTTP_200_OK)
+
+    def test_no_token_from_a_token(self):
+        """Test that a token cannot be used to extend itself"""
+        self.bearer(issue_token(self.user)[0])
+
+        response = self.client.post(reverse('auth-token'))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(CACHES=SHARED)
+    def test_authenticated_without_queries(self):
+        """Test that a token is verified without touching the database when the cache is shared"""
+        cache.clear()
+        token, _ = issue_token(self.user)
+        self.bearer(token)
+        # The first request fills the cached deny-list.
+        self.client.get(reverse('file-download', kwargs={'file_id': self.file.id}))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('file-download', kwargs={'file_id': self.file.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        tables = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('django_session', tables)
+        self.assertNotIn('"files_user"', tables)
+        self.assertNotIn('files_revokedtoken', tables)
+        self.assertEqual(Download.objects.filter(downloaded_by=self.user).count(), 2)
+
+    def test_upload_checks_the_organization_claim(self):
+        """Test that uploads are allowed into the token's organization only"""
+        self.bearer(issue_token(self.user)[0])
+
+        response = self.upload(self.org.id)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(File.objects.get(name='new.txt').uploaded_by, self.user)
+
+        response = self.upload(self.other_org.id, 'other.txt')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_batch_upload_names_the_uploader(self):
+        """Test that files uploaded in a batch with a token report the uploader's username"""
+        self.bearer(issue_token(self.user)[0])
+
+        response = self.client.post(reverse('organization-file-batch-upload', kwargs={'org_id': self.org.id}), {
+            'files': [SimpleUploadedFile('b.txt', b'beta', content_type='text/plain')],
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['results'][0]['file']['uploaded_by_username'], 'testuser1')
+
+    def test_tampered_token(self):
+        """Test that a token with a changed payload is rejected"""
+        token, _ = issue_token(self.user)
+        self.bearer(token[:-2] + ('AA' if not token.endswith('AA') else 'BB'))
+
+        response = self.client.get(reverse('global-file-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_expired_token(self):
+        """Test that a token is rejected after its expiry"""
+        token, claims = issue_token(self.user, lifetime=60)
+        self.bearer(token)
+
+        with mock.patch('files.tokens.time.time', return_value=claims['exp'] + 1):
+            response = self.client.get(reverse('global-file-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(str(response.data['detail']), 'Token has expired.')
+
+    @override_settings(CACHES=LOCMEM)
+    def test_revoke(self):
+        """Test that a revoked token stops working at once, even with a cached deny-list"""
+        cache.clear()
+        token, claims = issue_token(self.user)
+        self.bearer(token)
+        self.assertEqual(self.client.get(reverse('global-file-list')).status_code, status.HTTP_200_OK)
+
+        response = self.client.delete(reverse('auth-token'))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(RevokedToken.objects.filter(jti=claims['jti']).exists())
+        response = self.client.get(reverse('global-file-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(str(response.data['detail']), 'Token has been revoked.')
+
+    @override_settings(CACHES=WORKERS)
+    def test_revoke_on_another_worker(self):
+        """Test that a revocation through one worker's cache reaches a worker with its own cache"""
+        cache.clear()
+        token, claims = issue_token(self.user)
+        self.bearer(token)
+        # Worker A caches the deny-list before the revocation.
+        self.assertEqual(self.client.get(reverse('global-file-list')).status_code, status.HTTP_200_OK)
+
+        with override_settings(API_CACHE_ALIAS='worker-b'):
+            revoke_token(claims)
+
+        response = self.client.get(reverse('global-file-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(str(response.data['detail']), 'Token has been revoked.')
+
+    def test_revoke_needs_a_token(self):
+        """Test that a session cannot be revoked as a token"""
+        self.client.force_login(self.user)
+
+        response = self.client.delete(reverse('auth-token'))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_download(self):
+        """Test that the async download view accepts tokens"""
+        token, _ = issue_token(self.user)
+
+        response = await self.async_client.get(
+            reverse('file-download-async', kwargs={'file_id': self.file.id}),
+            headers={'Authorization': f'Bearer {token}'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), b'alpha')
@@ -0,0 +1,188 @@
+import hashlib
+from io import StringIO
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from files.models import User, Organization, File, Blob, UploadSession, UploadChunk
+
+
+class UploadSessionTestCase(TestCase):
+    """Test cases for chunked, resumable upload sessions"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.org1 = Organization.objects.create(name='Acme Corp')
+        self.org2 = Organization.objects.create(name='Globex Industries')
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            password='testpass123',
+            organization=self.org1
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            password='testpass123',
+            organization=self.org2
+        )
+        self.chunks = [b'first chunk|', b'second chunk|', b'third chunk']
+        self.client = APIClient()
+        self.client.login(username='testuser1', password='testpass123')
+
+    def open_session(self, **overrides):
+        data = {'name': 'large.bin', 'content_type': 'application/octet-stream', 'chunk_count': len(self.chunks)}
+        data.update(overrides)
+        url = reverse('upload-session-create', kwargs={'org_id': self.org1.id})
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def put_chunk(self, session_id, index, content, **headers):
+        url = reverse('upload-session-chunk', kwargs={'session_id': session_id, 'index': index})
+        return self.client.put(url, content, content_type='application/octet-stream', **headers)
+
+    def commit(self, session_id, **data):
+        url = reverse('upload-session-commit', kwargs={'session_id': session_id})
+        return self.client.post(url, data, format='json')
+
+    def test_chunks_in_any_order_are_assembled(self):
+        """Test that chunks uploaded out of order commit into one File"""
+        session_id = self.open_session()
+        for index in (2, 0, 1):
+            response = self.put_chunk(session_id, index, self.chunks[index])
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        content = b''.join(self.chunks)
+        response = self.commit(session_id, checksum=hashlib.sha256(content).hexdigest())
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        file_obj = File.objects.get(pk=response.data['id'])
+        self.assertEqual(file_obj.organization, self.org1)
+        self.assertEqual(file_obj.uploaded_by, self.user1)
+        self.assertEqual(file_obj.file_size, len(content))
+        with file_obj.file.open('rb') as handle:
+            self.assertEqual(handle.read(), content)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(UploadChunk.objects.exists())
+
+    def test_name_taken_during_commit(self):
+        """Test that a name taken by a concurrent upload during the commit is a conflict"""
+        session_id = self.open_session()
+        for index, content in enumerate(self.chunks):
+            self.put_chunk(session_id, index, content)
+
+        def take_name():
+            File.objects.create(
+                organization=self.org1,
+                uploaded_by=self.user2,
+                file=SimpleUploadedFile('large.bin', b'raced'),
+                name='large.bin',
+                file_size=5,
+                content_type='application/octet-stream'
+            )
+            return hashlib.sha256()
+
+        # The name is free when checked, then taken before the File is created.
+        with mock.patch('files.uploads.new_hasher', side_effect=take_name):
+            response = self.commit(session_id)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(File.objects.filter(name='large.bin').count(), 1)
+        self.assertFalse(Blob.objects.exists())
+        self.assertTrue(UploadSession.objects.filter(pk=session_id).exists())
+
+    def test_status_reports_received_and_missing_chunks(self):
+        """Test that the session status lists which chunks still need uploading"""
+        session_id = self.open_session()
+        self.put_chunk(session_id, 1, self.chunks[1])
+
+        url = reverse('upload-session-detail', kwargs={'session_id': session_id})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['received_chunks'], [1])
+        self.assertEqual(response.data['missing_chunks'], [0, 2])
+
+    def test_commit_with_missing_chunks_fails(self):
+        """Test that committing an incomplete session is rejected"""
+        session_id = self.open_session()
+        self.put_chunk(session_id, 0, self.chunks[0])
+
+        response = self.commit(session_id)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['missing_chunks'], [1, 2])
+        self.assertFalse(File.objects.exists())
+
+    def test_chunk_checksum_mismatch_rejected(self):
+        """Test that a chunk whose checksum header does not match is discarded"""
+        session_id = self.open_session()
+
+        response = self.put_chunk(session_id, 0, self.chunks[0], HTTP_X_CHUNK_CHECKSUM='0' * 64)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(UploadChunk.objects.exists())
+
+    def test_chunk_retry_replaces_previous_attempt(self):
+        """Test that re-sending a chunk replaces the earlier bytes"""
+        session_id = self.open_session(chunk_count=1)
+        self.put_chunk(session_id, 0, b'corrupted')
+        self.put_chunk(session_id, 0, b'good bytes')
+
+        response = self.commit(session_id)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(UploadChunk.objects.count(), 0)
+        with File.objects.get().file.open('rb') as handle:
+            self.assertEqual(handle.read(), b'good bytes')
+
+    def test_chunk_index_out_of_range(self):
+        """Test that chunk indexes beyond chunk_count are rejected"""
+        session_id = self.open_session()
+
+        response = self.put_chunk(session_id, len(self.chunks), b'extra')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_session_rejects_chunks(self):
+        """Test that an expired session answers 410 Gone"""
+        session_id = self.open_session()
+        UploadSession.objects.filter(pk=session_id).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.put_chunk(session_id, 0, self.chunks[0])
+
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_purge_removes_expired_sessions(self):
+        """Test that purge_upload_sessions deletes only expired sessions"""
+        expired_id = self.open_session()
+        self.open_session(name='active.bin')
+        self.put_chunk(expired_id, 0, self.chunks[0])
+        UploadSession.objects.filter(pk=expired_id).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        call_command('purge_upload_sessions', stdout=StringIO())
+
+        self.assertEqual(list(UploadSession.objects.values_list('name', flat=True)), ['active.bin'])
+        self.assertFalse(UploadChunk.objects.exists())
+
+    def test_other_users_cannot_use_session(self):
+        """Test that a session is only visible to the user who opened it"""
+        session_id = self.open_session()
+        self.client.logout()
+        self.client.login(username='testuser2', password='testpass123')
+
+        response = self.put_chunk(session_id, 0, self.chunks[0])
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cannot_open_session_for_other_organization(self):
+        """Test that sessions follow the same organization rule as uploads"""
+        url = reverse('upload-session-create', kwargs={'org_id': self.org2.id})
+        response = self.client.post(url, {'name': 'x.bin', 'chunk_count': 1}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
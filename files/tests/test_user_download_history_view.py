@@ -79,7 +79,7 @@ class UserDownloadHistoryViewTestCase(TestCase):
         
         # Assert response
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)  # user1 has 2 downloads
+        self.assertEqual(len(response.data['results']), 2)  # user1 has 2 downloads
     
     def test_list_user_downloads_unauthenticated(self):
         """Test that unauthenticated users cannot list download history"""
@@ -103,10 +103,10 @@ class UserDownloadHistoryViewTestCase(TestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)  # user1 has 2 downloads
+        self.assertEqual(len(response.data['results']), 2)  # user1 has 2 downloads
         
         # Verify the downloads belong to user1
-        download_ids = [d['id'] for d in response.data]
+        download_ids = [d['id'] for d in response.data['results']]
         self.assertIn(self.download1.id, download_ids)
         self.assertIn(self.download2.id, download_ids)
         
@@ -115,7 +115,7 @@ class UserDownloadHistoryViewTestCase(TestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)  # user2 has 1 download
+        self.assertEqual(len(response.data['results']), 1)  # user2 has 1 download
     
     def test_list_nonexistent_user_returns_404(self):
         """Test that requesting history for a nonexistent user returns 404"""
@@ -130,3 +130,15 @@ class UserDownloadHistoryViewTestCase(TestCase):
         # Assert 404 response
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_nested_file_download_counts(self):
+        """Test that each nested file carries its total download count"""
+        # Authenticate user
+        self.client.login(username='testuser1', password='testpass123')
+
+        url = reverse('user-download-history', kwargs={'user_id': self.user1.id})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        counts = {d['file_info']['name']: d['file_info']['download_count'] for d in response.data['results']}
+        # file1 was downloaded by both users
+        self.assertEqual(counts, {'file1.txt': 2, 'file2.txt': 1})
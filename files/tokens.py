@@ -0,0 +1,122 @@
+# file_storage_app/tokens.py
+
+import secrets
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils import timezone
+from files.caching import is_process_local
+from files.models import RevokedToken, User
+
+
+TOKEN_SALT = 'files.tokens'
+
+DENY_LIST_KEY = 'files:tokens:revoked'
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def issue_token(user, lifetime=None):
+    """
+    Sign a bearer token for ``user``. Returns ``(token, claims)``.
+
+    The claims are the user id (``uid``), username (``name``), organization
+    id (``org``), expiry as a Unix timestamp (``exp``) and a random token id
+    (``jti``) used for revocation.
+    """
+    if lifetime is None:
+        lifetime = settings.TOKEN_AUTH['LIFETIME']
+    claims = {
+        'uid': user.pk,
+        'name': user.username,
+        'org': user.organization_id,
+        'exp': int(time.time()) + lifetime,
+        'jti': secrets.token_urlsafe(12),
+    }
+    return signing.dumps(claims, salt=TOKEN_SALT), claims
+
+
+def expires_at(claims):
+    return datetime.fromtimestamp(claims['exp'], tz=dt_timezone.utc)
+
+
+def revoked_ids():
+    """
+    Ids of the revoked tokens that have not expired yet.
+
+    Read from the cache; the table is only queried to refill it after a
+    revocation or an eviction. A revocation deletes the cached list, which
+    every worker sees at once when the cache is shared. A process-local
+    cache cannot be cleared from another worker, so there the list is
+    stored with the highest ``RevokedToken`` id and refilled whenever the
+    table has moved on, at the cost of one indexed query per request.
+    """
+    cache = _cache()
+    stamp = None
+    if is_process_local(cache):
+        stamp = RevokedToken.objects.aggregate(stamp=Max('id'))['stamp']
+    cached = cache.get(DENY_LIST_KEY)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    ids = frozenset(
+        RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list('jti', flat=True)
+    )
+    cache.set(DENY_LIST_KEY, (stamp, ids), timeout=settings.TOKEN_AUTH['DENY_LIST_TIMEOUT'])
+    return ids
+
+
+def read_token(token):
+    """
+    Verify ``token`` and return its claims without loading the user.
+
+    Raises ``InvalidToken`` when the signature does not match, or the token
+    has expired or was revoked.
+    """
+    try:
+        claims = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        raise InvalidToken('Invalid token.')
+    if claims['exp'] <= time.time():
+        raise InvalidToken('Token has expired.')
+    if claims['jti'] in revoked_ids():
+        raise InvalidToken('Token has been revoked.')
+    return claims
+
+
+def revoke_token(claims):
+    """
+    Add the token with ``claims`` to the deny-list until it expires.
+    """
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=claims['jti'], expires_at=expires_at(claims))
+    except IntegrityError:
+        # Already revoked.
+        pass
+    _cache().delete(DENY_LIST_KEY)
+    # A request that refilled the cache before the commit must not keep the old list.
+    transaction.on_commit(lambda: _cache().delete(DENY_LIST_KEY))
+
+
+def token_user(claims):
+    """
+    The user of a verified token, built from its claims without a query.
+
+    Only ``pk``, ``username`` and ``organization_id`` are set: enough to
+    use it in queries, as a foreign key and in responses that name the
+    uploader, but it must never be saved.
+    """
+    user = User(pk=claims['uid'], username=claims['name'], organization_id=claims['org'])
+    user._state.adding = False
+    return user
@@ -0,0 +1,146 @@
+# file_storage_app/uploadhandlers.py
+
+import os
+import uuid
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, TemporaryFileUploadHandler
+from files.checksums import new_hasher
+from files.compression import choose_encoding, encoder
+from files.sniffing import SNIFF_BYTES, sniff_content_type
+
+
+INCOMING_DIR = 'blobs/incoming'
+
+
+class StreamTooLarge(Exception):
+    pass
+
+
+class StoredUploadedFile(UploadedFile):
+    """
+    An upload already written into the storage's incoming area.
+
+    ``checksum``, ``size`` and ``content_type`` were computed from the bytes
+    as they arrived. The file itself may hold them encoded, as recorded by
+    ``content_encoding`` and ``stored_size``. Saving it to the same storage
+    renames the file into place instead of copying it; closing it removes
+    whatever is left behind.
+    """
+
+    def __init__(self, path, name, content_type, size, charset, checksum, content_type_extra=None,
+                 content_encoding='', stored_size=None):
+        super().__init__(open(path, 'rb'), name, content_type, size, charset, content_type_extra)
+        self.path = path
+        self.checksum = checksum
+        self.content_encoding = content_encoding
+        self.stored_size = stored_size
+
+    def temporary_file_path(self):
+        return self.path
+
+    def close(self):
+        self.file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            # Moved into a blob.
+            pass
+
+
+class BlobUploadHandler(FileUploadHandler):
+    """
+    Streams uploaded files straight into the default storage in one pass.
+
+    Each chunk is written once, to a file next to the blob area, while the
+    checksum and byte count are updated and the leading bytes are kept for
+    content-type sniffing. Once the type is known, compressible content is
+    encoded on its way to disk (see ``files.compression``); the checksum is
+    still of the original bytes. Only usable with storages on the local
+    filesystem.
+    """
+
+    @staticmethod
+    def is_supported(storage=default_storage):
+        try:
+            storage.path(INCOMING_DIR)
+        except NotImplementedError:
+            return False
+        return True
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.path = default_storage.path(f'{INCOMING_DIR}/{uuid.uuid4().hex}')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.handle = open(self.path, 'wb')
+        self.hasher = new_hasher()
+        self.head = b''
+        self.writer = None
+
+    def _start_writing(self):
+        # The leading bytes decide the type, and the type decides the encoding.
+        self.sniffed_type = sniff_content_type(self.head[:SNIFF_BYTES], self.file_name, self.content_type)
+        self.encoding = choose_encoding(self.sniffed_type)
+        self.writer = encoder(self.encoding, self.handle) if self.encoding else self.handle
+        self.writer.write(self.head)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        if self.writer is None:
+            self.head += raw_data
+            if len(self.head) >= SNIFF_BYTES:
+                self._start_writing()
+        else:
+            self.writer.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.writer is None:
+            self._start_writing()
+        if self.writer is not self.handle:
+            self.writer.close()
+        self.handle.close()
+        return StoredUploadedFile(
+            self.path,
+            self.file_name,
+            self.sniffed_type,
+            file_size,
+            self.charset,
+            self.hasher.hexdigest(),
+            self.content_type_extra,
+            content_encoding=self.encoding,
+            stored_size=os.path.getsize(self.path) if self.encoding else None,
+        )
+
+    def upload_interrupted(self):
+        if hasattr(self, 'handle'):
+            self.handle.close()
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def stage_stream(stream, name, content_type=None, max_size=None):
+    """
+    Read ``stream`` into an uploaded file ready for ``acquire_blob``.
+
+    Uses ``BlobUploadHandler`` when the storage supports it, so the bytes are
+    written, hashed and sniffed in one pass; otherwise they are spooled to a
+    temporary file like any other large upload. Raises ``StreamTooLarge``,
+    leaving nothing staged, once more than ``max_size`` bytes were read.
+    """
+    handler = BlobUploadHandler() if BlobUploadHandler.is_supported() else TemporaryFileUploadHandler()
+    handler.new_file('file', name, content_type, None)
+    size = 0
+    try:
+        for chunk in iter(lambda: stream.read(handler.chunk_size), b''):
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                raise StreamTooLarge()
+            handler.receive_data_chunk(chunk, size - len(chunk))
+    except BaseException:
+        handler.upload_interrupted()
+        raise
+    return handler.file_complete(size)
@@ -0,0 +1,190 @@
+# file_storage_app/uploads.py
+
+import io
+
+from django.conf import settings
+from django.core.files import File as DjangoFile
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from files.blobs import blob_reference
+from files.checksums import new_hasher
+from files.models import File, UploadChunk
+from files.sniffing import SNIFF_BYTES, sniff_content_type
+
+
+READ_SIZE = 64 * 1024
+
+
+class UploadSessionExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Upload session has expired.'
+    default_code = 'expired'
+
+
+class UploadConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Conflicting upload.'
+    default_code = 'conflict'
+
+
+class ChunkTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Chunk exceeds the maximum chunk size.'
+    default_code = 'chunk_too_large'
+
+
+class HashingReader(io.RawIOBase):
+    """
+    Wraps a readable stream, hashing and counting bytes as they are read.
+    """
+
+    def __init__(self, stream, limit=None):
+        self._stream = stream
+        self._limit = limit
+        self.hasher = new_hasher()
+        self.size = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        if not data:
+            return 0
+        self.size += len(data)
+        if self._limit is not None and self.size > self._limit:
+            raise ChunkTooLarge()
+        self.hasher.update(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class ChunkStream(io.RawIOBase):
+    """
+    Reads the stored chunks of a session back to back as one stream.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._current = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            if self._current is None:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    return 0
+                self._current = chunk.file.storage.open(chunk.file.name, 'rb')
+            data = self._current.read(len(buffer))
+            if data:
+                buffer[:len(data)] = data
+                return len(data)
+            self._current.close()
+            self._current = None
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        super().close()
+
+
+def store_chunk(session, index, stream, expected_checksum=None):
+    """
+    Stream one chunk of ``session`` to storage, replacing an earlier attempt.
+
+    The body is hashed on the way through; a mismatch with
+    ``expected_checksum`` discards the chunk.
+    """
+    if session.is_expired:
+        raise UploadSessionExpired()
+    if index >= session.chunk_count:
+        raise ValidationError({'index': f'Session has {session.chunk_count} chunks.'})
+
+    if stream is None:
+        # DRF exposes an empty request body as no stream at all.
+        stream = io.BytesIO()
+    reader = HashingReader(stream, limit=settings.UPLOAD_SESSIONS['MAX_CHUNK_SIZE'])
+    chunk = UploadChunk(session=session, index=index, size=0, checksum='')
+    chunk.file.save(str(index), DjangoFile(io.BufferedReader(reader, READ_SIZE)), save=False)
+    chunk.size = reader.size
+    chunk.checksum = reader.hasher.hexdigest()
+
+    if expected_checksum and expected_checksum.lower() != chunk.checksum:
+        chunk.file.delete(save=False)
+        raise ValidationError({'checksum': 'Chunk checksum does not match its content.'})
+
+    previous = UploadChunk.objects.filter(session=session, index=index).first()
+    try:
+        with transaction.atomic():
+            if previous is not None:
+                previous.delete()
+            chunk.save()
+    except IntegrityError:
+        chunk.file.delete(save=False)
+        raise UploadConflict('Chunk is being uploaded concurrently.')
+    return chunk
+
+
+def missing_chunks(session, received):
+    return sorted(set(range(session.chunk_count)) - set(received))
+
+
+def commit_session(session, expected_checksum=None):
+    """
+    Assemble the chunks of ``session`` into a new File and delete the session.
+
+    Chunks are streamed from storage twice at most - once to hash the whole
+    upload and, only when the content is new, once more into its blob - so
+    memory use does not depend on the size of the upload.
+    """
+    if session.is_expired:
+        raise UploadSessionExpired()
+    chunks = list(session.chunks.all())
+    if missing_chunks(session, [chunk.index for chunk in chunks]):
+        raise ValidationError('Upload is incomplete.')
+    total_size = sum(chunk.size for chunk in chunks)
+    if session.total_size is not None and session.total_size != total_size:
+        raise ValidationError({'total_size': f'Expected {session.total_size} bytes, received {total_size}.'})
+    if File.objects.filter(organization_id=session.organization_id, name=session.name).exists():
+        raise UploadConflict(f"A file named '{session.name}' already exists in this organization.")
+
+    hasher = new_hasher()
+    with io.BufferedReader(ChunkStream(chunks), READ_SIZE) as assembled:
+        head = assembled.peek(SNIFF_BYTES)[:SNIFF_BYTES]
+        for piece in iter(lambda: assembled.read(READ_SIZE), b''):
+            hasher.update(piece)
+    checksum = hasher.hexdigest()
+    if expected_checksum and expected_checksum.lower() != checksum:
+        raise ValidationError({'checksum': 'Assembled file checksum does not match.'})
+
+    content = DjangoFile(io.BufferedReader(ChunkStream(chunks), READ_SIZE), name=session.name)
+    content.size = total_size
+    try:
+        with blob_reference(content, checksum) as blob:
+            with transaction.atomic():
+                file_object = File.objects.create(
+                    organization_id=session.organization_id,
+                    uploaded_by_id=session.created_by_id,
+                    name=session.name,
+                    blob=blob,
+                    file=blob.file.name,
+                    file_size=blob.size,
+                    content_type=sniff_content_type(head, session.name, session.content_type),
+                    checksum=blob.checksum,
+                    content_encoding=blob.content_encoding,
+                    stored_size=blob.stored_size
+                )
+            session.delete()
+    except IntegrityError:
+        if not File.objects.filter(organization_id=session.organization_id, name=session.name).exists():
+            raise
+        # Another upload took the name after the check above.
+        raise UploadConflict(f"A file named '{session.name}' already exists in this organization.")
+    finally:
+        content.close()
+    return file_object
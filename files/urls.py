@@ -1,6 +1,6 @@
 # file_storage_app/urls.py
 
-from django.urls import path
+from django.urls import path, re_path
 from django.contrib.auth import views as auth_views
 from files import views
 
@@ -11,6 +11,11 @@ urlpatterns = [
         auth_views.LoginView.as_view(), 
         name='login'
     ),
+    path(
+        'auth/token/',
+        views.TokenView.as_view(),
+        name='auth-token'
+    ),
     path(
         'organizations/', 
         views.OrganizationListView.as_view(), 
@@ -21,16 +26,41 @@ urlpatterns = [
         views.FileListCreateView.as_view(), 
         name='organization-file-list-create'
     ),
+    path(
+        'organizations/<int:org_id>/files/batch/',
+        views.FileBatchUploadView.as_view(),
+        name='organization-file-batch-upload'
+    ),
     path(
         'files/', 
         views.GlobalFileListView.as_view(), 
         name='global-file-list'
     ),
+    path(
+        'files/archive/',
+        views.FileArchiveView.as_view(),
+        name='file-archive'
+    ),
     path(
         'files/<int:file_id>/download/', 
         views.FileDownloadView.as_view(), 
         name='file-download'
     ),
+    path(
+        'files/<int:file_id>/link/',
+        views.DownloadLinkView.as_view(),
+        name='file-download-link'
+    ),
+    path(
+        'files/download/<str:token>/',
+        views.SignedFileDownloadView.as_view(),
+        name='file-signed-download'
+    ),
+    path(
+        'files/<int:file_id>/download/async/',
+        views.AsyncFileDownloadView.as_view(),
+        name='file-download-async'
+    ),
     path(
         'users/<int:user_id>/downloads/', 
         views.UserDownloadHistoryView.as_view(), 
@@ -41,4 +71,44 @@ urlpatterns = [
         views.FileDownloadHistoryView.as_view(), 
         name='file-download-history'
     ),
+    re_path(
+        r'^users/(?P<user_id>[0-9]+)/downloads/export\.(?P<export_format>csv|ndjson)$',
+        views.UserDownloadExportView.as_view(),
+        name='user-download-export'
+    ),
+    re_path(
+        r'^files/(?P<file_id>[0-9]+)/downloads/export\.(?P<export_format>csv|ndjson)$',
+        views.FileDownloadExportView.as_view(),
+        name='file-download-export'
+    ),
+    path(
+        'organizations/<int:org_id>/uploads/',
+        views.UploadSessionCreateView.as_view(),
+        name='upload-session-create'
+    ),
+    path(
+        'uploads/<uuid:session_id>/',
+        views.UploadSessionDetailView.as_view(),
+        name='upload-session-detail'
+    ),
+    path(
+        'uploads/<uuid:session_id>/chunks/<int:index>/',
+        views.UploadChunkView.as_view(),
+        name='upload-session-chunk'
+    ),
+    path(
+        'uploads/<uuid:session_id>/commit/',
+        views.UploadSessionCommitView.as_view(),
+        name='upload-session-commit'
+    ),
+    path(
+        'analytics/downloads/',
+        views.DownloadTimeSeriesView.as_view(),
+        name='analytics-download-series'
+    ),
+    path(
+        'analytics/top/',
+        views.TopDownloadsView.as_view(),
+        name='analytics-top'
+    ),
 ]
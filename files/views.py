@@ -1,128 +1,625 @@
 # file_storage_app/views.py
 
-from rest_framework import generics, views
-from rest_framework.authentication import SessionAuthentication
-from rest_framework.permissions import IsAuthenticated
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import content_disposition_header
+from django.views import View
+from rest_framework import generics, status, views
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from rest_framework.fields import DateTimeField
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Count, Value, IntegerField
-from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
-from django.http import FileResponse
-from files.models import File, Organization, Download, User
+from files.models import File, Organization, Download, User, UploadSession
 from files.serializers import (
     FileUploadSerializer, 
     FileDetailSerializer, 
     OrganizationWithDownloadCountSerializer, 
     UserDownloadSerializer,
     FileDownloadSerializer,
+    UploadSessionSerializer,
+    DownloadSeriesQuerySerializer,
+    TopDownloadsQuerySerializer,
+    FileArchiveQuerySerializer,
+    DownloadLinkSerializer,
+    DownloadExportQuerySerializer,
 )
+from files.authentication import SignedTokenAuthentication
+from files.batches import archive_items, upload_batch
+from files.blobs import blob_reference
+from files.caching import CachedListMixin, organization_version_key, read_version
+from files.counters import file_download_count, organization_download_count
+from files.delivery import as_async_response, serve_file
+from files.exports import export_response
+from files.links import InvalidLink, grantee, linked_file, read_download, sign_download
+from files.pagination import DownloadKeysetPagination, FileKeysetPagination, OrganizationKeysetPagination
 from files.permissions import IsFileUploaderOrganization
+from files.rollups import time_series, top
+from files.routers import ReplicaReadMixin
+from files.rows import FileDetailRowSerializer, FileDownloadRowSerializer, RowListMixin, UserDownloadRowSerializer
+from files.sinks import record_download, record_downloads
+from files.sniffing import sniff_file
+from files.tokens import expires_at, issue_token, revoke_token
+from files.uploadhandlers import BlobUploadHandler, StoredUploadedFile
+from files.uploads import ChunkTooLarge, commit_session, missing_chunks, store_chunk
+from files.zipstream import iter_zip
 
 
 class FileDownloadView(views.APIView):
     """
     GET /api/v1/files/<file_id>/download/
+
+    Supports single, suffix and multipart byte ranges and conditional GET
+    (ETag / Last-Modified). A download is recorded once per logical download
+    rather than once per range request, and never for a 304.
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, file_id, format=None):
         file_object = get_object_or_404(File, pk=file_id)
-        # In production this should be a background task (Celery, etc.).
-        Download.objects.create(
-            file=file_object,
-            downloaded_by=request.user
-        )
         try:
-            response = FileResponse(
-                file_object.file.open('rb'),
-                content_type=file_object.content_type or 'application/octet-stream'
-            )
-            response['Content-Disposition'] = f'attachment; filename="{file_object.name}"'
-            response['Content-Length'] = file_object.file_size
-            return response
+            response, is_new_download = serve_file(request, file_object)
+        except FileNotFoundError:
+            return Response({"detail": "File not found on storage."}, status=404)
+        if is_new_download:
+            record_download(file_object, request.user)
+        return response
+
+
+class AsyncFileDownloadView(View):
+    """
+    GET /api/v1/files/<file_id>/download/async/
+
+    FileDownloadView for ASGI deployments, with the same permissions,
+    responses and download recording. Authentication and the lookup are
+    awaited and the file is read on the thread pool one chunk at a time, so
+    a slow client holds a coroutine rather than a worker thread.
+    """
+
+    async def get(self, request, file_id):
+        user = await request.auser()
+        if not user.is_authenticated:
+            try:
+                authenticated = await sync_to_async(SignedTokenAuthentication().authenticate)(request)
+            except AuthenticationFailed as exc:
+                # Like the DRF views, whose first authenticator (sessions) sends no challenge.
+                return as_async_response(Response({"detail": exc.detail}, status=403))
+            if authenticated is not None:
+                user = authenticated[0]
+        if not user.is_authenticated:
+            return as_async_response(Response({"detail": NotAuthenticated.default_detail}, status=403))
+        try:
+            file_object = await File.objects.aget(pk=file_id)
+        except File.DoesNotExist:
+            return as_async_response(Response({"detail": "No File matches the given query."}, status=404))
+        try:
+            response, is_new_download = await sync_to_async(serve_file, thread_sensitive=False)(request, file_object)
+        except FileNotFoundError:
+            return as_async_response(Response({"detail": "File not found on storage."}, status=404))
+        if is_new_download:
+            await sync_to_async(record_download)(file_object, user)
+        return as_async_response(response)
+
+
+class DownloadLinkView(views.APIView):
+    """
+    POST /api/v1/files/<file_id>/link/
+
+    Issues a signed URL that downloads the file without a session until it
+    expires (``expires_in`` seconds, ``DOWNLOAD_LINKS['LIFETIME']`` by
+    default). Downloads through it are recorded for the requesting user.
+    """
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, file_id, format=None):
+        params = DownloadLinkSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        file_object = get_object_or_404(File, pk=file_id)
+        token, claims = sign_download(file_object, request.user, params.validated_data.get('expires_in'))
+        return Response({
+            "url": request.build_absolute_uri(reverse('file-signed-download', kwargs={'token': token})),
+            "expires_at": DateTimeField().to_representation(expires_at(claims)),
+        }, status=status.HTTP_201_CREATED)
+
+
+class SignedFileDownloadView(views.APIView):
+    """
+    GET /api/v1/files/download/<token>/
+
+    Downloads the file of a link from DownloadLinkView. The signature alone
+    authorizes the request and the link carries the file's metadata, so
+    neither a session nor the File is loaded. Responses may be kept by
+    shared caches until the link expires; the downloads are recorded
+    through the download sink.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, token, format=None):
+        try:
+            claims = read_download(token)
+        except InvalidLink as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_403_FORBIDDEN)
+        file_object = linked_file(claims)
+        try:
+            response, is_new_download = serve_file(request, file_object)
         except FileNotFoundError:
             return Response({"detail": "File not found on storage."}, status=404)
+        if response.status_code < 400:
+            patch_cache_control(response, public=True, max_age=max(int(claims['exp'] - time.time()), 0))
+        if is_new_download:
+            record_download(file_object, grantee(claims))
+        return response
 
 
-class FileListCreateView(generics.ListCreateAPIView):
+class FileArchiveView(views.APIView):
+    """
+    GET /api/v1/files/archive/?ids=<file_id>&ids=<file_id>...
+    GET /api/v1/files/archive/?organization=<org_id>&name_prefix=<prefix>
+
+    Streams a ZIP of the selected files, assembled while it is sent, in the
+    order of ``ids`` or by name. All the downloads are recorded in one batch.
+    """
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        query = FileArchiveQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        files = File.objects.only('id', 'name', 'file', 'file_size', 'content_type', 'content_encoding', 'uploaded_at')
+        if 'ids' in params:
+            position = {file_id: index for index, file_id in enumerate(params['ids'])}
+            files = sorted(files.filter(pk__in=position), key=lambda file_object: position[file_object.pk])
+            filename = 'files.zip'
+        else:
+            organization = get_object_or_404(Organization, pk=params['organization'])
+            files = files.filter(organization=organization).order_by('name')
+            if 'name_prefix' in params:
+                files = files.filter(name__startswith=params['name_prefix'])
+            files = list(files[:settings.ARCHIVE_MAX_FILES + 1])
+            filename = f'{organization.name}.zip'
+        if not files:
+            return Response({"detail": "No files match."}, status=status.HTTP_404_NOT_FOUND)
+        if len(files) > settings.ARCHIVE_MAX_FILES:
+            return Response(
+                {"detail": f"More than {settings.ARCHIVE_MAX_FILES} files match."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        record_downloads(files, request.user)
+        response = StreamingHttpResponse(iter_zip(files), content_type='application/zip')
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+        return response
+
+
+class FileListCreateView(CachedListMixin, generics.ListCreateAPIView):
     """
     GET, POST /api/v1/organizations/<org_id>/files/
+
+    Uploads are written to storage once, by BlobUploadHandler, which also
+    measures, hashes and sniffs them on the way in. Listings are cached per
+    organization and invalidated by any change to its files.
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
     permission_classes = [IsAuthenticated, IsFileUploaderOrganization]
     serializer_class = FileUploadSerializer
+    pagination_class = FileKeysetPagination
     
     def get_queryset(self):
         org_id = self.kwargs['org_id']
         return File.objects.filter(organization_id=org_id)
+
+    def get_cache_versions(self):
+        return [read_version(organization_version_key(self.kwargs['org_id']))]
         
+    def initialize_request(self, request, *args, **kwargs):
+        # Must happen before anything (including the CSRF check) parses the body.
+        if request.method == 'POST' and BlobUploadHandler.is_supported():
+            request.upload_handlers = [BlobUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         org_id = self.kwargs['org_id']
         organization = get_object_or_404(Organization, id=org_id)
-        uploaded_file = self.request.FILES.get('file')
-        serializer.save(
-            uploaded_by=self.request.user,
-            organization=organization,
-            file_size=uploaded_file.size if uploaded_file else None,
-            content_type=uploaded_file.content_type if uploaded_file else None
+        uploaded_file = serializer.validated_data['file']
+        if isinstance(uploaded_file, StoredUploadedFile):
+            checksum, content_type = uploaded_file.checksum, uploaded_file.content_type
+        else:
+            checksum, content_type = None, sniff_file(uploaded_file)
+        # Identical content is stored once; the File row only takes a reference to it.
+        with blob_reference(uploaded_file, checksum) as blob:
+            serializer.save(
+                uploaded_by=self.request.user,
+                organization=organization,
+                blob=blob,
+                file=blob.file.name,
+                file_size=blob.size,
+                content_type=content_type,
+                checksum=blob.checksum,
+                content_encoding=blob.content_encoding,
+                stored_size=blob.stored_size
+            )
+
+
+class FileBatchUploadView(views.APIView):
+    """
+    POST /api/v1/organizations/<org_id>/files/batch/
+
+    Uploads many files in one request: several "files" parts, named after
+    the uploaded files, or one zip or tar "archive" whose regular files are
+    unpacked one at a time and named by their paths inside it. The new File
+    rows are written with a single INSERT. Responds 201 when every file was
+    created, otherwise 207 with a status per file (409 for names already
+    taken in the organization).
+    """
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated, IsFileUploaderOrganization]
+
+    def initialize_request(self, request, *args, **kwargs):
+        if request.method == 'POST' and BlobUploadHandler.is_supported():
+            request.upload_handlers = [BlobUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def post(self, request, org_id, format=None):
+        organization = get_object_or_404(Organization, id=org_id)
+        files, archive = request.FILES.getlist('files'), request.FILES.get('archive')
+        if bool(files) == bool(archive):
+            return Response(
+                {"detail": 'Send either one or more "files" or a single "archive".'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        items = archive_items(archive) if archive else ((upload.name, upload) for upload in files)
+        results = upload_batch(organization, request.user, items)
+        if not results:
+            return Response({"detail": "The archive contains no files."}, status=status.HTTP_400_BAD_REQUEST)
+
+        body = []
+        for result in results:
+            item = {"name": result.name, "status": result.status}
+            if result.file is not None:
+                # New files have no downloads yet.
+                result.file.download_count = 0
+                item["file"] = FileDetailSerializer(result.file).data
+            else:
+                item["detail"] = result.detail
+            body.append(item)
+        all_created = all(result.status == status.HTTP_201_CREATED for result in results)
+        return Response(
+            {"results": body},
+            status=status.HTTP_201_CREATED if all_created else status.HTTP_207_MULTI_STATUS
         )
 
 
-class GlobalFileListView(generics.ListAPIView):
+class GlobalFileListView(ReplicaReadMixin, CachedListMixin, RowListMixin, generics.ListAPIView):
     """
     GET /api/v1/files/
-    TODO: There probably should be a pagination in all list views but not mentioned in the requirements.
+
+    Rows are read with values() and shaped without serializers. Cached until
+    the next upload or download anywhere.
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = FileDetailSerializer
+    row_serializer_class = FileDetailRowSerializer
+    pagination_class = FileKeysetPagination
     
     def get_queryset(self):
-        return File.objects.select_related('organization', 'uploaded_by').annotate(download_count=Count('downloads'))
+        return File.objects.select_related('organization', 'uploaded_by').annotate(download_count=file_download_count())
 
 
-class OrganizationListView(generics.ListAPIView):
+class OrganizationListView(ReplicaReadMixin, CachedListMixin, generics.ListAPIView):
     """
     GET /api/v1/organizations/
+
+    Paged by id. Cached until the next upload or download anywhere.
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = OrganizationWithDownloadCountSerializer
-    
+    pagination_class = OrganizationKeysetPagination
+
     def get_queryset(self):
-        return Organization.objects.annotate(
-            total_downloads=Coalesce(
-                Count('files__downloads__id'),
-                Value(0),
-                output_field=IntegerField()
-            )
-        )
+        return Organization.objects.annotate(total_downloads=organization_download_count())
 
 
-class UserDownloadHistoryView(generics.ListAPIView):
+class UserDownloadHistoryView(ReplicaReadMixin, RowListMixin, generics.ListAPIView):
     """
     GET /api/v1/users/<user_id>/downloads/
+
+    Rows are read with values() and shaped without serializers.
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = UserDownloadSerializer
+    row_serializer_class = UserDownloadRowSerializer
+    pagination_class = DownloadKeysetPagination
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
-        get_object_or_404(User, pk=user_id) 
-        return Download.objects.filter(downloaded_by_id=user_id).select_related('file', 'file__organization')
+        get_object_or_404(User, pk=user_id)
+        return (
+            Download.objects.filter(downloaded_by_id=user_id)
+            .select_related('file__organization', 'file__uploaded_by')
+            .annotate(file_download_count=file_download_count('file_id'))
+        )
 
 
-class FileDownloadHistoryView(generics.ListAPIView):
+class FileDownloadHistoryView(ReplicaReadMixin, RowListMixin, generics.ListAPIView):
     """
     GET /api/v1/files/<file_id>/downloads/
+
+    Rows are read with values() and shaped without serializers.
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = FileDownloadSerializer
+    row_serializer_class = FileDownloadRowSerializer
+    pagination_class = DownloadKeysetPagination
 
     def get_queryset(self):
         file_id = self.kwargs['file_id']
-        get_object_or_404(File, pk=file_id)        
-        return Download.objects.filter(file_id=file_id).select_related('downloaded_by')
+        get_object_or_404(File, pk=file_id)
+        return Download.objects.filter(file_id=file_id).select_related('downloaded_by__organization')
+
+
+class DownloadExportMixin:
+    """
+    Turns a download history view into a streamed CSV or NDJSON export of
+    its whole queryset, oldest first, optionally narrowed by ``start``,
+    ``end`` and ``organization`` (matched through ``organization_lookup``).
+    The file is named by ``export_name``, formatted with the URL kwargs.
+    """
+    export_fields = ()
+    export_name = 'downloads'
+    organization_lookup = None
+
+    def get(self, request, *args, **kwargs):
+        query = DownloadExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        downloads = self.get_queryset()
+        if 'start' in params:
+            downloads = downloads.filter(downloaded_at__gte=params['start'])
+        if 'end' in params:
+            downloads = downloads.filter(downloaded_at__lt=params['end'])
+        if 'organization' in params:
+            downloads = downloads.filter(**{self.organization_lookup: params['organization']})
+        row_serializer = self.row_serializer_class()
+        rows = downloads.order_by('downloaded_at', 'id').values(*row_serializer.columns)
+        # The rows are read while the response streams, after this request's routing state is gone.
+        rows = rows.using(rows.db)
+        filename = self.export_name.format(**self.kwargs)
+        return export_response(rows, row_serializer, self.export_fields, kwargs['export_format'], filename)
+
+
+class UserDownloadExportView(DownloadExportMixin, UserDownloadHistoryView):
+    """
+    GET /api/v1/users/<user_id>/downloads/export.csv
+    GET /api/v1/users/<user_id>/downloads/export.ndjson
+
+    The complete download history of a user, streamed. ``organization``
+    filters on the organization of the downloaded file.
+    """
+    export_fields = (
+        'id',
+        'downloaded_at',
+        'file_info.id',
+        'file_info.name',
+        'file_info.organization',
+        'file_info.organization_name',
+        'file_info.uploaded_by_username',
+        'file_info.uploaded_at',
+        'file_info.file_size',
+        'file_info.content_type',
+        'file_info.download_count',
+    )
+    export_name = 'user-{user_id}-downloads'
+    organization_lookup = 'file__organization_id'
+
+
+class FileDownloadExportView(DownloadExportMixin, FileDownloadHistoryView):
+    """
+    GET /api/v1/files/<file_id>/downloads/export.csv
+    GET /api/v1/files/<file_id>/downloads/export.ndjson
+
+    The complete download history of a file, streamed. ``organization``
+    filters on the downloader's organization.
+    """
+    export_fields = (
+        'id',
+        'downloaded_at',
+        'user_info.id',
+        'user_info.username',
+        'user_info.email',
+        'user_info.organization.id',
+        'user_info.organization.name',
+    )
+    export_name = 'file-{file_id}-downloads'
+    organization_lookup = 'downloaded_by__organization_id'
+
+
+class UploadSessionCreateView(generics.CreateAPIView):
+    """
+    POST /api/v1/organizations/<org_id>/uploads/
+
+    Opens a resumable upload session; chunks are then PUT individually and
+    the session is committed into a File.
+    """
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated, IsFileUploaderOrganization]
+    serializer_class = UploadSessionSerializer
+
+    def perform_create(self, serializer):
+        organization = get_object_or_404(Organization, id=self.kwargs['org_id'])
+        serializer.save(
+            organization=organization,
+            created_by=self.request.user,
+            expires_at=timezone.now() + timedelta(seconds=settings.UPLOAD_SESSIONS['TTL'])
+        )
+
+
+class UploadSessionDetailView(generics.RetrieveDestroyAPIView):
+    """
+    GET, DELETE /api/v1/uploads/<session_id>/
+    """
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = UploadSessionSerializer
+    lookup_url_kwarg = 'session_id'
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(created_by=self.request.user).prefetch_related('chunks')
+
+
+class UploadChunkView(views.APIView):
+    """
+    PUT /api/v1/uploads/<session_id>/chunks/<index>/
+
+    The request body is the raw chunk. An optional X-Chunk-Checksum header
+    carries its hex SHA-256; chunks may arrive in any order and in parallel.
+    """
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, session_id, index, format=None):
+        session = get_object_or_404(UploadSession, pk=session_id, created_by=request.user)
+        try:
+            length = int(request.headers.get('Content-Length', ''))
+        except ValueError:
+            return Response({"detail": "Content-Length is required."}, status=status.HTTP_411_LENGTH_REQUIRED)
+        if length > settings.UPLOAD_SESSIONS['MAX_CHUNK_SIZE']:
+            raise ChunkTooLarge()
+        chunk = store_chunk(
+            session,
+            index,
+            request.stream,
+            expected_checksum=request.headers.get('X-Chunk-Checksum')
+        )
+        return Response(
+            {"index": chunk.index, "size": chunk.size, "checksum": chunk.checksum},
+            status=status.HTTP_201_CREATED
+        )
+
+
+class UploadSessionCommitView(views.APIView):
+    """
+    POST /api/v1/uploads/<session_id>/commit/
+
+    Assembles the received chunks into a File. An optional "checksum" field
+    is compared against the SHA-256 of the assembled content.
+    """
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, session_id, format=None):
+        session = get_object_or_404(UploadSession, pk=session_id, created_by=request.user)
+        missing = missing_chunks(session, session.chunks.values_list('index', flat=True))
+        if missing:
+            return Response(
+                {"detail": "Upload is incomplete.", "missing_chunks": missing},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        file_object = commit_session(session, expected_checksum=request.data.get('checksum'))
+        return Response(FileDetailSerializer(file_object).data, status=status.HTTP_201_CREATED)
+
+
+class DownloadTimeSeriesView(views.APIView):
+    """
+    GET /api/v1/analytics/downloads/?dimension=<file|organization|user>&id=<id>
+
+    Downloads per hour or day, read from the rollups only. Optional
+    parameters: granularity (hour, day), start and end. Buckets with no
+    downloads are returned as zero; downloads not yet rolled up are not
+    counted.
+    """
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        query = DownloadSeriesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        series = time_series(params['dimension'], params['id'], params['granularity'], params['start'], params['end'])
+        timestamp = DateTimeField()
+        return Response({
+            "dimension": params['dimension'],
+            "id": params['id'],
+            "granularity": params['granularity'],
+            "start": timestamp.to_representation(params['start']),
+            "end": timestamp.to_representation(params['end']),
+            "series": [
+                {"bucket": timestamp.to_representation(bucket), "count": count}
+                for bucket, count in series
+            ],
+        })
+
+
+class TopDownloadsView(views.APIView):
+    """
+    GET /api/v1/analytics/top/?dimension=<file|organization|user>
+
+    The most downloaded files, organizations or users over a time range,
+    read from the rollups only. Optional parameters: granularity, start,
+    end and limit (at most 100).
+    """
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        query = TopDownloadsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        ranking = top(params['dimension'], params['granularity'], params['start'], params['end'], params['limit'])
+        timestamp = DateTimeField()
+        return Response({
+            "dimension": params['dimension'],
+            "granularity": params['granularity'],
+            "start": timestamp.to_representation(params['start']),
+            "end": timestamp.to_representation(params['end']),
+            "results": [{"id": dimension_id, "count": count} for dimension_id, count in ranking],
+        })
+
+
+class TokenView(views.APIView):
+    """
+    POST   /api/v1/auth/token/
+    DELETE /api/v1/auth/token/
+
+    POST issues a signed bearer token for the logged-in user (session or
+    HTTP Basic) that authenticates later requests without a session or user
+    lookup. DELETE revokes the bearer token the request was made with.
+    """
+    authentication_classes = [SessionAuthentication, BasicAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, format=None):
+        if isinstance(request.successful_authenticator, SignedTokenAuthentication):
+            return Response(
+                {"detail": "Tokens cannot be issued with a token."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        token, claims = issue_token(request.user)
+        return Response({
+            "token": token,
+            "expires_at": DateTimeField().to_representation(expires_at(claims)),
+        }, status=status.HTTP_201_CREATED)
+
+    def delete(self, request, format=None):
+        if not isinstance(request.successful_authenticator, SignedTokenAuthentication):
+            return Response(
+                {"detail": "Only a bearer token can be revoked."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        revoke_token(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
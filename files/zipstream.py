@@ -0,0 +1,87 @@
+# file_storage_app/zipstream.py
+
+import logging
+import posixpath
+import zipfile
+
+from django.utils import timezone
+from files.delivery import CHUNK_SIZE, file_size, open_content
+from files.sniffing import is_compressed
+
+
+logger = logging.getLogger(__name__)
+
+
+class _StreamSink:
+    """
+    Write target for ``zipfile`` that hands back what was written so far.
+
+    It cannot tell() or seek(), so ``zipfile`` writes each entry's sizes and
+    CRC in a data descriptor after its data instead of seeking back to the
+    local header.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def archive_name(name, used):
+    """
+    A relative, unique path for ``name`` inside the archive.
+    """
+    parts = [part for part in name.split('/') if part not in ('', '.', '..')]
+    name = '/'.join(parts) or 'file'
+    candidate, counter = name, 1
+    while candidate in used:
+        counter += 1
+        stem, extension = posixpath.splitext(name)
+        candidate = f'{stem} ({counter}){extension}'
+    used.add(candidate)
+    return candidate
+
+
+def iter_zip(file_objects, chunk_size=CHUNK_SIZE):
+    """
+    Yield a ZIP archive of ``file_objects`` as it is written.
+
+    Only the current chunk of the current file is held in memory, and
+    nothing is written to disk. Already-compressed content types are
+    stored, everything else is deflated. Files missing from storage are
+    left out.
+    """
+    sink = _StreamSink()
+    used = set()
+    with zipfile.ZipFile(sink, 'w') as archive:
+        for file_object in file_objects:
+            try:
+                handle = open_content(file_object)
+            except FileNotFoundError:
+                logger.warning('File %s is missing from storage; leaving it out of the archive.', file_object.pk)
+                continue
+            info = zipfile.ZipInfo(
+                archive_name(file_object.name, used),
+                date_time=timezone.localtime(file_object.uploaded_at).timetuple()[:6]
+            )
+            info.compress_type = zipfile.ZIP_STORED if is_compressed(file_object.content_type) else zipfile.ZIP_DEFLATED
+            # Lets zipfile decide up front whether the entry needs ZIP64 fields.
+            info.file_size = file_size(file_object)
+            with handle, archive.open(info, 'w') as entry:
+                for chunk in iter(lambda: handle.read(chunk_size), b''):
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+    yield sink.drain()
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'files.middleware.PrimaryPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -66,6 +67,7 @@ WSGI_APPLICATION = 'storage.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Connections are kept open for CONN_MAX_AGE seconds and checked before reuse.
 
 DATABASES = {
     'default': {
@@ -75,9 +77,34 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('POSTGRES_HOST'),
         'PORT': os.getenv('POSTGRES_PORT'),
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Read replicas: POSTGRES_REPLICA_HOSTS is a comma-separated list of host[:port]
+# with the primary's database and credentials. The list and history endpoints
+# read from a replica unless the client wrote within the last
+# DATABASE_REPLICA_PIN_SECONDS; that should exceed the worst replication lag.
+# In tests the replicas mirror the primary's test database.
+
+DATABASE_REPLICAS = []
+
+for _address in filter(None, (item.strip() for item in os.getenv('POSTGRES_REPLICA_HOSTS', '').split(','))):
+    _host, _, _port = _address.partition(':')
+    _alias = f'replica{len(DATABASE_REPLICAS) + 1}'
+    DATABASES[_alias] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ['files.routers.ReplicaRouter']
+
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DATABASE_REPLICA_PIN_SECONDS', '10'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -121,3 +148,144 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'files.User'
+
+# Download event recording
+# A background worker batches Download rows; storage.test_settings writes
+# them synchronously so tests can see them right after the request.
+
+DOWNLOAD_EVENTS = {
+    'SINK': os.getenv('DOWNLOAD_EVENT_SINK', 'files.sinks.BufferedDownloadSink'),
+    'OPTIONS': {
+        'batch_size': int(os.getenv('DOWNLOAD_EVENT_BATCH_SIZE', '500')),
+        'flush_interval': float(os.getenv('DOWNLOAD_EVENT_FLUSH_INTERVAL', '1.0')),
+        'max_queue_size': int(os.getenv('DOWNLOAD_EVENT_MAX_QUEUE_SIZE', '10000')),
+        'overflow': os.getenv('DOWNLOAD_EVENT_OVERFLOW', 'sync'),
+    },
+}
+
+# Download delivery. 'stream' sends file bytes through Django. 'accel' returns an
+# empty response with X-Accel-Redirect pointing into ACCEL_PREFIX, an nginx
+# `internal` location aliased to the media root. 'sendfile' returns X-Sendfile
+# with the file's absolute path (Apache mod_xsendfile, lighttpd, Caddy);
+# SENDFILE_ROOT replaces the media root when the proxy sees it elsewhere.
+# Either way the proxy serves the bytes and Range requests with sendfile.
+
+DOWNLOAD_DELIVERY = {
+    'MODE': os.getenv('DOWNLOAD_DELIVERY_MODE', 'stream'),
+    'ACCEL_PREFIX': os.getenv('DOWNLOAD_ACCEL_PREFIX', '/protected/'),
+    'SENDFILE_ROOT': os.getenv('DOWNLOAD_SENDFILE_ROOT'),
+}
+
+# Storage compression: textual and other compressible uploads are stored
+# gzip-encoded. Clients that accept gzip get the stored bytes with
+# Content-Encoding: gzip; others get them decoded on the fly. An empty
+# STORAGE_COMPRESSION_ENCODING stores every upload as is.
+
+STORAGE_COMPRESSION = {
+    'ENCODING': os.getenv('STORAGE_COMPRESSION_ENCODING', 'gzip'),
+    'LEVEL': int(os.getenv('STORAGE_COMPRESSION_LEVEL', '6')),
+}
+
+# Signed bearer tokens (POST /api/v1/auth/token/). They are verified without
+# a database query; revoked ones are kept in a deny-list that is cached for
+# DENY_LIST_TIMEOUT seconds between refills. A revocation applies to the next
+# request on every worker: with REDIS_URL the shared deny-list is cleared,
+# and with the per-process local-memory cache each token request checks the
+# newest revocation id in the database (one indexed query) instead.
+
+TOKEN_AUTH = {
+    'LIFETIME': int(os.getenv('TOKEN_AUTH_LIFETIME', str(60 * 60))),
+    'DENY_LIST_TIMEOUT': int(os.getenv('TOKEN_AUTH_DENY_LIST_TIMEOUT', '300')),
+}
+
+# Signed download links (POST /api/v1/files/<id>/link/): default and longest
+# validity in seconds. A link keeps working for its lifetime even if the file
+# is deleted or the user loses access, so keep these short.
+
+DOWNLOAD_LINKS = {
+    'LIFETIME': int(os.getenv('DOWNLOAD_LINK_LIFETIME', str(15 * 60))),
+    'MAX_LIFETIME': int(os.getenv('DOWNLOAD_LINK_MAX_LIFETIME', str(7 * 24 * 60 * 60))),
+}
+
+# Download history partitioning (PostgreSQL only): one partition per month.
+# create_download_partitions keeps MONTHS_AHEAD future months ready, and
+# apply_download_retention detaches partitions older than KEEP_MONTHS full
+# months and archives them to ARCHIVE_DIR in the default storage.
+
+DOWNLOAD_PARTITIONS = {
+    'MONTHS_AHEAD': int(os.getenv('DOWNLOAD_PARTITIONS_MONTHS_AHEAD', '3')),
+    'KEEP_MONTHS': int(os.getenv('DOWNLOAD_RETENTION_MONTHS', '24')),
+    'ARCHIVE_DIR': os.getenv('DOWNLOAD_ARCHIVE_DIR', 'archives/downloads'),
+}
+
+# Download counters are split across this many rows per file and organization
+# so concurrent downloads of a hot file do not contend on one row.
+
+DOWNLOAD_COUNTER_SHARDS = int(os.getenv('DOWNLOAD_COUNTER_SHARDS', '8'))
+
+# Download rollups: rows younger than this are left for the next run so that
+# ids from still-open transactions are never skipped by the watermark.
+
+ROLLUP_SETTLE_SECONDS = int(os.getenv('ROLLUP_SETTLE_SECONDS', '60'))
+
+# Longest time series (in buckets) a single analytics request may ask for.
+
+ANALYTICS_MAX_BUCKETS = int(os.getenv('ANALYTICS_MAX_BUCKETS', '2000'))
+
+# Resumable upload sessions
+
+UPLOAD_SESSIONS = {
+    # Sessions not committed within this many seconds are rejected and purged.
+    'TTL': int(os.getenv('UPLOAD_SESSION_TTL', str(24 * 60 * 60))),
+    'MAX_CHUNK_SIZE': int(os.getenv('UPLOAD_SESSION_MAX_CHUNK_SIZE', str(64 * 1024 * 1024))),
+    'MAX_CHUNKS': int(os.getenv('UPLOAD_SESSION_MAX_CHUNKS', '10000')),
+}
+
+# Batch uploads: most files one request (or archive) may create, and most
+# bytes an archive may unpack to. Django's own limit on file parts per
+# request is raised to match.
+
+BATCH_UPLOAD_MAX_FILES = int(os.getenv('BATCH_UPLOAD_MAX_FILES', '1000'))
+
+BATCH_UPLOAD_MAX_BYTES = int(os.getenv('BATCH_UPLOAD_MAX_BYTES', str(10 * 1024 ** 3)))
+
+DATA_UPLOAD_MAX_NUMBER_FILES = BATCH_UPLOAD_MAX_FILES
+
+# Rows fetched per round trip (and written per chunk) by the download history exports.
+
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+
+# Most files one streamed ZIP download may contain.
+
+ARCHIVE_MAX_FILES = int(os.getenv('ARCHIVE_MAX_FILES', '1000'))
+
+# Cached API responses are keyed by version numbers that every upload and
+# download bumps, so they are never served stale; the timeout only bounds
+# memory. This needs a cache all processes share: set REDIS_URL (needs the
+# redis package). The default local-memory cache is per process, and so are
+# its versions, so list responses are not cached with it. storage.test_settings
+# turns caching off unless a test enables it.
+
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    DEFAULT_CACHE = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}
+else:
+    DEFAULT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('API_CACHE_MAX_ENTRIES', '10000'))},
+    }
+
+CACHES = {
+    'default': DEFAULT_CACHE,
+}
+
+API_CACHE_ALIAS = 'default'
+
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', '300'))
+
+# List endpoints use keyset pagination; clients may ask for up to API_MAX_PAGE_SIZE rows with ?page_size=.
+
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '100'))
+
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '1000'))
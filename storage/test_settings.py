@@ -0,0 +1,14 @@
+# Settings for the test suite: python manage.py test --settings=storage.test_settings
+
+from storage.settings import *  # noqa: F401,F403
+
+# Write Download rows synchronously so assertions can see them right after the request.
+DOWNLOAD_EVENTS = {
+    **DOWNLOAD_EVENTS,  # noqa: F405
+    'SINK': 'files.sinks.SyncDownloadSink',
+}
+
+# Nothing is cached unless a test enables a cache with override_settings.
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}